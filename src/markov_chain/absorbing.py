@@ -0,0 +1,129 @@
+import warnings
+
+from dataclasses import dataclass
+from typing import Callable
+from typing import Union
+
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from markov_chain.matrix_structure import bandwidth
+from markov_chain.matrix_structure import to_banded
+
+
+Matrix = Union[np.ndarray, sp.spmatrix]
+
+# Above this fraction of non-zero entries the transient block is factorised densely
+DENSE_FACTOR_THRESHOLD = 0.1
+# Up to this fraction of the states, the band (lower + upper + 1 diagonals) of the transient block is solved banded
+BANDED_WIDTH_THRESHOLD = 0.1
+
+
+@dataclass
+class AbsorptionResult:
+    """
+    Dataclass containing absorbing-chain analytics for every starting state.
+
+    probabilities[i, x] is the probability of ending in absorbing_states[i] when starting from state x.
+    expected_steps[x] and variance_steps[x] are the mean and variance of the number of steps before absorption.
+    """
+
+    absorbing_states: np.ndarray
+    transient_states: np.ndarray
+    probabilities: np.ndarray
+    expected_steps: np.ndarray
+    variance_steps: np.ndarray
+
+
+def absorbing_states(matrix: Matrix) -> np.ndarray:
+    """Return the indices of the states which transition to themselves with probability 1"""
+    return np.flatnonzero(np.isclose(matrix.diagonal(), 1))
+
+
+def _transposed_solver(block: Matrix) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Factorise I - Q once and return a function solving (I - Q)^T x = b.
+
+    Narrow banded blocks, dense or sparse, are solved with a LAPACK banded LU in O(n * bandwidth^2), e.g. O(n) for the
+    tridiagonal gambler's ruin. Otherwise sparse blocks use a sparse LU and dense ones a dense LU.
+    """
+    n = block.shape[0]
+    lower, upper = bandwidth(block)
+    if lower + upper + 1 <= max(BANDED_WIDTH_THRESHOLD * n, 3):
+        # The transpose of a matrix with (lower, upper) diagonals has (upper, lower)
+        bands = to_banded((sp.identity(n, format="csc") - sp.csc_matrix(block)).T, upper, lower)
+
+        def solve(rhs: np.ndarray) -> np.ndarray:
+            return la.solve_banded((upper, lower), bands, rhs, check_finite=False)
+
+        return solve
+    if sp.issparse(block) and block.nnz <= DENSE_FACTOR_THRESHOLD * n * n:
+        lu = spla.splu(sp.identity(n, format="csc") - block.tocsc())
+
+        def solve(rhs: np.ndarray) -> np.ndarray:
+            return lu.solve(rhs, trans="T")
+
+        return solve
+    dense = block.toarray() if sp.issparse(block) else np.asarray(block)
+    system = np.identity(n) - dense
+    with warnings.catch_warnings():
+        # Singularity is reported below as an error
+        warnings.simplefilter("ignore", la.LinAlgWarning)
+        lu, piv = la.lu_factor(system, check_finite=False, overwrite_a=True)
+    if np.any(np.isclose(np.diag(lu), 0)):
+        raise la.LinAlgError("I - Q is singular")
+
+    def solve(rhs: np.ndarray) -> np.ndarray:
+        return la.lu_solve((lu, piv), rhs, trans=1, check_finite=False)
+
+    return solve
+
+
+def absorption_analysis(matrix: Matrix) -> AbsorptionResult:
+    """
+    Compute absorption probabilities and the mean and variance of the time to absorption.
+
+    With Q the transient-to-transient block and R the transient-to-absorbing block of the (column stochastic) matrix,
+    the fundamental matrix is N = (I - Q)^-1. Rather than forming N, a single LU factorisation of I - Q is used to solve
+        (I - Q)^T t = 1                       expected steps
+        (I - Q)^T y = t, var = 2y - t - t^2   variance of the steps
+        (I - Q)^T B = R^T                     absorption probabilities
+    A banded LU keeps this O(n) for banded chains such as gambler's ruin, dense or sparse. Every non-absorbing state
+    must be able to reach an absorbing state, otherwise I - Q is singular and a RuntimeError is raised.
+    """
+    n = matrix.shape[0]
+    absorbing = absorbing_states(matrix)
+    if len(absorbing) == 0:
+        raise RuntimeError("Chain has no absorbing states")
+    transient = np.setdiff1d(np.arange(n), absorbing)
+
+    probabilities = np.zeros((len(absorbing), n))
+    probabilities[np.arange(len(absorbing)), absorbing] = 1.0
+    expected = np.zeros(n)
+    variance = np.zeros(n)
+
+    if len(transient):
+        if sp.issparse(matrix):
+            matrix = sp.csc_matrix(matrix)
+            q = matrix[transient][:, transient]
+            r = matrix[absorbing][:, transient].toarray()
+        else:
+            matrix = np.asarray(matrix)
+            q = matrix[np.ix_(transient, transient)]
+            r = matrix[np.ix_(absorbing, transient)]
+        try:
+            solve = _transposed_solver(q)
+            steps = solve(np.ones(len(transient)))
+            second = solve(steps)
+            absorbed = solve(np.ascontiguousarray(r.T))
+        except (RuntimeError, la.LinAlgError) as e:
+            raise RuntimeError("Some non-absorbing states can never reach an absorbing state") from e
+        if not np.all(np.isfinite(steps)) or np.any(steps < 1 - 1e-8):
+            raise RuntimeError("Some non-absorbing states can never reach an absorbing state")
+        expected[transient] = steps
+        variance[transient] = 2 * second - steps - steps**2
+        probabilities[:, transient] = absorbed.T
+
+    return AbsorptionResult(absorbing, transient, probabilities, expected, variance)
@@ -1,9 +1,13 @@
 import streamlit as st
 
+from markov_chain.apps.streamlit.utils import decomposition_cache
+from markov_chain.cache import set_default_cache
 from markov_chain.examples.gamblers_ruin import gamblers_ruin
 from markov_chain.plot_chain import MarkovChainPlotter
 
 
+set_default_cache(decomposition_cache())
+
 st.title("Simulating Gambler's Ruin through Eigenfactor Centrality")
 
 st.subheader("Description")
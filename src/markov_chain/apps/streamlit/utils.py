@@ -0,0 +1,22 @@
+import os
+
+import streamlit as st
+
+from markov_chain.cache import DecompositionCache
+from markov_chain.service import EvaluationService
+
+
+@st.cache_resource
+def decomposition_cache() -> DecompositionCache:
+    """
+    Decomposition cache shared by every session and rerun of the app.
+
+    Set MARKOV_CHAIN_CACHE_DIR to also keep decompositions on disk between app restarts.
+    """
+    return DecompositionCache(directory=os.environ.get("MARKOV_CHAIN_CACHE_DIR"))
+
+
+@st.cache_resource
+def evaluation_service() -> EvaluationService:
+    """Evaluation service shared by every session and rerun of the app, so identical queries share one computation"""
+    return EvaluationService()
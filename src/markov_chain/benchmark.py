@@ -0,0 +1,346 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import product
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import scipy
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.gamblers_ruin import gamblers_ruin
+from markov_chain.examples.monopoly.monte_carlo import MonopolyMonteCarlo
+from markov_chain.precision import DECOMPOSITIONS
+from markov_chain.propagation import ENGINES
+
+
+# Values swept for each axis: n states, t steps and Monte Carlo players
+SWEEPS: Dict[str, Dict[str, Tuple[int, ...]]] = {
+    "quick": {"n": (20, 80), "t": (10, 100), "players": (1000, 10000)},
+    "full": {"n": (100, 400, 1600), "t": (10, 1000), "players": (10**4, 10**5, 10**6)},
+}
+# Ratio of a current measurement to its baseline above which it is reported as a regression
+REGRESSION_TOLERANCE = 1.5
+# Times and peak memory below these are dominated by noise, so are never reported as regressions
+MIN_COMPARABLE_SECONDS = 1e-3
+MIN_COMPARABLE_BYTES = 2**20
+
+
+@dataclass
+class Usage:
+    """Dataclass containing the wall time and peak memory of a block of code"""
+
+    seconds: float = 0.0
+    peak_bytes: int = 0
+
+
+@contextmanager
+def track(memory: bool = True) -> Iterator[Usage]:
+    """
+    Measure the wall time and, if memory is set, the peak memory allocated within a with block.
+
+    Memory is traced with tracemalloc, which sees every allocation made through Python, including numpy arrays, but
+    not LAPACK's internal workspace. Unlike system-wide readings it is not affected by other processes. Tracing slows
+    allocation, so time measurements that matter should be taken with memory=False. Blocks cannot be nested.
+    """
+    usage = Usage()
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if memory:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield usage
+    finally:
+        usage.seconds = time.perf_counter() - start
+        if memory:
+            usage.peak_bytes = max(tracemalloc.get_traced_memory()[1] - current, 0)
+            if started_tracing:
+                tracemalloc.stop()
+
+
+@dataclass
+class Measurement:
+    """Dataclass containing the timings and peak memory of one benchmark run with one set of parameters"""
+
+    name: str
+    params: Dict[str, Any]
+    times: List[float]
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        """Identifier of the benchmark and its parameters, e.g. state_at_time[engine=eig,n=100,t=10]"""
+        return f"{self.name}[{','.join(f'{k}={v}' for k, v in sorted(self.params.items()))}]"
+
+    @property
+    def best(self) -> float:
+        """Fastest time, the least noisy estimate of the cost"""
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        """Median time"""
+        return statistics.median(self.times)
+
+
+def measure(
+    run: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None, repeats: int = 5
+) -> Tuple[List[float], int]:
+    """
+    Time run repeats times, then measure its peak memory in one more traced run. Returns (times, peak_bytes).
+
+    setup is called, untimed, before every run and its result passed to run, so that each run starts from the same
+    state (e.g. a chain which has not been decomposed yet).
+    """
+    times = []
+    for _ in range(repeats):
+        prepared = setup() if setup is not None else None
+        with track(memory=False) as usage:
+            run(prepared)
+        times.append(usage.seconds)
+    prepared = setup() if setup is not None else None
+    with track() as usage:
+        run(prepared)
+    return times, usage.peak_bytes
+
+
+@dataclass
+class Benchmark:
+    """
+    Dataclass describing a benchmark: setup and run are called with one value for each of the sweep axes and options.
+
+    axes name the values swept from SWEEPS and options give the values of any other parameters, every combination of
+    which is run.
+    """
+
+    name: str
+    run: Callable[..., Any]
+    axes: Tuple[str, ...] = ()
+    options: Optional[Dict[str, Sequence[Any]]] = None
+    setup: Optional[Callable[..., Any]] = None
+
+    def cases(self, sweep: Dict[str, Sequence[int]]) -> Iterator[Dict[str, Any]]:
+        """Yield the parameters of every case in the sweep"""
+        grid = {axis: sweep[axis] for axis in self.axes}
+        grid.update(self.options or {})
+        for values in product(*grid.values()):
+            yield dict(zip(grid, values))
+
+    def measure(self, params: Dict[str, Any], repeats: int = 5) -> Measurement:
+        """Measure one case"""
+        setup = None if self.setup is None else lambda: self.setup(**params)
+        times, peak_bytes = measure(lambda prepared: self.run(prepared, **params), setup, repeats)
+        return Measurement(self.name, params, times, peak_bytes)
+
+
+def random_matrix(n: int, seed: int = 0) -> np.ndarray:
+    """Dense random column stochastic matrix, with a unique stationary state"""
+    matrix = np.random.default_rng(seed).random((n, n))
+    return matrix / matrix.sum(axis=0)
+
+
+def _chain(n: int, decomposition: str = "complex", **params) -> MarkovChain:
+    # No decomposition cache, so every run decomposes afresh
+    return MarkovChain(random_matrix(n), np.full(n, 1.0 / n), cache=None, decomposition=decomposition)
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    benchmark.name: benchmark
+    for benchmark in [
+        Benchmark(
+            "construct",
+            lambda matrix, n: MarkovChain(matrix, np.full(n, 1.0 / n), cache=None),
+            axes=("n",),
+            setup=lambda n: random_matrix(n),
+        ),
+        Benchmark(
+            "evaluate",
+            lambda chain, **params: chain._evaluate(),
+            axes=("n",),
+            options={"decomposition": DECOMPOSITIONS},
+            setup=_chain,
+        ),
+        Benchmark(
+            "state_at_time",
+            lambda chain, t, engine, **params: chain.state_at_time(t, engine=engine),
+            axes=("n", "t"),
+            options={"engine": ENGINES},
+            setup=_chain,
+        ),
+        Benchmark(
+            "stationary_state",
+            lambda chain, method, **params: chain.stationary_state(method),
+            axes=("n",),
+            options={"method": ("eig", "direct", "power")},
+            setup=_chain,
+        ),
+        Benchmark(
+            "monopoly_monte_carlo",
+            lambda _, players, turns: MonopolyMonteCarlo(
+                num_players=players, history_size=0, rng=np.random.default_rng(0)
+            ).state_at_time(turns),
+            axes=("players",),
+            options={"turns": (40,)},
+        ),
+        Benchmark(
+            "gamblers_ruin",
+            lambda _, n, banded: gamblers_ruin(initial_position=n // 2, upper_limit=n, banded=banded),
+            axes=("n",),
+            options={"banded": (False, True)},
+        ),
+    ]
+}
+
+
+def run_benchmarks(
+    names: Optional[Sequence[str]] = None,
+    sweep: Union[str, Dict[str, Sequence[int]]] = "quick",
+    repeats: int = 5,
+    callback: Optional[Callable[[Measurement], None]] = None,
+) -> List[Measurement]:
+    """Run the named benchmarks (all by default) over a sweep, calling callback with each measurement as it is made"""
+    sweep = SWEEPS[sweep] if isinstance(sweep, str) else sweep
+    names = list(BENCHMARKS) if not names else names
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s) {', '.join(unknown)}. Choose from {', '.join(BENCHMARKS)}.")
+    measurements = []
+    for name in names:
+        benchmark = BENCHMARKS[name]
+        for params in benchmark.cases(sweep):
+            measurement = benchmark.measure(params, repeats)
+            measurements.append(measurement)
+            if callback is not None:
+                callback(measurement)
+    return measurements
+
+
+def save_results(measurements: List[Measurement], path: Union[str, Path]) -> None:
+    """Write measurements to a JSON file, with the versions and platform they were measured on"""
+    document = {
+        "metadata": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "system": platform.system(),
+        },
+        "results": [
+            {
+                "key": m.key,
+                "name": m.name,
+                "params": m.params,
+                "times": m.times,
+                "best": m.best,
+                "median": m.median,
+                "peak_bytes": m.peak_bytes,
+            }
+            for m in measurements
+        ],
+    }
+    Path(path).write_text(json.dumps(document, indent=2) + "\n")
+
+
+def load_results(path: Union[str, Path]) -> List[Measurement]:
+    """Read measurements written by save_results"""
+    document = json.loads(Path(path).read_text())
+    return [Measurement(r["name"], r["params"], r["times"], r["peak_bytes"]) for r in document["results"]]
+
+
+@dataclass
+class Regression:
+    """Dataclass describing a measurement which is worse than its baseline"""
+
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        """How many times worse the current measurement is"""
+        return self.current / self.baseline
+
+
+def compare(
+    measurements: List[Measurement], baseline: List[Measurement], tolerance: float = REGRESSION_TOLERANCE
+) -> List[Regression]:
+    """
+    Return the measurements whose best time or peak memory exceeds the baseline by more than the tolerance ratio.
+
+    Measurements without a baseline, and those below MIN_COMPARABLE_SECONDS or MIN_COMPARABLE_BYTES, are skipped.
+    """
+    baseline = {m.key: m for m in baseline}
+    regressions = []
+    for m in measurements:
+        reference = baseline.get(m.key)
+        if reference is None:
+            continue
+        if m.best > MIN_COMPARABLE_SECONDS and m.best > tolerance * reference.best:
+            regressions.append(Regression(m.key, "seconds", reference.best, m.best))
+        if m.peak_bytes > MIN_COMPARABLE_BYTES and m.peak_bytes > tolerance * reference.peak_bytes:
+            regressions.append(Regression(m.key, "peak_bytes", reference.peak_bytes, m.peak_bytes))
+    return regressions
+
+
+def _format(measurement: Measurement) -> str:
+    return (
+        f"{measurement.key:<60} {measurement.best * 1e3:12.3f} ms {measurement.median * 1e3:12.3f} ms"
+        f" {measurement.peak_bytes / 2**20:10.2f} MiB\n"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line interface: python -m markov_chain.benchmark --help"""
+    parser = argparse.ArgumentParser(
+        prog="python -m markov_chain.benchmark",
+        description="Time and measure the peak memory of MarkovChain engines and the examples, over sizes n, steps t "
+        "and Monte Carlo player counts.",
+    )
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run, from {', '.join(BENCHMARKS)}. Default all.")
+    parser.add_argument("--sweep", choices=list(SWEEPS), default="quick", help="Values of n, t and players swept")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs of each case; the best is compared")
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file, e.g. to make a baseline")
+    parser.add_argument("--baseline", type=Path, help="Compare with results in this JSON file")
+    parser.add_argument(
+        "--tolerance", type=float, default=REGRESSION_TOLERANCE, help="Ratio to the baseline reported as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    sys.stdout.write(f"{'benchmark':<60} {'best':>15} {'median':>15} {'peak memory':>14}\n")
+    measurements = run_benchmarks(args.names, args.sweep, args.repeats, lambda m: sys.stdout.write(_format(m)))
+    if args.output is not None:
+        save_results(measurements, args.output)
+    if args.baseline is None:
+        return 0
+    regressions = compare(measurements, load_results(args.baseline), args.tolerance)
+    for regression in regressions:
+        sys.stdout.write(
+            f"REGRESSION {regression.key} {regression.metric}: {regression.baseline:.4g} -> {regression.current:.4g} "
+            f"({regression.ratio:.2f}x)\n"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
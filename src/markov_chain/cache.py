@@ -0,0 +1,167 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import scipy.sparse as sp
+
+
+@dataclass
+class CachedDecomposition:
+    """Initial-state independent part of a MarkovChain eigendecomposition"""
+
+    eigenvalues: np.ndarray
+    eigenvectors: np.ndarray
+    inverse_eigenvectors: np.ndarray
+    condition_number: float
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the arrays"""
+        return self.eigenvalues.nbytes + self.eigenvectors.nbytes + self.inverse_eigenvectors.nbytes
+
+
+def matrix_key(matrix: Union[np.ndarray, sp.spmatrix], **options) -> str:
+    """
+    Return a content hash of a probability matrix and the options used to decompose it.
+
+    Dense matrices are hashed from their raw bytes, sparse matrices from their CSC arrays. Options are included in
+    sorted order so that, for example, a different algorithm or precision gives a different key.
+    """
+    digest = hashlib.sha256()
+    if sp.issparse(matrix):
+        matrix = sp.csc_matrix(matrix)
+        matrix.sort_indices()
+        arrays = [matrix.data, matrix.indices, matrix.indptr]
+        digest.update(b"sparse")
+    else:
+        arrays = [np.asarray(matrix)]
+    digest.update(repr(matrix.shape).encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(array.dtype.str.encode())
+        digest.update(memoryview(array).cast("B"))
+    digest.update(repr(sorted(options.items())).encode())
+    return digest.hexdigest()
+
+
+class DecompositionCache:
+    """
+    Content-addressed cache of MarkovChain eigendecompositions.
+
+    Entries are keyed by matrix_key. The in-process tier is an LRU bounded by max_bytes of array memory. If a directory
+    is given, entries are also written there as .npy files and loaded back memory-mapped (read only), so a new process
+    or a Streamlit rerun can reuse decompositions computed earlier without reading them fully into memory.
+    """
+
+    _FIELDS = ("eigenvalues", "eigenvectors", "inverse_eigenvectors", "condition_number")
+
+    def __init__(self, max_bytes: int = 256 * 2**20, directory: Optional[Union[str, Path]] = None) -> None:
+        self.max_bytes = max_bytes
+        self.directory = None if directory is None else Path(directory)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, CachedDecomposition]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Array memory held by the in-process tier"""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or (self.directory is not None and (self.directory / key).is_dir())
+
+    def get(self, key: str) -> Optional[CachedDecomposition]:
+        """Return the cached decomposition for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._insert(key, entry)
+        return entry
+
+    def put(self, key: str, entry: CachedDecomposition) -> None:
+        """Store a decomposition in memory and, if configured, on disk"""
+        with self._lock:
+            self._insert(key, entry)
+        if self.directory is not None and not (self.directory / key).is_dir():
+            self._save(key, entry)
+
+    def clear(self, disk: bool = False) -> None:
+        """Empty the in-process tier, and the on-disk tier if disk is set"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+        if disk and self.directory is not None:
+            for path in self.directory.iterdir():
+                if path.is_dir():
+                    shutil.rmtree(path)
+
+    def _insert(self, key: str, entry: CachedDecomposition) -> None:
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key).nbytes
+        if entry.nbytes > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._nbytes += entry.nbytes
+        while self._nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= evicted.nbytes
+
+    def _save(self, key: str, entry: CachedDecomposition) -> None:
+        # Write to a temporary directory and rename, so concurrent readers never see a partial entry
+        tmp = Path(tempfile.mkdtemp(dir=self.directory, prefix=".tmp-"))
+        try:
+            for field in self._FIELDS:
+                np.save(tmp / f"{field}.npy", np.asarray(getattr(entry, field)))
+            os.replace(tmp, self.directory / key)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _load(self, key: str) -> Optional[CachedDecomposition]:
+        if self.directory is None:
+            return None
+        path = self.directory / key
+        try:
+            arrays = {field: np.load(path / f"{field}.npy", mmap_mode="r") for field in self._FIELDS}
+        except (OSError, ValueError):
+            return None
+        arrays["condition_number"] = float(arrays["condition_number"])
+        return CachedDecomposition(**arrays)
+
+
+_default_cache: Optional[DecompositionCache] = None
+
+
+def get_default_cache() -> Optional[DecompositionCache]:
+    """Return the cache used by MarkovChain instances created without an explicit cache"""
+    return _default_cache
+
+
+def set_default_cache(cache: Optional[DecompositionCache]) -> None:
+    """Set (or with None, remove) the cache used by MarkovChain instances created without an explicit cache"""
+    global _default_cache
+    _default_cache = cache
@@ -1,8 +1,73 @@
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 import numpy as np
 import numpy.typing as npt
+import scipy.sparse as sp
+
+from markov_chain.absorbing import AbsorptionResult
+from markov_chain.absorbing import absorbing_states
+from markov_chain.absorbing import absorption_analysis
+from markov_chain.cache import CachedDecomposition
+from markov_chain.cache import DecompositionCache
+from markov_chain.cache import get_default_cache
+from markov_chain.cache import matrix_key
+from markov_chain.classes import CommunicatingClass
+from markov_chain.classes import closed_class_states
+from markov_chain.classes import closed_class_weights
+from markov_chain.classes import communicating_classes
+from markov_chain.incremental import StationaryUpdater
+from markov_chain.incremental import changed_columns
+from markov_chain.incremental import replace_columns
+from markov_chain.instrumentation import span
+from markov_chain.precision import DECOMPOSITIONS
+from markov_chain.precision import conjugate_partners
+from markov_chain.precision import error_bound
+from markov_chain.precision import lapack_supported
+from markov_chain.precision import real_decomposition
+from markov_chain.propagation import ENGINES
+from markov_chain.propagation import MatrixPowerEngine
+from markov_chain.propagation import choose_engine
+from markov_chain.solvers import SOLVERS
+from markov_chain.solvers import SolverError
+from markov_chain.solvers import StationaryResult
+from markov_chain.solvers import residual
+from markov_chain.storage import read_arrays
+from markov_chain.storage import write_arrays
+
+
+# Size of the row blocks used to validate column sums of dense matrices
+VALIDATION_CHUNK_BYTES = 64 * 2**20
+
+
+# Stationary methods which only need products with the probability matrix, so work on a LinearOperator
+MATRIX_FREE_METHODS = ("power", "arnoldi", "gmres")
+
+
+def total_variation(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Return the total variation distance between distributions along the last axis: half the L1 distance"""
+    return 0.5 * np.abs(np.asarray(p) - np.asarray(q)).sum(axis=-1)
+
+
+def validate_initial_state(
+    initial_state: Optional[npt.ArrayLike], n_states: int, dtype: Optional[npt.DTypeLike] = None
+) -> Optional[np.ndarray]:
+    """Return initial_state as a copied array, a single (n,) state or a (k, n) batch each summing to one"""
+    if initial_state is None:
+        return None
+    initial_state = np.array(initial_state, dtype=dtype)
+    if initial_state.ndim not in (1, 2) or initial_state.shape[-1] != n_states:
+        raise ValueError("Initial state does not match the number of states")
+    if not np.all(np.isclose(initial_state.sum(axis=-1), 1)):
+        raise ValueError("Initial state does not sum to one")
+    return initial_state
 
 
 @dataclass
@@ -12,6 +77,9 @@ class EigenContainer:
     constants: Optional[np.ndarray]
     eigenvalues: np.ndarray
     eigenvectors: np.ndarray
+    condition_number: float = np.inf
+    # Conjugate pair partner of each row of a real decomposition, None for a complex decomposition
+    partners: Optional[np.ndarray] = None
 
 
 class MarkovChain:
@@ -35,22 +103,72 @@ class MarkovChain:
         [p0,p1,p2,...]
     where px is the probability of the system starting at state x. The sum of this array must therefore be 1, and the
     class raises an exception otherwise.
+    A batch of k initial states may be given as a (k, n) array, in which case every row must sum to 1. The
+    decomposition is then shared by the whole batch and state_at_time and stationary_state return (k, n) arrays.
+
+    The probability matrix may also be a scipy.sparse matrix (or built from COO triplets with from_coo). It is then
+    stored in CSC format and never densified: states are propagated with sparse matrix-vector products and the
+    stationary state is found with a sparse LU solve, so cost scales with the number of non-zero entries.
+
+    The stationary state of a dense chain is found from the full eigendecomposition by default. Any of the solvers in
+    markov_chain.solvers can be selected instead with the method argument of stationary_state or solve_stationary.
+
+    The engine used by state_at_time is chosen per call by markov_chain.propagation.choose_engine unless fixed with
+    the engine argument: "eig" (eigendecomposition), "matvec" (repeated matrix-vector products) or "squaring" (binary
+    exponentiation with cached powers of P). The matrix power engines avoid inverting the eigenvector matrix, which
+    is ill-conditioned for nearly defective chains.
+
+    Eigendecompositions can be shared between instances through a markov_chain.cache.DecompositionCache, passed as
+    cache or installed process-wide with markov_chain.cache.set_default_cache.
+
+    The precision follows dtype. float32 halves the memory and roughly doubles the throughput of large chains at the
+    cost of about 7 significant digits. np.longdouble carries about 3 more digits than float64 (on x86), for
+    eigenvalues so close together that the eigendecomposition cannot be trusted: LAPACK has no extended precision
+    eigensolver, so states are always propagated with the matrix power engines and the stationary state defaults to
+    the "refined" solver. Dense chains are decomposed in complex arithmetic by default, or with decomposition="real"
+    in real block diagonal form (see markov_chain.precision.real_decomposition), which avoids complex arithmetic when
+    evaluating states. error_bound estimates the rounding error of each engine.
+
+    Timings of the decomposition, inversion, state evaluations and stationary solves, with the condition number,
+    solver iterations and cache hits, are reported to markov_chain.instrumentation sinks while any are installed.
+
+    Chains can be saved to a compact binary file with save and opened memory-mapped with load, optionally with their
+    eigendecomposition and stationary state, so large precomputed chains open in milliseconds.
+
+    For what-if analysis, update returns a chain with some columns of the probability matrix changed whose stationary
+    state is found incrementally from this chain's factorisation (see markov_chain.incremental).
     """
 
+    # Stationary methods available, or None for all. Set by subclasses whose probability matrix is a LinearOperator.
+    _stationary_methods: Optional[Tuple[str, ...]] = None
+
     def __init__(
         self,
-        probability_matrix: npt.ArrayLike,
+        probability_matrix: Union[npt.ArrayLike, sp.spmatrix],
         initial_state: Optional[npt.ArrayLike] = None,
+        engine: str = "auto",
+        cache: Optional[DecompositionCache] = None,
+        dtype: Optional[npt.DTypeLike] = None,
+        copy: bool = True,
+        decomposition: str = "complex",
     ) -> None:
 
-        self._evaluation = None
+        if engine != "auto" and engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine}. Choose from auto, {', '.join(ENGINES)}.")
+        self._init_attributes(engine, cache, decomposition)
 
-        probability_matrix = np.array(probability_matrix)
+        self._sparse = sp.issparse(probability_matrix)
+        if self._sparse:
+            probability_matrix = self._to_sparse_storage(probability_matrix, dtype or float)
+        elif copy:
+            probability_matrix = np.array(probability_matrix, dtype=dtype)
+        else:
+            probability_matrix = np.asarray(probability_matrix, dtype=dtype)
         if len(probability_matrix.shape) != 2 or (probability_matrix.shape[0] != probability_matrix.shape[1]):
             raise ValueError("Matrix supplied to Markov Chain class not square")
 
-        col_totals = probability_matrix.sum(axis=0)
-        if not all(np.isclose(col_totals, 1)):
+        col_totals = self._column_totals(probability_matrix)
+        if not np.all(np.isclose(col_totals, 1)):
             raise ValueError(
                 "Matrix column at position(s) "
                 + str(np.argwhere(~np.isclose(col_totals, 1)).ravel())
@@ -59,28 +177,257 @@ class MarkovChain:
 
         self._probability_matrix = probability_matrix
         self.n_states = probability_matrix.shape[0]
+        self._initial_state = self._validate_initial_state(initial_state)
 
-        if initial_state is not None:
-            initial_state = np.array(initial_state)
-            if not np.isclose(initial_state.sum(), 1):
-                raise ValueError("Initial state does not sum to one")
+    def _init_attributes(
+        self, engine: str, cache: Optional[DecompositionCache] = None, decomposition: str = "complex"
+    ) -> None:
+        """
+        Set every attribute apart from the probability matrix, n_states, _sparse and the initial state.
 
-        self._initial_state = initial_state
+        Subclasses which never form the probability matrix (CirculantMarkovChain, PageRank) call this instead of
+        __init__, so that they have the same attributes as any other chain.
+        """
+        if decomposition not in DECOMPOSITIONS:
+            raise ValueError(f"Unknown decomposition {decomposition}. Choose from {', '.join(DECOMPOSITIONS)}.")
+        self.decomposition = decomposition
+        self._cache = cache if cache is not None else get_default_cache()
+        self.engine = engine
+        self._evaluation = None
+        self._power_engine = None
+        # Set by update: the factorisation shared with the chain this was derived from, and the columns changed since
+        self._updater = None
+        self._changed_columns = None
+        # Stationary result loaded with the chain (see load), returned by solve_stationary when no method is given
+        self._stationary = None
+
+    def _validate_initial_state(self, initial_state: Optional[npt.ArrayLike]) -> Optional[np.ndarray]:
+        return validate_initial_state(initial_state, self.n_states)
+
+    @staticmethod
+    def _to_sparse_storage(probability_matrix: sp.spmatrix, dtype: npt.DTypeLike) -> sp.spmatrix:
+        """Convert a sparse probability matrix to the format used internally"""
+        return sp.csc_matrix(probability_matrix, dtype=dtype)
+
+    def _default_stationary_method(self) -> str:
+        if self._changed_columns is not None:
+            return "incremental"
+        if not lapack_supported(self.dtype):
+            return "refined"
+        return "direct" if self._sparse else "eig"
+
+    @classmethod
+    def from_coo(
+        cls,
+        rows: npt.ArrayLike,
+        cols: npt.ArrayLike,
+        values: npt.ArrayLike,
+        n_states: Optional[int] = None,
+        initial_state: Optional[npt.ArrayLike] = None,
+    ) -> "MarkovChain":
+        """
+        Build a sparse MarkovChain from COO triplets.
+
+        values[i] is the probability to transition from state cols[i] to state rows[i]. Duplicate entries are summed.
+        If n_states is not given it is inferred from the largest index supplied.
+        """
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        if n_states is None:
+            n_states = int(max(rows.max(initial=-1), cols.max(initial=-1))) + 1
+        matrix = sp.coo_matrix((values, (rows, cols)), shape=(n_states, n_states))
+        return cls(matrix, initial_state)
+
+    @classmethod
+    def from_npy(
+        cls, path: Union[str, Path], initial_state: Optional[npt.ArrayLike] = None, mmap_mode: str = "r", **kwargs
+    ) -> "MarkovChain":
+        """
+        Build a MarkovChain from a .npy file without reading it into memory.
+
+        The file is memory-mapped (read only by default) and used directly as the probability matrix.
+        """
+        matrix = np.load(path, mmap_mode=mmap_mode)
+        return cls(matrix, initial_state, copy=False, **kwargs)
+
+    @classmethod
+    def from_buffer(
+        cls,
+        buffer: Any,
+        n_states: int,
+        initial_state: Optional[npt.ArrayLike] = None,
+        dtype: npt.DTypeLike = np.float64,
+        **kwargs,
+    ) -> "MarkovChain":
+        """Build a MarkovChain over a raw row-major n_states x n_states buffer (bytes, mmap, ...) without copying it"""
+        matrix = np.frombuffer(buffer, dtype=dtype, count=n_states * n_states).reshape(n_states, n_states)
+        return cls(matrix, initial_state, copy=False, **kwargs)
+
+    def save(self, path: Union[str, Path], with_decomposition: bool = False, with_stationary: bool = False) -> None:
+        """
+        Save the chain to a single binary file (see markov_chain.storage) which load opens memory-mapped.
+
+        Sparse chains are stored as the CSR arrays of the transition matrix P^T, whose rows are the states moved from
+        (the CSC arrays of P), and dense chains as the raw matrix. The initial state(s), engine, dtype and
+        decomposition option are kept. with_decomposition also stores the eigendecomposition of a dense chain and
+        with_stationary the stationary result of the default method, computing them if needed, so that the loaded
+        chain does not have to.
+        """
+        arrays, metadata = self._storage_arrays()
+        metadata.update(n_states=self.n_states, engine=self.engine, decomposition=self.decomposition)
+        if self._initial_state is not None:
+            arrays["initial_state"] = self._initial_state
+        if with_decomposition:
+            if self._sparse:
+                raise ValueError("Only dense chains have an eigendecomposition to save")
+            decomposition, _ = self._cached_decomposition()
+            arrays["eigenvalues"] = decomposition.eigenvalues
+            arrays["eigenvectors"] = decomposition.eigenvectors
+            arrays["inverse_eigenvectors"] = decomposition.inverse_eigenvectors
+            metadata["condition_number"] = decomposition.condition_number
+        if with_stationary:
+            result = self.solve_stationary()
+            arrays["stationary"] = result.state
+            metadata["stationary"] = {
+                "residual": result.residual,
+                "iterations": result.iterations,
+                "converged": result.converged,
+            }
+        write_arrays(path, arrays, metadata)
+
+    def _storage_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Return the arrays and metadata saved for the probability matrix, read back by _from_storage"""
+        if self._sparse:
+            matrix = sp.csc_matrix(self._probability_matrix)
+            matrix.sort_indices()
+            return {"data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr}, {"format": "sparse"}
+        return {"matrix": self._probability_matrix}, {"format": "dense"}
+
+    @classmethod
+    def _from_storage(
+        cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any], initial_state: Optional[np.ndarray], **kwargs
+    ) -> "MarkovChain":
+        n_states = metadata["n_states"]
+        if metadata["format"] == "sparse":
+            matrix = sp.csc_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(n_states, n_states))
+        elif metadata["format"] == "dense":
+            matrix = arrays["matrix"]
+        else:
+            raise ValueError(f"File holds a {metadata['format']} chain: load it with the matching class")
+        kwargs.setdefault("engine", metadata["engine"])
+        kwargs.setdefault("decomposition", metadata["decomposition"])
+        return cls(matrix, initial_state, copy=False, **kwargs)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], verify: bool = True, **kwargs) -> "MarkovChain":
+        """
+        Open a chain written by save. The arrays are memory-mapped read only, so nothing is copied into memory.
+
+        Large chains open in milliseconds and worker processes loading the same file share its pages. verify checks
+        the checksum, which reads the whole file; pass verify=False for the fastest open of a trusted file. Other
+        keyword arguments (e.g. cache) are passed to the constructor.
+        """
+        arrays, metadata = read_arrays(path, verify=verify)
+        chain = cls._from_storage(arrays, metadata, arrays.get("initial_state"), **kwargs)
+        if "eigenvalues" in arrays and chain.decomposition == metadata["decomposition"]:
+            chain._set_decomposition(
+                CachedDecomposition(
+                    arrays["eigenvalues"],
+                    arrays["eigenvectors"],
+                    arrays["inverse_eigenvectors"],
+                    metadata["condition_number"],
+                )
+            )
+        if "stationary" in arrays:
+            chain._stationary = StationaryResult(arrays["stationary"], **metadata["stationary"])
+        return chain
+
+    @staticmethod
+    def _column_totals(probability_matrix: Union[np.ndarray, sp.spmatrix]) -> np.ndarray:
+        """
+        Sum the columns of the probability matrix in float64.
+
+        Dense matrices are summed in blocks of rows so that memory-mapped matrices are streamed through and low
+        precision matrices are never converted as a whole.
+        """
+        if sp.issparse(probability_matrix):
+            return np.asarray(probability_matrix.sum(axis=0, dtype=np.float64)).ravel()
+        n_rows, n_cols = probability_matrix.shape
+        chunk = max(1, VALIDATION_CHUNK_BYTES // max(1, n_cols * probability_matrix.itemsize))
+        col_totals = np.zeros(n_cols)
+        for start in range(0, n_rows, chunk):
+            col_totals += probability_matrix[start : start + chunk].sum(axis=0, dtype=np.float64)
+        return col_totals
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Floating point type used to store the probability matrix and propagate states"""
+        dtype = self._probability_matrix.dtype
+        return dtype if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+
+    @property
+    def batch_size(self) -> Optional[int]:
+        """Number of initial states in a batched chain, or None if a single initial state (or none) was given"""
+        if self._initial_state is None or self._initial_state.ndim == 1:
+            return None
+        return self._initial_state.shape[0]
+
+    @property
+    def is_sparse(self) -> bool:
+        """Whether the probability matrix is stored as a scipy.sparse matrix"""
+        return self._sparse
 
     def _evaluate(self) -> None:
         if self._evaluation is not None:
             return
-        eig_vals, eig_vecs = np.linalg.eig(self._probability_matrix)
+        with span("MarkovChain.evaluate", n_states=self.n_states, decomposition=self.decomposition) as instrumented:
+            decomposition, cache_hit = self._cached_decomposition()
+            self._set_decomposition(decomposition)
+            instrumented.set(cache_hit=cache_hit, condition_number=decomposition.condition_number)
+
+    def _cached_decomposition(self) -> Tuple[CachedDecomposition, Optional[bool]]:
+        """Return the decomposition from the cache, or computed and cached, and whether it was a cache hit"""
+        if self._cache is None:
+            return self._decompose(), None
+        key = matrix_key(self._probability_matrix, algorithm="eig" if self.decomposition == "complex" else "real_eig")
+        decomposition = self._cache.get(key)
+        if decomposition is not None:
+            return decomposition, True
+        decomposition = self._decompose()
+        self._cache.put(key, decomposition)
+        return decomposition, False
+
+    def _set_decomposition(self, decomposition: CachedDecomposition) -> None:
+        consts = None
+        if self._initial_state is not None:
+            consts = self._initial_state.astype(self.dtype).dot(decomposition.inverse_eigenvectors)
+        self._evaluation = EigenContainer(
+            constants=consts,
+            eigenvalues=decomposition.eigenvalues,
+            eigenvectors=decomposition.eigenvectors,
+            condition_number=decomposition.condition_number,
+            partners=conjugate_partners(decomposition.eigenvalues) if self.decomposition == "real" else None,
+        )
+
+    def _decompose(self) -> CachedDecomposition:
+        if not lapack_supported(self.dtype):
+            raise ValueError(
+                f"The eig engine is not available for {self.dtype} chains. Use the matvec or squaring engine."
+            )
+        if self.decomposition == "real":
+            return real_decomposition(self._probability_matrix)
+        with span("MarkovChain.eigendecomposition", n_states=self.n_states):
+            eig_vals, eig_vecs = np.linalg.eig(self._probability_matrix)
         # Sort eigenvalues and associate vectors
         idx = eig_vals.argsort()[::-1]
         eig_vals = eig_vals[idx]
         eig_vecs = eig_vecs[:, idx]
         eig_vecs = eig_vecs.transpose()
         eig_vecs = self._renorm_eigvectors(eig_vecs)
-        consts = None
-        if self._initial_state is not None:
-            consts = self._initial_state.dot(np.linalg.inv(eig_vecs))
-        self._evaluation = EigenContainer(constants=consts, eigenvalues=eig_vals, eigenvectors=eig_vecs)
+        with span("MarkovChain.inversion", n_states=self.n_states):
+            inv_vecs = np.linalg.inv(eig_vecs)
+        condition_number = np.linalg.norm(eig_vecs, 1) * np.linalg.norm(inv_vecs, 1)
+        return CachedDecomposition(eig_vals, eig_vecs, inv_vecs, float(condition_number))
 
     @staticmethod
     def _renorm_eigvectors(eig_vecs: np.ndarray) -> np.ndarray:
@@ -93,22 +440,337 @@ class MarkovChain:
         eig_vecs = (eig_vecs.T * 1.0 / renorms).T
         return eig_vecs
 
-    def state_at_time(self, t: int) -> np.ndarray:
-        """Get the state at time t"""
+    def _select_engine(self, t: int, engine: Optional[str]) -> str:
+        engine = engine or self.engine
+        if engine != "auto":
+            return engine
+        evaluation = self._evaluation
+        return choose_engine(
+            self.n_states,
+            t,
+            self._probability_matrix.nnz if self._sparse else self.n_states**2,
+            sparse=self._sparse,
+            decomposed=evaluation is not None,
+            condition_number=None if evaluation is None else evaluation.condition_number,
+            cached_powers=0 if self._power_engine is None else self._power_engine.cached_powers,
+            decomposable=lapack_supported(self.dtype),
+        )
+
+    def error_bound(self, t: float, engine: Optional[str] = None) -> float:
+        """
+        Estimate the worst case rounding error (L1 norm) of state_at_time(t) with the engine that call would use.
+
+        See markov_chain.precision.error_bound. The eig estimate needs the condition number of the eigenvector
+        matrix, so the chain is decomposed if it has not been already.
+        """
+        engine = self._select_engine(t, engine)
+        condition_number = 1.0
+        if engine == "eig":
+            self._evaluate()
+            condition_number = self._evaluation.condition_number
+        return error_bound(engine, self.n_states, t, self.dtype, condition_number)
+
+    def state_at_time(self, t: int, engine: Optional[str] = None) -> np.ndarray:
+        """
+        Get the state at time t.
+
+        engine overrides the engine chosen at construction for this call (see the class docstring).
+        """
+        if self._initial_state is None:
+            raise RuntimeError("Cannot calculate state at specific time without an initial state")
+        engine = self._select_engine(t, engine)
+        with span("MarkovChain.state_at_time", n_states=self.n_states, t=t, engine=engine):
+            if engine == "eig":
+                return self._eig_states_at_times(np.array([t]))[0]
+            if self._power_engine is None:
+                self._power_engine = MatrixPowerEngine(self._probability_matrix)
+            # Batches are propagated as the columns of an (n, k) matrix
+            return self._power_engine.apply(self._initial_state.T.astype(self.dtype), t, engine).T
+
+    def state_at_times(self, ts: npt.ArrayLike, engine: Optional[str] = None) -> np.ndarray:
+        """
+        Get the states at each time in ts as an array of shape (len(ts), n_states), or (len(ts), k, n_states) for a
+        batch of k initial states.
+
+        With the eig engine every time is evaluated in one broadcast operation. The matrix power engines visit the
+        times in increasing order, advancing the previous state by the gap between consecutive times.
+        """
+        if self._initial_state is None:
+            raise RuntimeError("Cannot calculate state at specific time without an initial state")
+        ts = np.asarray(ts)
+        if ts.ndim != 1:
+            raise ValueError("Times must be a one dimensional array")
+        if len(ts) == 0:
+            return np.zeros((0,) + self._initial_state.shape)
+        # A negative or non-integer time anywhere in ts needs eig, whatever the largest time is
+        special = ts[(ts < 0) | (ts != np.floor(ts))]
+        engine = self._select_engine(special[0] if len(special) else ts.max(), engine)
+        with span("MarkovChain.state_at_times", n_states=self.n_states, n_times=len(ts), engine=engine):
+            if engine == "eig":
+                return self._eig_states_at_times(ts)
+
+            if self._power_engine is None:
+                self._power_engine = MatrixPowerEngine(self._probability_matrix)
+            order = np.argsort(ts, kind="stable")
+            results = np.empty((len(ts),) + self._initial_state.shape, dtype=self.dtype)
+            state = self._initial_state.T.astype(self.dtype)
+            current_time = 0
+            for i in order:
+                state = self._power_engine.apply(state, ts[i] - current_time, engine)
+                current_time = ts[i]
+                results[i] = state.T
+            return results
+
+    def trajectory(self, t_max: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Yield the states at t = 0, 1, ..., t_max by stepping the probability matrix. Runs forever without t_max."""
+        if self._initial_state is None:
+            raise RuntimeError("Cannot calculate state at specific time without an initial state")
+        state = self._initial_state.T.astype(self.dtype)
+        t = 0
+        while t_max is None or t <= t_max:
+            yield state.T
+            state = self._probability_matrix @ state
+            t += 1
+
+    def evolve(
+        self,
+        t_max: Optional[int] = None,
+        tol: Optional[float] = None,
+        stationary: Optional[npt.ArrayLike] = None,
+    ) -> Iterator[np.ndarray]:
+        """
+        Lazily yield the states at t = 0, 1, 2, ... by stepping the probability matrix, holding only the current state.
+
+        With tol, stop after the first state whose total variation distance is below tol: from the previous state by
+        default, or from stationary if it is given (e.g. stationary=chain.stationary_state()). For a batch of initial
+        states every row must be within tol. Without t_max or tol this runs forever.
+        """
+        if stationary is not None:
+            stationary = np.asarray(stationary)
+        previous = None
+        for state in self.trajectory(t_max):
+            yield state
+            if tol is None:
+                continue
+            reference = previous if stationary is None else stationary
+            if reference is not None and np.all(total_variation(state, reference) < tol):
+                return
+            previous = state
+
+    def mixing_time(
+        self, epsilon: float = 0.25, t_max: int = 10**6, stationary: Optional[npt.ArrayLike] = None
+    ) -> int:
+        """
+        Return the first time at which the state is within total variation distance epsilon of the stationary state.
+
+        This is the mixing time from the initial state (the worst row for a batch). The conventional epsilon is 1/4.
+        States are stepped one at a time, so no time horizon needs to be chosen in advance, but a RuntimeError is
+        raised if the chain has not mixed by t_max.
+        """
+        if stationary is None:
+            stationary = self.stationary_state()
+        stationary = np.asarray(stationary)
+        for t, state in enumerate(self.trajectory(t_max)):
+            if np.all(total_variation(state, stationary) <= epsilon):
+                return t
+        raise RuntimeError(f"Chain has not mixed to within {epsilon} after {t_max} steps")
+
+    def _eig_states_at_times(self, ts: np.ndarray) -> np.ndarray:
+        if self._sparse:
+            raise ValueError("The eig engine requires a dense probability matrix")
         self._evaluate()
         consts = self._evaluation.constants
         eig_vals = self._evaluation.eigenvalues
         eig_vecs = self._evaluation.eigenvectors
 
-        if consts is None:
-            raise RuntimeError("Cannot calculate state at specific time without an initial state")
-        result = np.zeros(eig_vecs.shape[0])
-        for i in range(len(consts)):
-            result += np.real(consts[i] * (eig_vals[i] ** t) * eig_vecs[i, :])
+        if np.isrealobj(eig_vals) and np.any(ts != np.round(ts)):
+            # All the eigenvalues are real, but a negative one has a non-real power at non-integer t
+            eig_vals = eig_vals.astype(np.result_type(eig_vals, np.complex64))
+        # Shape (len(ts), [k,] n): every time and every initial state in one matrix product
+        powers = (eig_vals ** ts[:, None]).astype(eig_vals.dtype, copy=False)
+        powers = np.expand_dims(powers, tuple(range(1, consts.ndim)))
+        partners = self._evaluation.partners
+        if partners is not None:
+            # Real decomposition: rotate and scale the coefficients of each conjugate pair, all in real arithmetic.
+            # An unpaired eigenvalue is its own partner, and only the real part of its power (non-real for a negative
+            # eigenvalue and non-integer t) is kept, as the complex decomposition does.
+            rotation = np.where(partners != np.arange(len(partners)), powers.imag, 0.0)
+            evolved = powers.real * consts + rotation * consts[..., partners]
+            return evolved @ eig_vecs
+        return np.real((consts * powers) @ eig_vecs)
+
+    def solve_stationary(
+        self, method: Optional[str] = None, tol: float = 1e-10, max_iter: int = 10000, **kwargs
+    ) -> StationaryResult:
+        """
+        Calculate the stationary state, reporting the residual and iteration count.
+
+        method is "eig" (full eigendecomposition, the reference for dense chains), "incremental" (see update),
+        "classes" (see below) or one of the solvers in markov_chain.solvers.SOLVERS: "power", "arnoldi", "direct",
+        "refined", "banded", "gmres", "jacobi" or "gauss_seidel". By default dense chains use "eig", sparse chains use
+        "direct", np.longdouble chains use "refined" and chains returned by update use "incremental". Extra keyword
+        arguments are passed to the solver. Chains loaded with a saved stationary result return it when no method is
+        given. If the default method finds the chain reducible (its pinned system is singular), it falls back to
+        "classes".
+
+        The "classes" method splits the chain into its communicating classes and solves each closed class on its own,
+        in a thread pool of max_workers threads, with class_method ("direct" by default, or any method above). This
+        handles reducible chains, whose stationary state depends on the initial state through the probability of
+        settling in each closed class, and turns one large problem into several small ones.
+        """
+        defaulted = method is None
+        if defaulted:
+            if self._stationary is not None:
+                return self._stationary
+            method = self._default_stationary_method()
+        with span("MarkovChain.solve_stationary", n_states=self.n_states, method=method) as instrumented:
+            try:
+                result = self._solve_stationary(method, tol=tol, max_iter=max_iter, **kwargs)
+            except RuntimeError as e:
+                # A singular pinned system means the chain is reducible, which the default method falls back to
+                # solving class by class
+                if not defaulted or not isinstance(e.__cause__, SolverError) or self.is_irreducible:
+                    raise
+                if method in SOLVERS:
+                    kwargs.setdefault("class_method", method)
+                method = "classes"
+                instrumented.set(method=method)
+                result = self._solve_stationary(method, tol=tol, max_iter=max_iter, **kwargs)
+            instrumented.set(iterations=result.iterations, residual=result.residual, converged=result.converged)
         return result
 
-    def stationary_state(self) -> np.ndarray:
-        """Calculate the stationary state"""
+    def _solve_stationary(self, method: str, tol: float, max_iter: int, **kwargs) -> StationaryResult:
+        if self._stationary_methods is not None and method not in self._stationary_methods:
+            raise ValueError(
+                f"The {method} method needs a stored probability matrix, which {type(self).__name__} never forms. "
+                f"Choose from {', '.join(self._stationary_methods)}."
+            )
+        if method == "classes":
+            return self._classes_stationary(tol=tol, max_iter=max_iter, **kwargs)
+        if method == "incremental":
+            try:
+                result = self._stationary_updater().solve(
+                    self._probability_matrix, self._changed_columns, tol=tol, max_iter=max_iter
+                )
+            except SolverError as e:
+                raise RuntimeError(f"Stationary state calculation with the {method} method failed: {e}") from e
+            result.state = self._broadcast_to_batch(result.state)
+            return result
+        if method == "eig":
+            if self._sparse:
+                raise ValueError("The eig method requires a dense probability matrix")
+            state = self._eig_stationary_state()
+            return StationaryResult(state, residual(self._probability_matrix, state), 0, True)
+        if method not in SOLVERS:
+            raise ValueError(f"Unknown stationary state method {method}. Choose from eig, {', '.join(SOLVERS)}.")
+        try:
+            result = SOLVERS[method](self._probability_matrix, tol=tol, max_iter=max_iter, **kwargs)
+        except SolverError as e:
+            raise RuntimeError(f"Stationary state calculation with the {method} method failed: {e}") from e
+        # The solvers find the unique stationary state, which is shared by every initial state in a batch
+        result.state = self._broadcast_to_batch(result.state)
+        return result
+
+    def communicating_classes(self) -> List[CommunicatingClass]:
+        """Return the communicating classes, with whether each is closed and its period (see markov_chain.classes)"""
+        return communicating_classes(self._probability_matrix)
+
+    @property
+    def is_irreducible(self) -> bool:
+        """Whether every state can reach every other, i.e. the chain is a single communicating class"""
+        return len(self.communicating_classes()) == 1
+
+    def _classes_stationary(
+        self, class_method: str = "direct", max_workers: Optional[int] = None, tol: float = 1e-10, **kwargs
+    ) -> StationaryResult:
+        classes = self.communicating_classes()
+
+        def solve(block: Union[np.ndarray, sp.spmatrix]) -> StationaryResult:
+            return MarkovChain(block, cache=self._cache).solve_stationary(class_method, tol=tol, **kwargs)
+
+        states, results = closed_class_states(self._probability_matrix, classes, solve, max_workers)
+        if len(states) == 1:
+            state = self._broadcast_to_batch(states[0])
+        elif self._initial_state is None:
+            raise RuntimeError(
+                f"Multiple stationary states found: the chain has {len(states)} closed communicating classes. "
+                "Initial state required for stationary state calculation."
+            )
+        else:
+            state = closed_class_weights(self._probability_matrix, classes, self._initial_state) @ states
+        return StationaryResult(
+            state,
+            residual(self._probability_matrix, state),
+            sum(result.iterations for result in results),
+            all(result.converged for result in results),
+        )
+
+    def _stationary_updater(self) -> StationaryUpdater:
+        if self._updater is None:
+            self._updater = StationaryUpdater(self._probability_matrix)
+        return self._updater
+
+    def update(
+        self,
+        probability_matrix: Optional[Union[npt.ArrayLike, sp.spmatrix]] = None,
+        columns: Optional[npt.ArrayLike] = None,
+        new_columns: Optional[Union[npt.ArrayLike, sp.spmatrix]] = None,
+    ) -> "MarkovChain":
+        """
+        Return a chain with a changed probability matrix, re-using this chain's work for its stationary state.
+
+        Either pass the whole new probability_matrix, or the indices of the columns to change and their new values
+        as new_columns, shape (n_states, len(columns)). The new chain keeps the initial state, engine, cache, dtype
+        and decomposition.
+
+        Its stationary state defaults to the "incremental" method: this chain's stationary system is LU factorised
+        once, and a chain differing in k columns is solved with a rank k Woodbury update of those factors, or with
+        GMRES warm started from the previous stationary state when k is large. Chains derived by repeated updates all
+        share the first factorisation. States at a given time are not taken from the eigendecomposition of this chain,
+        so they are propagated with the matrix power engines unless the eig engine is requested.
+        """
+        if (probability_matrix is None) == (columns is None):
+            raise ValueError("Pass either a new probability matrix or the columns to change")
+        if probability_matrix is None:
+            if new_columns is None:
+                raise ValueError("new_columns are required to change columns")
+            probability_matrix = replace_columns(self._probability_matrix, columns, new_columns)
+        elif not sp.issparse(probability_matrix):
+            probability_matrix = np.asarray(probability_matrix)
+        chain = type(self)(
+            probability_matrix,
+            self._initial_state,
+            engine=self.engine,
+            cache=self._cache,
+            dtype=self.dtype,
+            decomposition=self.decomposition,
+        )
+        if chain._sparse != self._sparse:
+            raise ValueError("Updated probability matrix must be sparse if and only if the original is")
+
+        previous = self._changed_columns if self._changed_columns is not None else np.zeros(0, dtype=int)
+        chain._updater = self._stationary_updater()
+        chain._changed_columns = np.union1d(
+            previous, changed_columns(self._probability_matrix, chain._probability_matrix)
+        )
+        return chain
+
+    def _broadcast_to_batch(self, state: np.ndarray) -> np.ndarray:
+        if self.batch_size is None:
+            return state
+        return np.tile(state, (self.batch_size, 1))
+
+    def stationary_state(self, method: Optional[str] = None, **kwargs) -> np.ndarray:
+        """Calculate the stationary state. See solve_stationary for the available methods."""
+        result = self.solve_stationary(method, **kwargs)
+        if not result.converged:
+            raise RuntimeError(
+                f"Stationary state calculation did not converge after {result.iterations} iterations "
+                f"(residual {result.residual:.3g})"
+            )
+        return result.state
+
+    def _eig_stationary_state(self) -> np.ndarray:
         self._evaluate()
         consts = self._evaluation.constants
         eig_vals = self._evaluation.eigenvalues
@@ -118,15 +780,25 @@ class MarkovChain:
         if stationary_args.sum() == 1:
             e = np.where(stationary_args)[0][0]
             stationary_state = np.real(eig_vecs[e, :])
-            return stationary_state / stationary_state.sum()
+            return self._broadcast_to_batch(stationary_state / stationary_state.sum())
         if consts is None:
             raise RuntimeError(
                 "Multiple stationary states found. "
                 "Network must be separable. "
                 "Initial state required for stationary state calculation."
             )
-        stationary_state = np.zeros(len(eig_vecs[0, :]))
-        for e in range(len(stationary_args)):
-            if stationary_args[e]:
-                stationary_state += np.real(consts[e] * np.array(eig_vecs[e]))
-        return np.real(stationary_state / stationary_state.sum())
+        stationary_state = np.real(consts[..., stationary_args] @ eig_vecs[stationary_args])
+        return stationary_state / stationary_state.sum(axis=-1, keepdims=True)
+
+    def absorbing_states(self) -> np.ndarray:
+        """Return the indices of the absorbing states"""
+        return absorbing_states(self._probability_matrix)
+
+    def absorption(self) -> AbsorptionResult:
+        """
+        Absorption probabilities and the mean and variance of the steps to absorption, for every starting state.
+
+        See markov_chain.absorbing.absorption_analysis. Only the transient block is factorised, so no initial state or
+        eigendecomposition is needed.
+        """
+        return absorption_analysis(self._probability_matrix)
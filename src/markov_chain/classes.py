@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.csgraph as csgraph
+
+from markov_chain.absorbing import _transposed_solver
+from markov_chain.solvers import StationaryResult
+
+
+Matrix = Union[np.ndarray, sp.spmatrix]
+
+
+@dataclass
+class CommunicatingClass:
+    """
+    Dataclass describing a communicating class: a set of states which can all reach each other.
+
+    A closed class can never be left, so the chain eventually settles in one of its closed classes. The period is the
+    gcd of the lengths of the paths by which a state can return to itself, 1 for an aperiodic class and 0 for a state
+    which can never return.
+    """
+
+    states: np.ndarray
+    closed: bool
+    period: int
+
+
+def _transition_graph(matrix: Matrix) -> sp.csr_matrix:
+    """Return the sparsity pattern as a graph with an edge u -> v for every transition from state u to state v"""
+    graph = sp.csr_matrix(matrix.T, dtype=float, copy=True)
+    graph.eliminate_zeros()
+    graph.data[:] = 1.0
+    return graph
+
+
+def communicating_classes(matrix: Matrix) -> List[CommunicatingClass]:
+    """
+    Split a (column stochastic) probability matrix into its communicating classes, ordered by their first state.
+
+    The classes are the strongly connected components of the transition graph (scipy.sparse.csgraph), found in
+    O(n + nnz). A class is closed if no transition leaves it. The period of every class is found at once from the
+    unweighted distances over the edges within classes: with level(u) the distance of u from its class's root, the
+    period is the gcd of level(u) + 1 - level(v) over those edges u -> v. scipy only returns distances from Dijkstra's
+    algorithm, so this step is O((n + nnz) log n) and dominates the cost.
+    """
+    n = matrix.shape[0]
+    graph = _transition_graph(matrix)
+    n_classes, labels = csgraph.connected_components(graph, directed=True, connection="strong")
+    # Relabel so that classes are ordered by their first state
+    _, first = np.unique(labels, return_index=True)
+    order = np.argsort(np.argsort(first))
+    labels = order[labels]
+
+    coo = graph.tocoo()
+    leaving = labels[coo.row] != labels[coo.col]
+    closed = np.ones(n_classes, dtype=bool)
+    closed[labels[coo.row[leaving]]] = False
+
+    # Breadth first search from one root per class, via a super source joined to every root
+    roots = np.sort(first)
+    inside = ~leaving
+    search = sp.csr_matrix(
+        (
+            np.ones(inside.sum() + n_classes),
+            (np.concatenate([coo.row[inside], np.full(n_classes, n)]), np.concatenate([coo.col[inside], roots])),
+        ),
+        shape=(n + 1, n + 1),
+    )
+    levels = csgraph.shortest_path(search, method="D", unweighted=True, indices=n)[:n].astype(np.int64)
+    lags = np.abs(levels[coo.row[inside]] + 1 - levels[coo.col[inside]])
+    edge_labels = labels[coo.row[inside]]
+    periods = np.zeros(n_classes, dtype=np.int64)
+    np.gcd.at(periods, edge_labels, lags)
+
+    members = np.argsort(labels, kind="stable")
+    boundaries = np.cumsum(np.bincount(labels, minlength=n_classes))[:-1]
+    return [
+        CommunicatingClass(states, bool(closed[i]), int(periods[i]))
+        for i, states in enumerate(np.split(members, boundaries))
+    ]
+
+
+def closed_class_states(
+    matrix: Matrix,
+    classes: List[CommunicatingClass],
+    solve: Callable[[Matrix], StationaryResult],
+    max_workers: Optional[int] = None,
+) -> Tuple[np.ndarray, List[StationaryResult]]:
+    """
+    Solve for the stationary state of every closed class independently, in a thread pool.
+
+    solve is applied to the block of each closed class, which is a probability matrix in its own right. Returns an
+    (n_closed, n) array whose rows are the stationary states extended by zeros, and the results of each solve.
+    """
+    closed = [c for c in classes if c.closed]
+    if sp.issparse(matrix):
+        matrix = sp.csc_matrix(matrix)
+        blocks = [matrix[c.states][:, c.states] for c in closed]
+    else:
+        blocks = [np.asarray(matrix)[np.ix_(c.states, c.states)] for c in closed]
+    if max_workers == 1 or len(blocks) == 1:
+        results = list(map(solve, blocks))
+    else:
+        # The solvers spend their time in LAPACK and SuperLU, which release the GIL
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(solve, blocks))
+    states = np.zeros((len(closed), matrix.shape[0]))
+    for i, (c, result) in enumerate(zip(closed, results)):
+        states[i, c.states] = result.state
+    return states, results
+
+
+def closed_class_weights(matrix: Matrix, classes: List[CommunicatingClass], initial_state: np.ndarray) -> np.ndarray:
+    """
+    Return the probability of eventually settling in each closed class from initial_state, shape ([k,] n_closed).
+
+    Mass already in a closed class stays there. Mass in transient states is split with the absorption probabilities
+    of the chain in which every closed class is merged into a single absorbing state (see markov_chain.absorbing).
+    """
+    closed = [c for c in classes if c.closed]
+    transient = np.concatenate([c.states for c in classes if not c.closed] + [np.zeros(0, dtype=int)])
+    weights = np.stack([initial_state[..., c.states].sum(axis=-1) for c in closed], axis=-1)
+    if len(transient):
+        if sp.issparse(matrix):
+            matrix = sp.csc_matrix(matrix)
+            q = matrix[transient][:, transient]
+            r = np.vstack([np.asarray(matrix[c.states][:, transient].sum(axis=0)) for c in closed])
+        else:
+            matrix = np.asarray(matrix)
+            q = matrix[np.ix_(transient, transient)]
+            r = np.vstack([matrix[np.ix_(c.states, transient)].sum(axis=0) for c in closed])
+        absorbed = _transposed_solver(q)(np.ascontiguousarray(r.T))
+        weights = weights + initial_state[..., transient] @ absorbed.reshape(len(transient), len(closed))
+    return weights
@@ -0,0 +1,189 @@
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+import scipy.stats as stats
+
+from markov_chain.chain import MarkovChain
+from markov_chain.chain import validate_initial_state
+from markov_chain.solvers import SOLVERS
+from markov_chain.solvers import SolverError
+from markov_chain.solvers import StationaryResult
+
+
+CONTINUOUS_METHODS = ("uniformisation", "expm_multiply")
+# Above this many expected jumps (rate * t) uniformisation costs more than Krylov expm_multiply
+MAX_UNIFORMISATION_JUMPS = 10**4
+# The uniformisation rate exceeds the fastest exit rate by this factor, so that every state of the uniformised chain
+# has a self-transition and it is aperiodic (which the iterative stationary solvers need)
+UNIFORMISATION_MARGIN = 1.05
+# Number of states P^k x accumulated into the results with each matrix product
+UNIFORMISATION_BLOCK = 64
+
+
+class ContinuousMarkovChain:
+    """
+    Continuous time Markov chain defined by a generator (rate) matrix Q.
+
+    With the default column convention Q[x, y] is the rate of jumping from state y to state x, matching MarkovChain,
+    and each column sums to zero. Pass convention="rows" for the textbook layout where rows sum to zero. The state at a
+    real time t is exp(Q t) x, evaluated without forming exp(Q t):
+        "uniformisation" writes exp(Q t) = sum_k Poisson(k; rate * t) P^k with P = I + Q / rate the uniformised
+            discrete chain, so every time in state_at_times shares one sequence of sparse products P^k x, which are
+            weighted into the results in blocks with dense matrix products.
+        "expm_multiply" uses scipy's truncated Taylor method, stepping between consecutive times. It is preferred
+            when rate * t is large, e.g. for stiff chains.
+    By default uniformisation is used unless more than MAX_UNIFORMISATION_JUMPS jumps are expected.
+
+    The stationary state solves Q x = 0, which is also the stationary state of the uniformised chain, so any of the
+    solvers in markov_chain.solvers can be used.
+    """
+
+    def __init__(
+        self,
+        generator: Union[npt.ArrayLike, sp.spmatrix],
+        initial_state: Optional[npt.ArrayLike] = None,
+        convention: str = "columns",
+    ) -> None:
+        if convention not in ("columns", "rows"):
+            raise ValueError("Convention must be columns or rows")
+        if sp.issparse(generator):
+            generator = sp.csc_matrix(generator, dtype=float)
+        else:
+            generator = np.array(generator, dtype=float)
+        if len(generator.shape) != 2 or generator.shape[0] != generator.shape[1]:
+            raise ValueError("Generator matrix supplied to Continuous Markov Chain class not square")
+        if convention == "rows":
+            generator = generator.T.tocsc() if sp.issparse(generator) else generator.T.copy()
+
+        diagonal = generator.diagonal()
+        off_diagonal = generator - (sp.diags(diagonal) if sp.issparse(generator) else np.diag(diagonal))
+        if off_diagonal.min() < 0:
+            raise ValueError("Generator matrix has negative off-diagonal rates")
+        col_totals = np.asarray(generator.sum(axis=0)).ravel()
+        scale = max(float(np.abs(diagonal).max(initial=0)), 1.0)
+        if not np.all(np.isclose(col_totals / scale, 0)):
+            raise ValueError(
+                f"Generator matrix {convention[:-1]}(s) at position(s) "
+                + str(np.argwhere(~np.isclose(col_totals / scale, 0)).ravel())
+                + " do not sum to zero."
+            )
+
+        self._generator = generator
+        self._sparse = sp.issparse(generator)
+        self.n_states = generator.shape[0]
+        # Uniformisation rate, just above the fastest total rate of leaving any state
+        self.rate = UNIFORMISATION_MARGIN * float(-diagonal.min(initial=0))
+        self._initial_state = validate_initial_state(initial_state, self.n_states, dtype=float)
+
+    @property
+    def generator(self) -> Union[np.ndarray, sp.spmatrix]:
+        """Generator matrix in the column convention"""
+        return self._generator
+
+    def uniformised_matrix(self) -> Union[np.ndarray, sp.spmatrix]:
+        """Return P = I + Q / rate, the transition matrix of the uniformised discrete chain"""
+        rate = self.rate if self.rate > 0 else 1.0
+        identity = sp.identity(self.n_states, format="csc") if self._sparse else np.identity(self.n_states)
+        return identity + self._generator / rate
+
+    def uniformised_chain(self) -> MarkovChain:
+        """Return the uniformised discrete chain, whose state after k steps is the state after k Poisson jumps"""
+        return MarkovChain(self.uniformised_matrix(), self._initial_state)
+
+    def _select_method(self, t_max: float, method: Optional[str]) -> str:
+        if method is None:
+            return "uniformisation" if self.rate * t_max <= MAX_UNIFORMISATION_JUMPS else "expm_multiply"
+        if method not in CONTINUOUS_METHODS:
+            raise ValueError(f"Unknown method {method}. Choose from {', '.join(CONTINUOUS_METHODS)}.")
+        return method
+
+    def state_at_time(self, t: float, method: Optional[str] = None, tol: float = 1e-12) -> np.ndarray:
+        """Get the state at real time t. See the class docstring for the methods."""
+        return self.state_at_times(np.array([t], dtype=float), method, tol)[0]
+
+    def state_at_times(self, ts: npt.ArrayLike, method: Optional[str] = None, tol: float = 1e-12) -> np.ndarray:
+        """
+        Get the states at each time in ts as an array of shape (len(ts), n_states), or (len(ts), k, n_states) for a
+        batch of k initial states.
+
+        tol bounds the Poisson probability mass dropped by uniformisation.
+        """
+        if self._initial_state is None:
+            raise RuntimeError("Cannot calculate state at specific time without an initial state")
+        ts = np.asarray(ts, dtype=float)
+        if ts.ndim != 1:
+            raise ValueError("Times must be a one dimensional array")
+        if np.any(ts < 0):
+            raise ValueError("Times must be non-negative")
+        if len(ts) == 0:
+            return np.zeros((0,) + self._initial_state.shape)
+        if self._select_method(ts.max(), method) == "uniformisation":
+            return self._uniformisation(ts, tol)
+        return self._expm_multiply(ts)
+
+    def _uniformisation(self, ts: np.ndarray, tol: float) -> np.ndarray:
+        matrix = self.uniformised_matrix()
+        means = self.rate * ts
+        # Enough jumps that the Poisson tail beyond them is below tol at every time
+        n_jumps = int(stats.poisson.isf(tol, means.max())) + 1 if means.max() > 0 else 0
+        weights = stats.poisson.pmf(np.arange(n_jumps + 1)[:, None], means[None, :])
+        # Negligible weights are dropped (at most tol in total per time), so each block only updates nearby times
+        weights[weights < tol / (n_jumps + 1)] = 0.0
+        state = self._initial_state.T.copy()
+        results = np.zeros((len(ts), state.size))
+        block = []
+        for k in range(n_jumps + 1):
+            if k:
+                state = matrix @ state
+            block.append(state.ravel())
+            if len(block) == UNIFORMISATION_BLOCK or k == n_jumps:
+                block_weights = weights[k + 1 - len(block) : k + 1]
+                active = np.flatnonzero(block_weights.any(axis=0))
+                results[active] += block_weights[:, active].T @ np.array(block)
+                block = []
+        # Put the dropped tail mass back so that every state sums to one
+        results /= weights.sum(axis=0)[:, None]
+        results = results.reshape((len(ts),) + state.shape)
+        return np.swapaxes(results, 1, -1) if state.ndim == 2 else results
+
+    def _expm_multiply(self, ts: np.ndarray) -> np.ndarray:
+        order = np.argsort(ts, kind="stable")
+        state = self._initial_state.T.copy()
+        results = np.empty((len(ts),) + self._initial_state.shape)
+        current_time = 0.0
+        for i in order:
+            if ts[i] > current_time:
+                state = spla.expm_multiply(self._generator * (ts[i] - current_time), state)
+                current_time = ts[i]
+            results[i] = state.T
+        return results
+
+    def solve_stationary(
+        self, method: str = "direct", tol: float = 1e-10, max_iter: int = 10000, **kwargs
+    ) -> StationaryResult:
+        """
+        Calculate the stationary state, which solves Q x = 0, with one of the solvers in markov_chain.solvers.
+
+        The solver is applied to the uniformised chain, which has the same stationary state. The residual reported is
+        that of the uniformised chain, i.e. |Q x|_1 / rate.
+        """
+        if method not in SOLVERS:
+            raise ValueError(f"Unknown stationary state method {method}. Choose from {', '.join(SOLVERS)}.")
+        try:
+            return SOLVERS[method](self.uniformised_matrix(), tol=tol, max_iter=max_iter, **kwargs)
+        except SolverError as e:
+            raise RuntimeError(f"Stationary state calculation with the {method} method failed: {e}") from e
+
+    def stationary_state(self, method: str = "direct", **kwargs) -> np.ndarray:
+        """Calculate the stationary state. See solve_stationary for the available methods."""
+        result = self.solve_stationary(method, **kwargs)
+        if not result.converged:
+            raise RuntimeError(
+                f"Stationary state calculation did not converge after {result.iterations} iterations "
+                f"(residual {result.residual:.3g})"
+            )
+        return result.state
@@ -1,8 +1,16 @@
+import numpy as np
+import scipy.sparse as sp
+
 from markov_chain.chain import MarkovChain
+from markov_chain.structured import BandedMarkovChain
 
 
 def gamblers_ruin(
-    initial_position: int = 100, prob_up: float = 0.5, upper_limit: int = 200, lower_limit: int = 0
+    initial_position: int = 100,
+    prob_up: float = 0.5,
+    upper_limit: int = 200,
+    lower_limit: int = 0,
+    banded: bool = False,
 ) -> MarkovChain:
     """
     Simulate the Gambler's Ruin problem using a Markov Chain.
@@ -13,33 +21,40 @@ def gamblers_ruin(
     and an upper and lower limit for the amount of money the gambler is willing to win/lose.
 
     Parameters:
-    initial_state (int, optional): The initial amount of money the gambler has. Default is 100.
+    initial_position (int, optional): The initial amount of money the gambler has, between lower_limit and
+        upper_limit. Default is 100.
     prob_up (float, optional): The probability of the gambler winning a bet. Default is 0.5.
     upper_limit (int, optional): The amount of money at which the gambler will stop betting if won. Default is 200.
     lower_limit (int, optional): The amount of money at which the gambler will stop betting if lost. Default is 0.
+    banded (bool, optional): Return a BandedMarkovChain, built from its three diagonals without ever forming the dense
+        matrix. Default is False, which returns a MarkovChain with a dense n x n matrix (n = upper_limit - lower_limit
+        + 1), i.e. O(n^2) memory, so large limits (beyond a few thousand) need banded=True.
 
     Returns:
     MarkovChain: A MarkovChain object representing the gambler's ruin problem.
     """
 
+    if not 0 <= prob_up <= 1:
+        raise ValueError("prob_up must be a probability")
+    if upper_limit - lower_limit < 1:
+        raise ValueError("upper_limit must be larger than lower_limit")
+    if not lower_limit <= initial_position <= upper_limit:
+        raise ValueError("initial_position must be between lower_limit and upper_limit")
+
     prob_down = 1.0 - prob_up
     n_states = upper_limit - lower_limit + 1
-    init_state = [0.0] * n_states
-    init_state[initial_position] = 1.0
-
-    transition_matrix = []
-    for _ in range(n_states):
-        transition_matrix.append([0.0] * n_states)
-
-    # Probability from transitioning once hit lower limit is 0, so probability of staying is 1
-    transition_matrix[0][0] = 1.0
-
-    # Similar reasoning for when one hits the upper limit
-    transition_matrix[n_states - 1][n_states - 1] = 1.0
-
-    for n in range(1, n_states - 1):
-        transition_matrix[n + 1][n] = prob_up  # probability from going from n to n+1
-        transition_matrix[n - 1][n] = prob_down
-
-    chain = MarkovChain(transition_matrix, init_state)
-    return chain
+    init_state = np.zeros(n_states)
+    init_state[initial_position - lower_limit] = 1.0
+
+    # Probability of moving from the limits is 0, so probability of staying there is 1
+    stay = np.zeros(n_states)
+    stay[[0, n_states - 1]] = 1.0
+    # Diagonal k of scipy.sparse.diags holds elements (i, i + k), i.e. transitions from j to j - k
+    up = np.full(n_states - 1, prob_up)
+    up[0] = 0.0
+    down = np.full(n_states - 1, prob_down)
+    down[-1] = 0.0
+
+    if banded:
+        return BandedMarkovChain.from_diagonals([down, stay, up], [1, 0, -1], init_state)
+    return MarkovChain(sp.diags([down, stay, up], [1, 0, -1]).toarray(), init_state)
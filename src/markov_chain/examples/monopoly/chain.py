@@ -2,6 +2,7 @@ from functools import lru_cache
 from typing import Optional
 
 import numpy as np
+import numpy.typing as npt
 
 from markov_chain.chain import MarkovChain
 from markov_chain.examples.monopoly.utils import MonopolySettings
@@ -34,38 +35,40 @@ class MonopolyMarkovChain(MonopolySimulationBase):
     def __init__(self, settings: Optional[MonopolySettings] = None) -> None:
         super().__init__(settings)
 
-        initial_state = [1.0] + 39 * [0.0]
-        # Set up probability matrix
-
-        prob_mat = [[0.0] * 40 for i in range(40)]
-        prob_three_doubles = 1 / 6**3
-
-        for n in range(40):
-            for m in range(2, 13):
-                if n + m < 40:
-                    prob_mat[n + m][n] = dice_roll_prob(m)
-                else:
-                    prob_mat[n + m - 40][n] = dice_roll_prob(m)
-
-            # Roll three doubles (probability 1/6**3), go to jail
-            if settings.three_doubles_jail:
-                for m in range(40):
-                    prob_mat[m][n] *= 1 - prob_three_doubles
-                prob_mat[10][n] += prob_three_doubles
-
-            # Go to jail square
-            prob_mat[10][n] += prob_mat[30][n]
-            prob_mat[30][n] = 0
-
-            # Chance cards
-            n_chance = settings.n_chance
-            chance_locs = settings.chance_locs
-            chance_advances = settings.chance_advances
-            for chance in chance_locs:
-                for advance in chance_advances:
-                    p_advance_to = prob_mat[chance][n] / n_chance
-                    prob_mat[advance][n] += p_advance_to
-                    prob_mat[chance][n] = prob_mat[chance][n] * (1 - 1 / n_chance)
+        settings = self._settings
+        n_squares = settings.board_size
+
+        initial_state = np.zeros(n_squares)
+        initial_state[0] = 1.0
+        # Set up probability matrix: column n holds the probabilities of moving from square n
+        prob_mat = np.zeros((n_squares, n_squares))
+        squares = np.arange(n_squares)
+        rolls = np.arange(2, 13)
+        roll_probs = np.array([dice_roll_prob(m) for m in rolls])
+        np.add.at(
+            prob_mat,
+            ((squares[None, :] + rolls[:, None]) % n_squares, np.broadcast_to(squares, (len(rolls), n_squares))),
+            np.broadcast_to(roll_probs[:, None], (len(rolls), n_squares)),
+        )
+
+        # Roll three doubles (probability 1/6**3), go to jail
+        if settings.three_doubles_jail:
+            prob_three_doubles = 1 / 6**3
+            prob_mat *= 1 - prob_three_doubles
+            prob_mat[settings.jail] += prob_three_doubles
+
+        # Go to jail square
+        if settings.go_to_jail is not None:
+            prob_mat[settings.jail] += prob_mat[settings.go_to_jail]
+            prob_mat[settings.go_to_jail] = 0
+
+        # Chance cards, applied to every column at once
+        n_chance = settings.n_chance
+        for chance in settings.chance_locs:
+            for advance in settings.chance_advances:
+                p_advance_to = prob_mat[chance] / n_chance
+                prob_mat[advance] += p_advance_to
+                prob_mat[chance] *= 1 - 1 / n_chance
 
         self.initial_state = initial_state
         self.prob_matrix = prob_mat
@@ -74,3 +77,7 @@ class MonopolyMarkovChain(MonopolySimulationBase):
     def state_at_time(self, time: int) -> np.ndarray:
         """Return the state at time"""
         return self.markov.state_at_time(time)
+
+    def state_at_times(self, times: npt.ArrayLike) -> np.ndarray:
+        """Return the states at each of times"""
+        return self.markov.state_at_times(times)
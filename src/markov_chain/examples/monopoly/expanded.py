@@ -0,0 +1,186 @@
+from functools import lru_cache
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.monopoly.utils import MonopolySettings
+from markov_chain.examples.monopoly.utils import MonopolySimulationBase
+
+
+# Consecutive doubles are tracked up to this count: one more double then sends the player to jail
+MAX_DOUBLES_STREAK = 2
+N_STREAKS = MAX_DOUBLES_STREAK + 1
+PROB_DOUBLE = 1 / 6
+
+
+@lru_cache(maxsize=8)
+def movement_blocks(board_size: int) -> Tuple[sp.csc_matrix, sp.csc_matrix]:
+    """
+    Return the moves made by non-double and double rolls, as (board_size, board_size) matrices.
+
+    Column n holds the probabilities of moving from square n. The non-double block sums to 30/36 and the double block
+    to 6/36. LRU cache is used to store results, so the blocks must not be modified.
+    """
+    dice = np.arange(1, 7)
+    first, second = [d.ravel() for d in np.meshgrid(dice, dice)]
+    squares = np.arange(board_size)
+    blocks = []
+    for is_double in [False, True]:
+        rolls = (first + second)[(first == second) == is_double]
+        rows = (squares[None, :] + rolls[:, None]) % board_size
+        cols = np.broadcast_to(squares, rows.shape)
+        blocks.append(
+            sp.csc_matrix((np.full(rows.size, 1 / 36), (rows.ravel(), cols.ravel())), shape=(board_size, board_size))
+        )
+    return blocks[0], blocks[1]
+
+
+@lru_cache(maxsize=8)
+def go_to_jail_blocks(board_size: int, go_to_jail: Optional[int], jail: int) -> Tuple[sp.csc_matrix, sp.csc_matrix]:
+    """
+    Split the go to jail square into the moves of players who stay free and those who are sent to jail.
+
+    The two (board_size, board_size) blocks sum to a column stochastic matrix. LRU cache is used to store results, so
+    the blocks must not be modified.
+    """
+    free = sp.identity(board_size, format="lil")
+    sent = sp.lil_matrix((board_size, board_size))
+    if go_to_jail is not None:
+        free[go_to_jail, go_to_jail] = 0.0
+        sent[jail, go_to_jail] = 1.0
+    return free.tocsc(), sent.tocsc()
+
+
+@lru_cache(maxsize=8)
+def chance_block(
+    board_size: int, chance_locs: Tuple[int, ...], chance_advances: Tuple[int, ...], n_chance: int
+) -> sp.csc_matrix:
+    """
+    Return the moves made by chance cards as a (board_size, board_size) column stochastic matrix.
+
+    A player landing on a chance square draws one of n_chance cards: each card in chance_advances moves them to that
+    square, any other card leaves them where they are. LRU cache is used to store results, so the block must not be
+    modified.
+    """
+    block = sp.identity(board_size, format="lil")
+    for chance in set(chance_locs):
+        block[chance, chance] = 1 - len(chance_advances) / n_chance
+        for advance in chance_advances:
+            block[advance, chance] += 1 / n_chance
+    return block.tocsc()
+
+
+class ExpandedMonopolyMarkovChain(MonopolySimulationBase):
+    """
+    Monopoly simulation based on a Markov Chain whose state also records the doubles streak and jail turns.
+
+    MonopolyMarkovChain only tracks the square, so the three doubles rule has to be approximated. Here each state is
+    (square, consecutive doubles, jail turns left): the square, 0 to 2 doubles rolled in a row, and for players held in
+    jail the number of turns left there. Only the jail square has jail turns, so there are
+    3 * board_size + 3 * jail_turns states, e.g. 120 for the standard board. The rules are applied in the same order as
+    MonopolyMonteCarlo: move, go to jail, chance cards, then three doubles in a row. The square occupancy therefore
+    matches MonopolyMonteCarlo exactly, rather than only in the steady state.
+
+    The matrix is assembled sparsely from the movement, go to jail and chance blocks. Each block is cached on the
+    settings it depends on, so changing e.g. the chance cards only rebuilds the chance block.
+    """
+
+    def __init__(self, settings: Optional[MonopolySettings] = None) -> None:
+        super().__init__(settings)
+
+        settings = self._settings
+        n_squares = settings.board_size
+        self.n_states = N_STREAKS * n_squares + N_STREAKS * settings.jail_turns
+        # Square of each state, used to sum over the doubles streak and jail turns
+        squares = np.concatenate(
+            [np.tile(np.arange(n_squares), N_STREAKS), np.full(N_STREAKS * settings.jail_turns, settings.jail)]
+        )
+        self._square_map = sp.csr_matrix(
+            (np.ones(self.n_states), (squares, np.arange(self.n_states))), shape=(n_squares, self.n_states)
+        )
+
+        initial_state = np.zeros(self.n_states)
+        initial_state[self.index(0)] = 1.0
+
+        self.initial_state = initial_state
+        self.prob_matrix = self._build_matrix()
+        self.markov = MarkovChain(self.prob_matrix, initial_state)
+
+    def index(self, square: int, streak: int = 0, jail_turns: int = 0) -> int:
+        """Return the index of the state (square, streak, jail_turns)"""
+        if jail_turns:
+            return N_STREAKS * self._settings.board_size + N_STREAKS * (jail_turns - 1) + streak
+        return streak * self._settings.board_size + square
+
+    def _build_matrix(self) -> sp.csc_matrix:
+        settings = self._settings
+        n_squares = settings.board_size
+        non_double, double = movement_blocks(n_squares)
+        free, sent = go_to_jail_blocks(n_squares, settings.go_to_jail, settings.jail)
+        chance = chance_block(
+            n_squares, tuple(settings.chance_locs), tuple(settings.chance_advances), settings.n_chance
+        )
+        land_free = chance @ free
+        land_sent = chance @ sent
+
+        def land(moves: sp.spmatrix, streak: int) -> sp.csc_matrix:
+            """Map (n_squares, m) moves onto all states, landing with the given doubles streak"""
+            rows = [sp.csc_matrix((n_squares, moves.shape[1]))] * N_STREAKS
+            rows[streak] = land_free @ moves
+            held = sp.csc_matrix((N_STREAKS * settings.jail_turns, moves.shape[1]))
+            sent_moves = (land_sent @ moves).tolil()
+            if settings.jail_turns:
+                # Players sent to jail are held there, unless a chance card moved them on
+                held = held.tolil()
+                held[self.index(settings.jail, streak, settings.jail_turns) - N_STREAKS * n_squares] = sent_moves[
+                    settings.jail
+                ]
+                sent_moves[settings.jail] = 0
+            rows[streak] = rows[streak] + sent_moves
+            return sp.vstack(rows + [held], format="csc")
+
+        def three_doubles(n_cols: int, mass: float) -> sp.csc_matrix:
+            """Send mass from each of n_cols columns to jail with a streak of MAX_DOUBLES_STREAK"""
+            row = self.index(settings.jail, MAX_DOUBLES_STREAK, settings.jail_turns)
+            return sp.csc_matrix(
+                (np.full(n_cols, mass), (np.full(n_cols, row), np.arange(n_cols))), shape=(self.n_states, n_cols)
+            )
+
+        # Double rolls from a free square with each streak
+        double_columns = []
+        for streak in range(N_STREAKS):
+            if settings.three_doubles_jail and streak == MAX_DOUBLES_STREAK:
+                double_columns.append(three_doubles(n_squares, PROB_DOUBLE))
+            else:
+                double_columns.append(land(double, min(streak + 1, MAX_DOUBLES_STREAK)))
+        non_double_columns = land(non_double, 0)
+        columns = [non_double_columns + double_columns[streak] for streak in range(N_STREAKS)]
+
+        # Players held in jail only move if they roll a double, which then counts towards their streak
+        for jail_turns in range(1, settings.jail_turns + 1):
+            for streak in range(N_STREAKS):
+                column = double_columns[streak][:, settings.jail].tolil()
+                column[self.index(settings.jail, 0, jail_turns - 1), 0] += 1 - PROB_DOUBLE
+                columns.append(column.tocsc())
+
+        return sp.hstack(columns, format="csc")
+
+    def squares_distribution(self, states: np.ndarray) -> np.ndarray:
+        """Sum states over the doubles streak and jail turns to give the probability of being on each square"""
+        return (self._square_map @ np.asarray(states).T).T
+
+    def state_at_time(self, time: int) -> np.ndarray:
+        """Return the probability of being on each square at time"""
+        return self.squares_distribution(self.markov.state_at_time(time))
+
+    def state_at_times(self, times: npt.ArrayLike) -> np.ndarray:
+        """Return the probability of being on each square at each of times"""
+        return self.squares_distribution(self.markov.state_at_times(times))
+
+    def stationary_state(self) -> np.ndarray:
+        """Return the long run probability of being on each square"""
+        return self.squares_distribution(self.markov.stationary_state())
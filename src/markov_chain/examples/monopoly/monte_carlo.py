@@ -1,9 +1,19 @@
+from typing import Iterator
 from typing import Optional
 
 import numpy as np
 
 from markov_chain.examples.monopoly.utils import MonopolySettings
 from markov_chain.examples.monopoly.utils import MonopolySimulationBase
+from markov_chain.instrumentation import instrumented
+
+
+# Number of consecutive doubles which sends a player to jail
+N_DOUBLES_JAIL = 3
+# Bit t of a player's doubles streak is set if they rolled a double t turns ago (bit 0 is the latest turn)
+DOUBLES_STREAK = (1 << N_DOUBLES_JAIL) - 1
+# Players counted by each np.bincount call, bounding the temporary array it casts positions to (8 bytes per player)
+HISTOGRAM_CHUNK = 2**22
 
 
 class MonopolyMonteCarlo(MonopolySimulationBase):
@@ -13,62 +23,166 @@ class MonopolyMonteCarlo(MonopolySimulationBase):
     Pass MonopolySetting to define the settings used for the game.
     The num_players parameter allows you to define the number of simulations to run to calculate the probability.
         This selection is a tradeoff between accuracy and processing time.
+
+    Only the current positions and whether each of the last three rolls was a double (for the three-doubles rule) are
+    required to advance the game. Positions are stored in the smallest unsigned type holding them (np.uint8 for the
+    standard board) and the doubles as a rolling bitmask, one np.uint8 per player, so a player takes 2 bytes (3 with
+    MonopolySettings.jail_turns) rather than the 56 of int64 positions and rolls, and 100 million players fit in a few
+    GB including the temporaries of a turn. After every turn the occupancy of each square is counted in one pass with
+    np.bincount and stored, so state_at_time never needs past positions. The history_size parameter controls how many
+    past positions are kept as well:
+        None keeps every turn (in a buffer which grows geometrically),
+        k > 0 keeps the last k turns in a preallocated ring buffer,
+        0 keeps none, so memory is O(num_players) however many turns are played.
+    Pass a np.random.Generator as rng for reproducible games.
     """
 
-    def __init__(self, settings: Optional[MonopolySettings] = None, num_players: int = 10) -> None:
+    def __init__(
+        self,
+        settings: Optional[MonopolySettings] = None,
+        num_players: int = 10,
+        history_size: Optional[int] = None,
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
         super().__init__(settings)
+        # Fall back to the global numpy random state if no generator is given
+        self._integers = np.random.randint if rng is None else rng.integers
         self.num_players = num_players
-        self.game_states = np.zeros((1, num_players), int)
-        self.rolls1 = np.zeros((1, num_players), int)
-        self.rolls2 = np.zeros((1, num_players), int)
+        self.history_size = history_size
+        self.n_turns = 0
+        settings = self._settings
+        # Positions before wrapping around the board reach board_size + 11
+        self.position = np.zeros(num_players, np.min_scalar_type(settings.board_size + 11))
+        # Turns each player has left in jail when MonopolySettings.jail_turns is used
+        self.jail_turns_left = np.zeros(
+            num_players if settings.jail_turns else 0, np.min_scalar_type(settings.jail_turns)
+        )
+        # Rolling bitmask of the doubles rolled by each player in the last N_DOUBLES_JAIL turns, see DOUBLES_STREAK
+        self._doubles = np.zeros(num_players, np.uint8)
+        self._is_chance = np.zeros(settings.board_size, bool)
+        self._is_chance[settings.chance_locs] = True
+        self._histograms = [self._histogram(self.position)]
 
-    def advance(self) -> None:
-        """Advance all of the players by simulating their next turn. Stack the result onto the game_states."""
-        prev_turn = self.game_states[-1, :]
+        capacity = 16 if history_size is None else history_size
+        self._history = np.zeros((capacity, num_players), self.position.dtype)
+        self._record_history()
+
+    def _histogram(self, position: np.ndarray) -> np.ndarray:
+        board_size = self._settings.board_size
+        if len(position) <= HISTOGRAM_CHUNK:
+            return np.bincount(position, minlength=board_size)
+        counts = np.zeros(board_size, np.int64)
+        for start in range(0, len(position), HISTOGRAM_CHUNK):
+            counts += np.bincount(position[start : start + HISTOGRAM_CHUNK], minlength=board_size)
+        return counts
+
+    def _record_history(self) -> None:
+        if self.history_size == 0:
+            return
+        if self.history_size is None:
+            if self.n_turns >= self._history.shape[0]:
+                self._history = np.concatenate([self._history, np.zeros_like(self._history)])
+            self._history[self.n_turns] = self.position
+        else:
+            self._history[self.n_turns % self.history_size] = self.position
+
+    @property
+    def game_states(self) -> np.ndarray:
+        """Positions of every player for each stored turn, oldest first"""
+        if self.history_size is None:
+            return self._history[: self.n_turns + 1]
+        if self.history_size == 0:
+            raise RuntimeError("No history is stored when history_size is 0")
+        stored = min(self.n_turns + 1, self.history_size)
+        first = self.n_turns + 1 - stored
+        return self._history[np.arange(first, first + stored) % self.history_size]
 
-        roll_sample = np.random.choice([1, 2, 3, 4, 5, 6], size=(2, self.num_players))
-        self.rolls1 = np.vstack([self.rolls1, roll_sample[0, :]])
-        self.rolls2 = np.vstack([self.rolls2, roll_sample[1, :]])
+    @property
+    def occupancy(self) -> np.ndarray:
+        """Number of players on each square after each turn played so far, shape (n_turns + 1, board_size)"""
+        return np.array(self._histograms)
 
-        next_turn = prev_turn + roll_sample[0, :] + roll_sample[1, :]
-        next_turn = self.replacements(next_turn)
+    @property
+    def recent_doubles(self) -> np.ndarray:
+        """Whether each player rolled a double in each of the most recent turns (up to three), oldest first"""
+        stored = min(self.n_turns, N_DOUBLES_JAIL)
+        shifts = np.arange(stored - 1, -1, -1, dtype=np.uint8)
+        return (self._doubles[None, :] >> shifts[:, None]) & 1 == 1
 
-        self.game_states = np.vstack([self.game_states, next_turn])
+    @instrumented("MonopolyMonteCarlo.advance")
+    def advance(self) -> None:
+        """Advance all of the players by simulating their next turn and record the occupancy of each square."""
+        rolls = self._integers(1, 7, size=(2, self.num_players), dtype=np.uint8)
+        doubles = rolls[0] == rolls[1]
+        self._doubles <<= 1
+        self._doubles |= doubles
+        self._doubles &= DOUBLES_STREAK
+        self.n_turns += 1
+
+        next_turn = self.position + rolls[0]
+        next_turn += rolls[1]
+        del rolls
+        position = self.replacements(next_turn)
+        if self._settings.jail_turns:
+            position = self._hold_in_jail(next_turn, position, doubles)
+        self.position = position
+
+        self._histograms.append(self._histogram(self.position))
+        self._record_history()
 
     def replacements(self, arr: np.ndarray) -> np.ndarray:
         """For a given array of positions, make replacements for go to jail, advance to ..., etc."""
-        # Subtract 40 from those which have looped around the board
-        arr2 = np.where(arr > 39, arr - 40, arr)
+        settings = self._settings
+        # Changes are made in place on a copy, keeping the dtype of the positions
+        arr2 = np.array(arr).ravel()
+        # Subtract the board size from those which have looped around the board
+        arr2[arr2 >= settings.board_size] -= settings.board_size
         # Go to jail square
-        arr2 = np.where(arr2 == 30, 10, arr2)
-        # Advance to x chance/comm chest
-        choose_advance = np.random.choice(np.arange(0, self._settings.n_chance), size=(1, self.num_players)) < len(
-            self._settings.chance_advances
-        )
-        advance_to_locs = np.random.choice(self._settings.chance_advances, size=(1, self.num_players))
-        arr2 = np.where(
-            np.isin(arr2, self._settings.chance_locs) * choose_advance,
-            advance_to_locs,
-            arr2,
-        )
+        if settings.go_to_jail is not None:
+            arr2[arr2 == settings.go_to_jail] = settings.jail
+        # Advance to x chance/comm chest: only the players on a chance square draw a card, which is one of the
+        # chance_advances with probability len(chance_advances) / n_chance
+        on_chance = np.flatnonzero(self._is_chance[arr2])
+        card = self._integers(0, settings.n_chance, size=len(on_chance))
+        advance = card < len(settings.chance_advances)
+        arr2[on_chance[advance]] = np.asarray(settings.chance_advances)[card[advance]]
         # Roll three doubles jail
-        if self._settings.three_doubles_jail and self.rolls1.shape[0] > 3:
-            arr2 = np.where(
-                np.all(self.rolls1[-3:, :] == self.rolls2[-3:, :], axis=0),
-                10,
-                arr2,
-            )
+        if settings.three_doubles_jail:
+            arr2[self._doubles == DOUBLES_STREAK] = settings.jail
 
         return arr2
 
+    def _hold_in_jail(self, next_turn: np.ndarray, position: np.ndarray, doubles: np.ndarray) -> np.ndarray:
+        """Keep players with jail turns left in jail unless they rolled a double, and count down their turns"""
+        settings = self._settings
+        left = self.jail_turns_left
+        held = (left > 0) & ~doubles
+        three_doubles = settings.three_doubles_jail & (self._doubles == DOUBLES_STREAK)
+        sent = ((next_turn % settings.board_size == settings.go_to_jail) | three_doubles) & (position == settings.jail)
+        sent &= ~held
+        left[held] -= 1
+        left[~held] = 0
+        left[sent] = settings.jail_turns
+        position[held] = settings.jail
+        return position
+
+    def stream(self, n_steps: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Yield the state at n_steps turns from the current one onwards, advancing the game as required.
+
+        Runs forever without n_steps. Combined with history_size=0 this plays arbitrarily long games in O(num_players)
+        memory.
+        """
+        start = self.n_turns
+        t = start
+        while n_steps is None or t < start + n_steps:
+            yield self.state_at_time(t)
+            t += 1
+
     def state_at_time(self, t: int) -> np.ndarray:
         """Calculate the state at time t"""
-        while self.game_states.shape[0] < t + 1:
+        while self.n_turns < t:
             self.advance()
 
-        state = self.game_states[t, :]
-        counts = []
-        for i in range(40):
-            counts.append((state == i).sum())
-        counts = counts / sum(counts)
-        return counts
+        counts = self._histograms[t]
+        return counts / counts.sum()
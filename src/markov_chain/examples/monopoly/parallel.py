@@ -0,0 +1,92 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from markov_chain.examples.monopoly.monte_carlo import MonopolyMonteCarlo
+from markov_chain.examples.monopoly.utils import MonopolySettings
+from markov_chain.examples.monopoly.utils import MonopolySimulationBase
+
+
+def run_shard(settings: MonopolySettings, num_players: int, n_steps: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """Play n_steps turns for one shard of players and return its occupancy counts, shape (n_steps + 1, board_size)"""
+    sim = MonopolyMonteCarlo(settings, num_players=num_players, history_size=0, rng=np.random.default_rng(seed))
+    sim.state_at_time(n_steps)
+    return sim.occupancy
+
+
+class ParallelMonopolyMonteCarlo(MonopolySimulationBase):
+    """
+    Monte Carlo monopoly simulation sharded across a process pool.
+
+    The players are split into shards of at most shard_size players. Each shard plays with its own np.random.Generator,
+    seeded from SeedSequence(seed).spawn, and the per-turn occupancy counts of the shards are summed. The shards depend
+    only on num_players, shard_size and seed, and integer counts are summed exactly, so the result for a given seed is
+    identical for any max_workers.
+
+    Shards keep no history, so memory per worker is O(shard_size). Asking for a later time than has been simulated
+    replays the shards from the start with the same seeds, doubling the horizon to amortise the cost.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[MonopolySettings] = None,
+        num_players: int = 10,
+        seed: Optional[int] = None,
+        shard_size: int = 100000,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        super().__init__(settings)
+        if num_players < 1 or shard_size < 1:
+            raise ValueError("num_players and shard_size must be positive")
+        self.num_players = num_players
+        self.max_workers = max_workers
+        # With no seed, fresh entropy is drawn once and reused so that replays are identical
+        self.entropy = np.random.SeedSequence(seed).entropy
+        n_shards = -(-num_players // shard_size)
+        base, extra = divmod(num_players, n_shards)
+        self.shard_players = [base + 1] * extra + [base] * (n_shards - extra)
+        self._occupancy = np.zeros((0, self._settings.board_size), int)
+
+    @property
+    def occupancy(self) -> np.ndarray:
+        """Number of players on each square after each turn simulated so far"""
+        return self._occupancy
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """Simulate n_steps turns for every shard and return the merged occupancy counts"""
+        seeds = np.random.SeedSequence(self.entropy).spawn(len(self.shard_players))
+        args = (
+            [self._settings] * len(seeds),
+            self.shard_players,
+            [n_steps] * len(seeds),
+            seeds,
+        )
+        if self.max_workers == 1 or len(seeds) == 1:
+            shards: List[np.ndarray] = list(map(run_shard, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                shards = list(executor.map(run_shard, *args))
+        self._occupancy = np.sum(shards, axis=0)
+        return self._occupancy
+
+    def _ensure_simulated(self, t: int) -> None:
+        if t >= self._occupancy.shape[0]:
+            self.run(max(t, 2 * (self._occupancy.shape[0] - 1)))
+
+    def state_at_time(self, t: int) -> np.ndarray:
+        """Calculate the state at time t"""
+        self._ensure_simulated(t)
+        counts = self._occupancy[t]
+        return counts / counts.sum()
+
+    def state_at_times(self, times: npt.ArrayLike) -> np.ndarray:
+        """Calculate the states at each of times"""
+        times = np.asarray(times)
+        if len(times) == 0:
+            return np.zeros((0, self._settings.board_size))
+        self._ensure_simulated(times.max())
+        counts = self._occupancy[times]
+        return counts / counts.sum(axis=1, keepdims=True)
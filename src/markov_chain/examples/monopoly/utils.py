@@ -4,10 +4,14 @@ from dataclasses import dataclass
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Union
 
 import numpy as np
+import numpy.typing as npt
 import plotly.graph_objects as go
 
+from markov_chain.instrumentation import instrumented
+
 
 @dataclass
 class MonopolySettings:
@@ -17,6 +21,11 @@ class MonopolySettings:
     n_chance: int
     chance_locs: List[int]
     chance_advances: List[int]
+    board_size: int = 40
+    jail: int = 10
+    go_to_jail: Optional[int] = 30
+    # Turns a player sent to jail stays there unless they roll a double. 0 means they move on as normal next turn.
+    jail_turns: int = 0
 
 
 DefaultMonopolySettings = MonopolySettings(
@@ -39,7 +48,12 @@ class MonopolySimulationBase(ABC):
     def state_at_time(self, time: int) -> np.ndarray:
         """Return state at time"""
 
+    def state_at_times(self, times: npt.ArrayLike) -> np.ndarray:
+        """Return the states at each of times as an array of shape (len(times), n_squares)"""
+        return np.array([self.state_at_time(t) for t in times])
+
 
+@instrumented("plot_monopoly_comparison")
 def plot_monopoly_comparison(simulators: Dict[str, MonopolySimulationBase], step: int = 20) -> go.Figure:
     """Plot a comparison between a list of simulators at a given timestep"""
     fig = go.Figure()
@@ -62,27 +76,38 @@ def plot_monopoly_comparison(simulators: Dict[str, MonopolySimulationBase], step
     return fig
 
 
+@instrumented("animate_monopoly_comparison")
 def animate_monopoly_comparison(
-    simulators: Dict[str, MonopolySimulationBase], timesteps: int = 20, time_between_steps: int = 200
+    simulators: Dict[str, Union[MonopolySimulationBase, np.ndarray]],
+    timesteps: int = 20,
+    time_between_steps: int = 200,
 ) -> go.Figure:
-    """Create an animation of a comparison between a list of simulators over time"""
+    """
+    Create an animation of a comparison between a list of simulators over time.
 
-    frames = []
+    Instead of a simulator, a label may map to its precomputed states at times 0 to timesteps - 1, e.g. from an
+    EvaluationService.
+    """
 
+    states = {
+        label: sim if isinstance(sim, np.ndarray) else sim.state_at_times(np.arange(timesteps))
+        for label, sim in simulators.items()
+    }
+    # find the maximum value across all simulators at each time
+    max_values = np.max([s.max(axis=1) for s in states.values()], axis=0)
+
+    frames = []
     for i in range(timesteps):
         frame_data = []
-        max_value = max(
-            [max(sim.state_at_time(i)) for sim in simulators.values()]
-        )  # find the maximum value across all simulators at this time
-        for label, sim in simulators.items():
-            state = sim.state_at_time(i) / max_value
+        for label, s in states.items():
+            state = s[i] / max_values[i]
             frame_data.append(go.Scatter(x=list(range(len(state))), y=state, mode="lines", name=label))
         frames.append(go.Frame(data=frame_data))
 
     fig = go.Figure(
         data=frames[0]["data"],
         layout=go.Layout(
-            xaxis=dict(range=[0, max([len(sim.state_at_time(0)) for sim in simulators.values()])], autorange=False),
+            xaxis=dict(range=[0, max([s.shape[1] for s in states.values()])], autorange=False),
             yaxis=dict(range=[0, 1], autorange=False),
             updatemenus=[
                 dict(
@@ -0,0 +1,231 @@
+import warnings
+
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from markov_chain.absorbing import AbsorptionResult
+from markov_chain.chain import MATRIX_FREE_METHODS
+from markov_chain.chain import MarkovChain
+from markov_chain.classes import CommunicatingClass
+from markov_chain.solvers import StationaryResult
+
+
+# Number of lines of a text edge list parsed at a time
+EDGE_CHUNK_ROWS = 2**20
+
+
+def read_edge_list(
+    path: Union[str, Path],
+    delimiter: Optional[str] = None,
+    dtype: npt.DTypeLike = np.int64,
+    chunk_rows: int = EDGE_CHUNK_ROWS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read a directed edge list and return the (sources, targets) arrays.
+
+    .npy files must hold an (m, 2) integer array and are memory-mapped. .bin files hold raw (source, target) pairs of
+    dtype. Anything else is read as text with one "source target" pair per line, separated by delimiter (whitespace by
+    default) and with "#" comments. Text is parsed chunk_rows lines at a time, so only the integers are held in memory.
+    """
+    path = Path(path)
+    if path.suffix == ".npy":
+        edges = np.load(path, mmap_mode="r")
+    elif path.suffix == ".bin":
+        edges = np.fromfile(path, dtype=dtype).reshape(-1, 2)
+    else:
+        chunks: List[np.ndarray] = []
+        with open(path) as f, warnings.catch_warnings():
+            # loadtxt warns when it reaches the end of the file
+            warnings.simplefilter("ignore", UserWarning)
+            while True:
+                chunk = np.loadtxt(f, delimiter=delimiter, dtype=dtype, ndmin=2, max_rows=chunk_rows, usecols=(0, 1))
+                if len(chunk) == 0:
+                    break
+                chunks.append(chunk)
+        edges = np.concatenate(chunks) if chunks else np.zeros((0, 2), dtype=dtype)
+    if edges.ndim != 2 or edges.shape[1] != 2:
+        raise ValueError("Edge list must have two columns: source and target")
+    return edges[:, 0], edges[:, 1]
+
+
+class PageRank(MarkovChain):
+    """
+    The Google PageRank algorithm: the stationary state of a random surfer on a directed graph.
+
+    At each step the surfer follows a random outgoing link with probability damping, and otherwise teleports to a node
+    drawn from the personalisation vector (uniform by default). Dangling nodes, which have no outgoing links, teleport
+    with probability 1. The resulting Google matrix is dense, so it is never formed: only the sparse link matrix
+    (CSR, 12 bytes per edge) is stored, and the teleportation and dangling nodes are applied as rank one corrections
+    in each product. The probability matrix is therefore a scipy LinearOperator and states are propagated with the
+    matvec engine.
+
+    A batch of k personalisation vectors can be given as a (k, n) array to compute k personalised PageRanks at once,
+    sharing every sparse product. The personalisation vectors are also used as the initial state, so state_at_time(t)
+    is the distribution of the surfer after t clicks.
+
+    As the Google matrix is never formed, the stationary methods are limited to those needing only products with it
+    (power, arnoldi and gmres), and methods which need the matrix itself (communicating_classes, update, absorption)
+    raise ValueError.
+    """
+
+    _stationary_methods = MATRIX_FREE_METHODS
+
+    def __init__(
+        self,
+        sources: npt.ArrayLike,
+        targets: npt.ArrayLike,
+        n_nodes: Optional[int] = None,
+        damping: float = 0.85,
+        personalisation: Optional[npt.ArrayLike] = None,
+        weights: Optional[npt.ArrayLike] = None,
+    ) -> None:
+        # The Google matrix is never formed, so MarkovChain.__init__ is replaced by _init_attributes
+        self._init_attributes("matvec")
+        sources = np.asarray(sources)
+        targets = np.asarray(targets)
+        if sources.shape != targets.shape or sources.ndim != 1:
+            raise ValueError("Sources and targets must be one dimensional arrays of the same length")
+        if not 0 <= damping <= 1:
+            raise ValueError("Damping factor must be between 0 and 1")
+        if n_nodes is None:
+            n_nodes = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        if n_nodes < 1:
+            raise ValueError("Graph has no nodes")
+        weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=float)
+        if np.any(weights < 0):
+            raise ValueError("Edge weights must be non-negative")
+
+        out_weight = np.bincount(sources, weights=weights, minlength=n_nodes)
+        self.damping = damping
+        self.dangling = out_weight == 0
+        self._dangling_weight = self.dangling.astype(float)
+        # links[i, j] is the probability of following a link from node j to node i
+        probabilities = np.divide(
+            weights, out_weight[sources], out=np.zeros_like(weights), where=out_weight[sources] > 0
+        )
+        self.links = sp.csr_matrix((probabilities, (targets, sources)), shape=(n_nodes, n_nodes))
+
+        self.n_states = n_nodes
+        self._sparse = True
+        self._probability_matrix = spla.LinearOperator(
+            (n_nodes, n_nodes), matvec=self._apply, matmat=self._apply, dtype=float
+        )
+        if personalisation is None:
+            personalisation = np.full(n_nodes, 1.0 / n_nodes)
+        personalisation = np.array(personalisation, dtype=float)
+        if np.any(personalisation < 0) or np.any(personalisation.sum(axis=-1) == 0):
+            raise ValueError("Personalisation vectors must be non-negative and not all zero")
+        self._initial_state = self._validate_initial_state(
+            personalisation / personalisation.sum(axis=-1, keepdims=True)
+        )
+        # Teleport distributions as the columns of an (n, [k]) array, matching the states propagated
+        self._teleport = np.ascontiguousarray(self._initial_state.T)
+
+    @classmethod
+    def from_edge_list(cls, path: Union[str, Path], delimiter: Optional[str] = None, **kwargs) -> "PageRank":
+        """Build the PageRank of the graph stored in an edge list file (see read_edge_list)"""
+        sources, targets = read_edge_list(path, delimiter=delimiter)
+        return cls(sources, targets, **kwargs)
+
+    def _storage_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        # The link probabilities are stored as edge weights, which the constructor normalises back to themselves
+        links = sp.csc_matrix(self.links)
+        links.sort_indices()
+        arrays = {"data": links.data, "indices": links.indices, "indptr": links.indptr}
+        return arrays, {"format": "pagerank", "damping": self.damping}
+
+    @classmethod
+    def _from_storage(
+        cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any], initial_state: Optional[np.ndarray], **kwargs
+    ) -> "PageRank":
+        if metadata["format"] != "pagerank":
+            raise ValueError(f"File holds a {metadata['format']} chain: load it with MarkovChain.load")
+        n_nodes = metadata["n_states"]
+        links = sp.csc_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(n_nodes, n_nodes))
+        targets, sources, weights = sp.find(links)
+        return cls(sources, targets, n_nodes, metadata["damping"], initial_state, weights, **kwargs)
+
+    def _apply(self, x: np.ndarray) -> np.ndarray:
+        """Apply the Google matrix to the columns of x, with a column of x per teleport distribution"""
+        x = np.asarray(x)
+        teleport = self._teleport[:, None] if x.ndim == 2 and self._teleport.ndim == 1 else self._teleport
+        teleported = (1 - self.damping) * x.sum(axis=0) + self.damping * (self._dangling_weight @ x)
+        result = self.links @ x
+        result *= self.damping
+        result += teleport * teleported
+        return result
+
+    def solve_stationary(
+        self, method: Optional[str] = None, tol: float = 1e-10, max_iter: int = 1000, **kwargs
+    ) -> StationaryResult:
+        """
+        Calculate the PageRank, reporting the L1 change of the last iteration and the iteration count.
+
+        The default method is power iteration, which converges at the rate damping**iterations for any graph and
+        handles a batch of personalisation vectors together. The other solvers that only need matrix-vector products
+        ("power" with lazy=True, "arnoldi" or "gmres") can be selected for a single personalisation vector; any other
+        method raises ValueError. A PageRank loaded with a saved stationary result returns it by default.
+        """
+        if method is None and self._stationary is not None:
+            return self._stationary
+        if method is not None:
+            if self.batch_size is not None:
+                raise ValueError("Only the default method supports a batch of personalisation vectors")
+            return super().solve_stationary(method, tol=tol, max_iter=max_iter, **kwargs)
+        state = self._teleport
+        change = np.inf
+        for iteration in range(1, max_iter + 1):
+            new_state = self._apply(state)
+            change = float(np.abs(new_state - state).sum())
+            state = new_state
+            if change < tol:
+                return StationaryResult(state.T, change, iteration, True)
+        return StationaryResult(state.T, change, max_iter, False)
+
+    def communicating_classes(self) -> List[CommunicatingClass]:
+        """Communicating classes need the Google matrix to be stored, which it never is for PageRank"""
+        raise ValueError(
+            "Communicating classes are not available for PageRank, as the Google matrix is never formed. "
+            "Use markov_chain.classes.communicating_classes(pagerank.links) for the classes of the link graph."
+        )
+
+    @property
+    def is_irreducible(self) -> bool:
+        """
+        Whether every node can reach every other: true when the surfer teleports (damping < 1) to every node.
+
+        Otherwise it depends on the link graph, and ValueError is raised as the Google matrix is never formed.
+        """
+        if self.damping < 1 and np.all(self._teleport > 0):
+            return True
+        raise ValueError(
+            "Irreducibility is only known for PageRank when damping < 1 and every personalisation is positive, "
+            "as the Google matrix is never formed"
+        )
+
+    def absorbing_states(self) -> np.ndarray:
+        """Teleportation leaves every node with probability 1 - damping, so there are no absorbing states"""
+        if self.damping < 1:
+            return np.zeros(0, dtype=int)
+        return np.flatnonzero(self.links.diagonal() == 1)
+
+    def absorption(self) -> AbsorptionResult:
+        """Absorption analysis needs the transition matrix to be stored, which it never is for PageRank"""
+        raise ValueError("Absorption analysis is not available for PageRank, as the Google matrix is never formed")
+
+    def update(self, *args, **kwargs) -> MarkovChain:
+        """The Google matrix is never stored, so it cannot be updated: build a new PageRank instead"""
+        raise ValueError(
+            "PageRank chains cannot be updated, as the Google matrix is never formed. "
+            "Build a new PageRank from the changed edges instead."
+        )
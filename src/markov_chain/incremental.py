@@ -0,0 +1,155 @@
+import warnings
+
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.linalg as la
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from markov_chain.solvers import SINGULAR_SYSTEM
+from markov_chain.solvers import SolverError
+from markov_chain.solvers import StationaryResult
+from markov_chain.solvers import _normalise
+from markov_chain.solvers import _pinned_system
+from markov_chain.solvers import direct
+from markov_chain.solvers import gmres
+from markov_chain.solvers import recurrent_state
+from markov_chain.solvers import residual
+
+
+Matrix = Union[np.ndarray, sp.spmatrix]
+
+# Above this many changed columns the Woodbury update costs more than a warm-started GMRES solve
+MAX_UPDATE_RANK = 64
+
+
+def changed_columns(old: Matrix, new: Matrix) -> np.ndarray:
+    """Return the indices of the columns in which two probability matrices differ"""
+    if sp.issparse(old) or sp.issparse(new):
+        difference = sp.csc_matrix(new) - sp.csc_matrix(old)
+        difference.eliminate_zeros()
+        return np.flatnonzero(np.diff(difference.indptr))
+    return np.flatnonzero(np.any(np.asarray(new) != np.asarray(old), axis=0))
+
+
+def replace_columns(matrix: Matrix, columns: npt.ArrayLike, new_columns: Union[npt.ArrayLike, sp.spmatrix]) -> Matrix:
+    """Return a copy of matrix with the given columns replaced by the columns of new_columns, shape (n, len(columns))"""
+    columns = np.asarray(columns, dtype=int)
+    if not sp.issparse(new_columns):
+        new_columns = np.asarray(new_columns, dtype=float)
+    n = matrix.shape[0]
+    if new_columns.shape != (n, len(columns)):
+        raise ValueError("New columns do not match the number of states and columns given")
+    if sp.issparse(matrix):
+        keep = np.ones(n)
+        keep[columns] = 0.0
+        selector = sp.csr_matrix((np.ones(len(columns)), (np.arange(len(columns)), columns)), shape=(len(columns), n))
+        return (sp.csc_matrix(matrix) @ sp.diags(keep) + sp.csc_matrix(new_columns) @ selector).tocsc()
+    matrix = np.array(matrix)
+    matrix[:, columns] = sp.csc_matrix(new_columns).toarray() if sp.issparse(new_columns) else new_columns
+    return matrix
+
+
+def _factorise(system: Matrix) -> Callable[[np.ndarray], np.ndarray]:
+    """Factorise the pinned system once and return a function solving it for any right hand side"""
+    if sp.issparse(system):
+        try:
+            lu = spla.splu(sp.csc_matrix(system))
+        except RuntimeError as e:
+            raise SolverError(SINGULAR_SYSTEM) from e
+        return lu.solve
+    with warnings.catch_warnings():
+        # Singularity is reported below as an error
+        warnings.simplefilter("ignore", la.LinAlgWarning)
+        lu, piv = la.lu_factor(system, check_finite=False)
+    if np.any(np.isclose(np.diag(lu), 0)):
+        raise SolverError(SINGULAR_SYSTEM)
+
+    def solve(rhs: np.ndarray) -> np.ndarray:
+        return la.lu_solve((lu, piv), rhs, check_finite=False)
+
+    return solve
+
+
+class StationaryUpdater:
+    """
+    Re-solve the stationary state of a chain after some of its columns change, without starting from scratch.
+
+    The pinned stationary system A x = b of the base matrix (see markov_chain.solvers.direct) is LU factorised once.
+    Changing k columns of P (other than the pinned state's) changes k columns of A, A' = A + D S^T with S selecting the
+    changed columns, and the Woodbury identity
+        A'^-1 b' = y - Z (I + S^T Z)^-1 S^T y,   y = A^-1 b',   Z = A^-1 D
+    solves the new system with k + 1 solves against the existing factors and a k x k dense solve. Updates are always
+    relative to the base matrix, so any number of chains derived from it share the factorisation. If the changes make
+    the pinned state transient the updated system is singular, and the new matrix is solved directly instead.
+
+    When more than max_rank columns differ from the base, GMRES is warm started from the most recent stationary state
+    instead, falling back to a fresh direct solve if it does not converge.
+    """
+
+    def __init__(self, matrix: Matrix, max_rank: int = MAX_UPDATE_RANK) -> None:
+        self.base = sp.csc_matrix(matrix) if sp.issparse(matrix) else matrix
+        self.max_rank = max_rank
+        self.n_states = matrix.shape[0]
+        self._solve = None
+        self._pinned = self.n_states - 1
+        self._last_state: Optional[np.ndarray] = None
+        if self.n_states > 1:
+            self._pinned = recurrent_state(matrix)
+            system, _ = _pinned_system(matrix, self._pinned)
+            self._solve = _factorise(system)
+
+    def solve(
+        self, matrix: Matrix, columns: Optional[npt.ArrayLike] = None, tol: float = 1e-10, max_iter: int = 1000
+    ) -> StationaryResult:
+        """
+        Return the stationary state of matrix, which differs from the base matrix only in columns.
+
+        The changed columns are found by comparing with the base matrix if they are not given.
+        """
+        if matrix.shape != self.base.shape:
+            raise ValueError("Matrix does not match the number of states of the base matrix")
+        if self.n_states == 1:
+            return StationaryResult(np.ones(1), 0.0, 0, True)
+        if sp.issparse(matrix):
+            matrix = sp.csc_matrix(matrix)
+        columns = changed_columns(self.base, matrix) if columns is None else np.unique(np.asarray(columns, dtype=int))
+        if len(columns) > self.max_rank:
+            return self._warm_start(matrix, tol, max_iter)
+
+        pinned = self._pinned
+        _, b = _pinned_system(matrix, pinned)
+        y = self._solve(b)
+        # The pinned state's column only enters the right hand side b
+        columns = columns[columns != pinned]
+        if len(columns):
+            difference = matrix[:, columns] - self.base[:, columns]
+            difference = difference.toarray() if sp.issparse(difference) else np.asarray(difference)
+            z = self._solve(np.ascontiguousarray(np.delete(difference, pinned, axis=0)))
+            # Position of each changed column in the system, which has no row or column for the pinned state
+            positions = columns - (columns > pinned)
+            capacitance = np.identity(len(columns)) + z[positions]
+            # A singular or ill-conditioned capacitance matrix (the pinned state became transient) is checked for
+            # explicitly, as la.solve does not raise for every singular matrix
+            if not np.linalg.cond(capacitance) < 1 / np.finfo(np.float64).eps:
+                result = direct(matrix, tol=tol)
+                self._last_state = result.state
+                return result
+            y = y - z @ la.solve(capacitance, y[positions], check_finite=False)
+        state = _normalise(np.insert(y, pinned, 1.0))
+        res = residual(matrix, state)
+        self._last_state = state
+        return StationaryResult(state, res, 1, res < max(tol, 1e-8))
+
+    def _warm_start(self, matrix: Matrix, tol: float, max_iter: int) -> StationaryResult:
+        if self._last_state is None:
+            self.solve(self.base)
+        result = gmres(matrix, tol=tol, max_iter=max_iter, x0=self._last_state)
+        if not result.converged:
+            result = direct(matrix, tol=tol)
+        self._last_state = result.state
+        return result
@@ -0,0 +1,200 @@
+import functools
+import logging
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Event:
+    """
+    Dataclass describing one instrumented operation, e.g. MarkovChain.evaluate.
+
+    attributes hold whatever the operation reports: typically n_states, and where relevant the engine, t, method,
+    solver iterations, residual, condition_number of the eigenvector matrix and cache_hit. If the operation raised,
+    error holds the name of the exception.
+    """
+
+    name: str
+    seconds: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+Sink = Callable[[Event], None]
+
+# Installed sinks. Instrumentation is off while this is empty, which is checked before any other work is done.
+_sinks: List[Sink] = []
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink: Sink) -> None:
+    """Send every instrumented event to sink, a callable taking an Event (e.g. a LoggingSink or a Recorder)"""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink: Sink) -> None:
+    """Stop sending events to sink"""
+    with _sinks_lock:
+        _sinks.remove(sink)
+
+
+def enabled() -> bool:
+    """Whether any sink is installed"""
+    return bool(_sinks)
+
+
+class _Span:
+    __slots__ = ("name", "attributes", "_start")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes) -> None:
+        """Add attributes found during the operation, such as solver iterations"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        event = Event(
+            self.name,
+            time.perf_counter() - self._start,
+            self.attributes,
+            None if exc_type is None else exc_type.__name__,
+        )
+        for sink in list(_sinks):
+            sink(event)
+
+
+class _NullSpan:
+    """Returned by span while instrumentation is off, so an instrumented block costs one function call"""
+
+    __slots__ = ()
+
+    def set(self, **attributes) -> None:
+        """Ignore attributes: instrumentation is off"""
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attributes) -> Any:
+    """
+    Time a with block and send it to the sinks as an Event, if any are installed.
+
+    Use the value bound by the with statement to add attributes found inside the block:
+        with span("MarkovChain.solve_stationary", method=method) as s:
+            result = solve()
+            s.set(iterations=result.iterations)
+    """
+    if not _sinks:
+        return _NULL_SPAN
+    return _Span(name, attributes)
+
+
+def instrumented(name: str) -> Callable[[F], F]:
+    """Decorator sending an Event named name for every call of the function while instrumentation is on"""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            if not _sinks:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class LoggingSink:
+    """Sink writing each event as a log record, by default at DEBUG level to the markov_chain logger"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> None:
+        self.logger = logger or logging.getLogger("markov_chain")
+        self.level = level
+
+    def __call__(self, event: Event) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        attributes = " ".join(f"{key}={value}" for key, value in event.attributes.items())
+        error = f" error={event.error}" if event.error else ""
+        self.logger.log(self.level, "%s %.3f ms %s%s", event.name, event.seconds * 1e3, attributes, error)
+
+
+@dataclass
+class Summary:
+    """Dataclass containing the number of calls and total time of one operation"""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+class Recorder:
+    """
+    Sink keeping every event in memory, for inspection or to forward to a metrics system.
+
+    summary() aggregates the calls and total time of each operation, answering where the time went.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Event] = []
+
+    def __call__(self, event: Event) -> None:
+        self.events.append(event)
+
+    def named(self, name: str) -> List[Event]:
+        """Return the events of one operation"""
+        return [event for event in self.events if event.name == name]
+
+    def summary(self) -> Dict[str, Summary]:
+        """Return the number of calls and total time of each operation, most expensive first"""
+        totals: Dict[str, Summary] = defaultdict(Summary)
+        for event in self.events:
+            totals[event.name].count += 1
+            totals[event.name].seconds += event.seconds
+        return dict(sorted(totals.items(), key=lambda item: item[1].seconds, reverse=True))
+
+
+@contextmanager
+def instrument(sink: Optional[Sink] = None) -> Iterator[Recorder]:
+    """
+    Turn instrumentation on within a with block, recording every event in the Recorder returned.
+
+    Events are also sent to sink if one is given, e.g. instrument(LoggingSink()) to log them as they happen.
+    """
+    recorder = Recorder()
+    sinks = [recorder] if sink is None else [recorder, sink]
+    for s in sinks:
+        add_sink(s)
+    try:
+        yield recorder
+    finally:
+        for s in sinks:
+            remove_sink(s)
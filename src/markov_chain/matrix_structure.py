@@ -0,0 +1,61 @@
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import scipy.sparse as sp
+
+
+Matrix = Union[np.ndarray, sp.spmatrix]
+
+
+def bandwidth(matrix: Matrix) -> Tuple[int, int]:
+    """Return the number of non-zero sub-diagonals and super-diagonals of a square matrix"""
+    if sp.issparse(matrix):
+        coo = matrix.tocoo()
+        rows, cols = coo.row[coo.data != 0], coo.col[coo.data != 0]
+    else:
+        rows, cols = np.nonzero(matrix)
+    if len(rows) == 0:
+        return 0, 0
+    offsets = rows.astype(np.int64) - cols
+    return int(max(offsets.max(), 0)), int(max(-offsets.min(), 0))
+
+
+def to_banded(matrix: Matrix, lower: int, upper: int) -> np.ndarray:
+    """
+    Convert a square matrix to LAPACK banded storage, shape (lower + upper + 1, n).
+
+    Element (i, j) of the matrix is stored at [upper + i - j, j], the layout used by scipy.linalg.solve_banded.
+    """
+    n = matrix.shape[0]
+    bands = np.zeros((lower + upper + 1, n))
+    coo = sp.coo_matrix(matrix)
+    if np.any(coo.row.astype(np.int64) - coo.col > lower) or np.any(coo.col.astype(np.int64) - coo.row > upper):
+        raise ValueError("Matrix has entries outside the requested band")
+    np.add.at(bands, (upper + coo.row.astype(np.int64) - coo.col, coo.col), coo.data)
+    return bands
+
+
+def circulant_column(matrix: Matrix, rtol: float = 1e-10, atol: float = 1e-12) -> Optional[np.ndarray]:
+    """
+    Return the first column c if the matrix is circulant (element (i, j) equals c[(i - j) mod n]), otherwise None.
+
+    A circulant transition matrix moves every state by the same random offset, e.g. a board game ignoring special
+    squares.
+    """
+    n = matrix.shape[0]
+    if sp.issparse(matrix):
+        csc = sp.csc_matrix(matrix, copy=True)
+        csc.sum_duplicates()
+        csc.eliminate_zeros()
+        coo = csc.tocoo()
+        column = csc[:, 0].toarray().ravel()
+        if coo.nnz != n * np.count_nonzero(column):
+            return None
+        expected = column[(coo.row.astype(np.int64) - coo.col) % n]
+        return column if np.allclose(coo.data, expected, rtol=rtol, atol=atol) else None
+    matrix = np.asarray(matrix)
+    column = matrix[:, 0]
+    indices = (np.arange(n)[:, None] - np.arange(n)[None, :]) % n
+    return column.copy() if np.allclose(matrix, column[indices], rtol=rtol, atol=atol) else None
@@ -0,0 +1,119 @@
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from markov_chain.chain import MarkovChain
+
+
+class MarkovChainSampler:
+    """
+    Vectorised Monte Carlo sampler for any MarkovChain.
+
+    Each column of the probability matrix is stored as a cumulative distribution over its non-zero entries only (the
+    CSC layout), so memory is O(nnz) for sparse and dense chains alike. All the columns are concatenated into one sorted
+    array by offsetting column j by j, and a whole batch of walkers moves with a single np.searchsorted: the walker in
+    state j draws u in [0, 1) and looks up j + u. With float64 this resolves probabilities down to about 2**-52 * n.
+    j + u can round up to j + 1, so the result is clamped to the entries of column j.
+
+    Initial states can be a state index, a probability distribution, or omitted to use the chain's initial state.
+    Matrix-free chains are sampled from to_sparse if they have it (CirculantMarkovChain); others such as PageRank
+    raise ValueError.
+    """
+
+    def __init__(self, chain: MarkovChain, rng: Optional[np.random.Generator] = None) -> None:
+        self.chain = chain
+        self.n_states = chain.n_states
+        self._rng = np.random.default_rng() if rng is None else rng
+
+        matrix = chain._probability_matrix
+        if isinstance(matrix, spla.LinearOperator):
+            # Matrix-free chains which can form their matrix sparsely (CirculantMarkovChain) are sampled from it
+            if not hasattr(chain, "to_sparse"):
+                raise ValueError(
+                    f"Sampling needs a stored probability matrix, which {type(chain).__name__} never forms"
+                )
+            matrix = chain.to_sparse()
+        matrix = sp.csc_matrix(matrix, dtype=np.float64)
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        self._indices = matrix.indices
+        self._indptr = matrix.indptr
+        columns = np.repeat(np.arange(self.n_states), np.diff(matrix.indptr))
+        # Cumulative probability within each column, normalised so that every column ends at exactly 1
+        cumulative = np.cumsum(matrix.data)
+        column_start = np.concatenate([[0.0], cumulative])[matrix.indptr[:-1]]
+        column_total = np.add.reduceat(matrix.data, matrix.indptr[:-1]) if matrix.nnz else np.zeros(0)
+        self._cumulative = columns + (cumulative - column_start[columns]) / column_total[columns]
+        self._cumulative[matrix.indptr[1:] - 1] = np.arange(1, self.n_states + 1)
+
+    def initial_states(self, n_walkers: int, initial: Optional[Union[int, npt.ArrayLike]] = None) -> np.ndarray:
+        """Draw the starting state of n_walkers walkers"""
+        if initial is None:
+            initial = self.chain._initial_state
+            if initial is None or initial.ndim != 1:
+                raise RuntimeError("An initial state is required for sampling")
+        if np.ndim(initial) == 0:
+            return np.full(n_walkers, int(initial))
+        return self._rng.choice(self.n_states, size=n_walkers, p=np.asarray(initial, dtype=float))
+
+    def step(self, states: np.ndarray) -> np.ndarray:
+        """Move every walker one step"""
+        targets = states + self._rng.random(len(states))
+        found = np.searchsorted(self._cumulative, targets, side="right")
+        return self._indices[np.clip(found, self._indptr[states], self._indptr[states + 1] - 1)]
+
+    def sample_paths(
+        self, n_walkers: int, n_steps: int, initial: Optional[Union[int, npt.ArrayLike]] = None
+    ) -> np.ndarray:
+        """Return the states visited by each walker, shape (n_steps + 1, n_walkers)"""
+        paths = np.empty((n_steps + 1, n_walkers), dtype=self._indices.dtype)
+        paths[0] = self.initial_states(n_walkers, initial)
+        for t in range(n_steps):
+            paths[t + 1] = self.step(paths[t])
+        return paths
+
+    def occupancy(
+        self, n_walkers: int, n_steps: int, initial: Optional[Union[int, npt.ArrayLike]] = None
+    ) -> np.ndarray:
+        """
+        Return the empirical distribution at each step, shape (n_steps + 1, n_states).
+
+        Only the current walker positions are kept, so this is directly comparable with MarkovChain.state_at_times.
+        """
+        result = np.empty((n_steps + 1, self.n_states))
+        states = self.initial_states(n_walkers, initial)
+        for t in range(n_steps + 1):
+            if t:
+                states = self.step(states)
+            result[t] = np.bincount(states, minlength=self.n_states) / n_walkers
+        return result
+
+    def hitting_times(
+        self,
+        targets: npt.ArrayLike,
+        n_walkers: int,
+        max_steps: int,
+        initial: Optional[Union[int, npt.ArrayLike]] = None,
+    ) -> np.ndarray:
+        """
+        Return the first step at which each walker is in one of targets, or -1 if not within max_steps.
+
+        Walkers stop being simulated once they have hit a target.
+        """
+        is_target = np.zeros(self.n_states, dtype=bool)
+        is_target[np.asarray(targets)] = True
+        states = self.initial_states(n_walkers, initial)
+        times = np.where(is_target[states], 0, -1)
+        active = np.flatnonzero(times < 0)
+        for t in range(1, max_steps + 1):
+            if len(active) == 0:
+                break
+            states[active] = self.step(states[active])
+            hit = is_target[states[active]]
+            times[active[hit]] = t
+            active = active[~hit]
+        return times
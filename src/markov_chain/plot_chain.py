@@ -1,14 +1,18 @@
+from itertools import islice
 from typing import Optional
 
+import numpy as np
 import plotly.graph_objects as go
 
 from markov_chain.chain import MarkovChain
+from markov_chain.instrumentation import instrumented
 
 
 class MarkovChainPlotter:
     """Plotting tools for the MarkovChain class"""
 
     @staticmethod
+    @instrumented("MarkovChainPlotter.plot_stationary")
     def plot_stationary(chain: MarkovChain, outfile: Optional[str] = None) -> go.Figure:
         """Plot the stationary state. Provide an outfile string to save."""
         stationary = chain.stationary_state()
@@ -29,22 +33,34 @@ class MarkovChainPlotter:
         return fig
 
     @staticmethod
+    @instrumented("MarkovChainPlotter.plot_over_time")
     def plot_over_time(
         chain: MarkovChain,
         timesteps: int = 20,
         start_from: int = 0,
         time_between_steps: int = 200,
+        tol: Optional[float] = None,
     ) -> go.Figure:
-        """Plot the markov chain state over a number of steps as an animation"""
-        x = list(range(chain.n_states))
-        frames = []
+        """
+        Plot the markov chain state over a number of steps as an animation.
 
-        for i in range(start_from, timesteps):
-            y = chain.state_at_time(i)
-            frames.append(go.Frame(data=go.Scatter(x=x, y=y, mode="lines")))
+        With tol, the animation stops early once the state changes by less than tol (in total variation) in one step.
+        If that happens before start_from, the converged state is shown as a single frame.
+        """
+        x = list(range(chain.n_states))
+        if tol is None:
+            states = chain.state_at_times(np.arange(start_from, max(timesteps, start_from + 1)))
+        else:
+            evolution = chain.evolve(max(timesteps, start_from + 1) - 1, tol)
+            # Step to start_from, keeping the last state in case the evolution stops first
+            last = None
+            for last in islice(evolution, start_from):
+                pass
+            states = np.array(list(evolution) or [last])
+        frames = [go.Frame(data=go.Scatter(x=x, y=y, mode="lines")) for y in states[: timesteps - start_from]]
 
         fig = go.Figure(
-            data=go.Scatter(x=x, y=chain.state_at_time(start_from), mode="lines"),
+            data=go.Scatter(x=x, y=states[0], mode="lines"),
             layout=go.Layout(
                 xaxis=dict(range=[min(x), max(x)], autorange=False),
                 yaxis=dict(range=[0, 1], autorange=False),
@@ -0,0 +1,102 @@
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import scipy.sparse as sp
+
+
+Matrix = Union[np.ndarray, sp.spmatrix]
+
+ENGINES = ("eig", "matvec", "squaring")
+
+# Rough flop multiplier of a dense non-symmetric eigendecomposition (plus inverse) relative to n**3.
+EIG_COST_FACTOR = 25
+# Condition number of the eigenvector matrix above which the eig engine is not trusted.
+MAX_EIGVEC_CONDITION = 1e8
+
+
+def choose_engine(
+    n_states: int,
+    t: int,
+    nnz: int,
+    sparse: bool = False,
+    decomposed: bool = False,
+    condition_number: Optional[float] = None,
+    cached_powers: int = 1,
+    decomposable: bool = True,
+) -> str:
+    """
+    Pick the cheapest engine to evaluate P^t x from a simple flop model.
+
+    matvec costs t * nnz. squaring costs n**3 for each power P^(2^k) not yet cached (P itself counts as the first)
+    plus n**2 per set bit of t.
+    eig costs EIG_COST_FACTOR * n**3 once plus n**2 per evaluation, and is never chosen for sparse chains, when the
+    eigenvector matrix is ill-conditioned (its inverse is then unreliable) or when the matrix is not decomposable (e.g.
+    np.longdouble). The conditioning is only known once the chain is decomposed, so until then (condition_number is
+    None) eig is not chosen either. Negative or non-integer t can only use eig.
+    """
+    if t < 0 or int(t) != t:
+        return "eig"
+    t = int(t)
+    costs = {"matvec": t * nnz}
+    # Powers of sparse matrices fill in quickly, so cached powers are costed as dense.
+    costs["squaring"] = max(t.bit_length() - cached_powers, 0) * n_states**3 + bin(t).count("1") * n_states**2
+    if not sparse and decomposable and condition_number is not None and condition_number < MAX_EIGVEC_CONDITION:
+        costs["eig"] = (0 if decomposed else EIG_COST_FACTOR * n_states**3) + n_states**2
+    return min(costs, key=costs.get)
+
+
+class MatrixPowerEngine:
+    """
+    Evaluate P^t x without an eigendecomposition.
+
+    step applies P t times with matrix-vector products, which is exact up to rounding and costs O(t * nnz).
+    squaring writes t in binary and applies the cached powers P^(2^k) for each set bit, costing O(log t) matrix
+    products the first time and O(popcount(t) * n**2) once the powers are cached.
+    """
+
+    def __init__(self, matrix: Matrix) -> None:
+        self._matrix = matrix
+        self._powers: List[Matrix] = [matrix]
+
+    @property
+    def cached_powers(self) -> int:
+        """Number of powers P^(2^k) currently cached"""
+        return len(self._powers)
+
+    def power(self, k: int) -> Matrix:
+        """Return P^(2^k), squaring and caching as required"""
+        while len(self._powers) <= k:
+            previous = self._powers[-1]
+            squared = previous @ previous
+            if sp.issparse(squared) and squared.nnz > 0.25 * np.prod(squared.shape):
+                squared = squared.toarray()
+            self._powers.append(squared)
+        return self._powers[k]
+
+    def step(self, state: np.ndarray, t: int) -> np.ndarray:
+        """Apply P t times with repeated matrix-vector products"""
+        for _ in range(t):
+            state = self._matrix @ state
+        return state
+
+    def squaring(self, state: np.ndarray, t: int) -> np.ndarray:
+        """Apply P^t using binary exponentiation"""
+        k = 0
+        while t:
+            if t & 1:
+                state = self.power(k) @ state
+            t >>= 1
+            k += 1
+        return state
+
+    def apply(self, state: np.ndarray, t: int, engine: str = "matvec") -> np.ndarray:
+        """Apply P^t to state with the named engine"""
+        if t < 0 or int(t) != t:
+            raise ValueError("Matrix power engines require a non-negative integer time")
+        if engine == "matvec":
+            return self.step(state, int(t))
+        if engine == "squaring":
+            return self.squaring(state, int(t))
+        raise ValueError(f"Unknown matrix power engine {engine}")
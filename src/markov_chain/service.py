@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from markov_chain.instrumentation import span
+
+
+# Simulations kept built in each process (or each worker of a process pool), least recently used evicted first
+MAX_SIMULATIONS = 16
+
+
+def _encode(value: Any) -> str:
+    # repr elides the middle of large arrays, so arrays are identified by their contents instead
+    if isinstance(value, np.ndarray):
+        return f"ndarray({value.dtype.str}, {value.shape}, {hashlib.sha256(np.ascontiguousarray(value)).hexdigest()})"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({', '.join(_encode(v) for v in value)})"
+    if isinstance(value, dict):
+        return f"dict({', '.join(f'{k!r}: {_encode(v)}' for k, v in sorted(value.items()))})"
+    return repr(value)
+
+
+@dataclass(frozen=True)
+class ChainSpec:
+    """
+    Dataclass describing how to build a simulation: factory(**options).
+
+    factory is anything whose result has state_at_times, e.g. MarkovChain, MonopolyMarkovChain or MonopolyMonteCarlo,
+    and options its keyword arguments, e.g. ChainSpec(MonopolyMonteCarlo, {"num_players": 10**5, "history_size": 0}).
+    Two specs with the same factory and equal options (by repr, or contents for arrays) have the same key and share one
+    simulation. For a process pool, the factory and options must be picklable.
+    """
+
+    factory: Callable[..., Any]
+    options: Mapping[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Identifier of the simulation built, from the factory's qualified name and the options"""
+        name = f"{self.factory.__module__}.{self.factory.__qualname__}"
+        return hashlib.sha256(f"{name}({_encode(dict(self.options))})".encode()).hexdigest()
+
+    def build(self) -> Any:
+        """Build the simulation"""
+        return self.factory(**self.options)
+
+
+class _Entry:
+    __slots__ = ("lock", "simulation")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.simulation: Any = None
+
+
+_simulations: "OrderedDict[str, _Entry]" = OrderedDict()
+_simulations_lock = threading.Lock()
+
+
+def _entry(key: str) -> _Entry:
+    with _simulations_lock:
+        entry = _simulations.get(key)
+        if entry is None:
+            entry = _simulations[key] = _Entry()
+            while len(_simulations) > MAX_SIMULATIONS:
+                _simulations.popitem(last=False)
+        else:
+            _simulations.move_to_end(key)
+        return entry
+
+
+def evaluate(spec: ChainSpec, times: Tuple[float, ...]) -> np.ndarray:
+    """
+    Return the states of the simulation described by spec at each of times, shape (len(times), n_states).
+
+    The simulation is built on first use and kept for later calls in this process, so e.g. an eigendecomposition or
+    the turns a Monte Carlo simulation has played are reused. Calls for the same simulation are serialised, as
+    simulations such as MonopolyMonteCarlo are not thread safe. The returned array is read only, as it may be shared
+    between callers.
+    """
+    entry = _entry(spec.key)
+    with entry.lock, span("EvaluationService.evaluate", factory=spec.factory.__qualname__, n_times=len(times)) as s:
+        s.set(built=entry.simulation is None)
+        if entry.simulation is None:
+            entry.simulation = spec.build()
+        states = np.array(entry.simulation.state_at_times(np.asarray(times)))
+    states.flags.writeable = False
+    return states
+
+
+class EvaluationService:
+    """
+    Evaluates the states of simulations at given times in an executor, sharing identical queries in flight.
+
+    Queries are a ChainSpec and the times wanted. A query identical to one still running (same spec key and times)
+    gets the future of the running one instead of starting another computation, so many dashboard sessions asking for
+    the same chain share one computation. Built simulations are also kept by evaluate, so different times for the same
+    chain reuse it.
+
+    The work runs in executor, by default a ThreadPoolExecutor of max_workers threads: numpy and LAPACK release the
+    GIL, so threads run concurrently without copying results. Pass a ProcessPoolExecutor for pure Python work, in which
+    case each worker process keeps its own simulations.
+
+    submit is thread safe and returns a concurrent.futures.Future, so the service can be shared between threads each
+    running their own event loop (e.g. Streamlit sessions). The asyncio API (states_at_times, state_at_time) awaits
+    it; cancelling an await does not cancel the computation, which other callers may be waiting on.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_workers: Optional[int] = None) -> None:
+        self._owns_executor = executor is None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if executor is None else executor
+        self._in_flight: Dict[Tuple[str, Tuple[float, ...]], Future] = {}
+        self._lock = threading.Lock()
+        # Queries which started a computation, and those which shared one already in flight
+        self.computed = 0
+        self.shared = 0
+
+    def submit(self, spec: ChainSpec, times: npt.ArrayLike) -> Future:
+        """Start (or join, if an identical query is in flight) the evaluation of spec at times"""
+        times = tuple(np.atleast_1d(np.asarray(times)).tolist())
+        key = (spec.key, times)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            future = self._executor.submit(evaluate, spec, times)
+            self._in_flight[key] = future
+            self.computed += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: Tuple[str, Tuple[float, ...]], future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    async def states_at_times(self, spec: ChainSpec, times: npt.ArrayLike) -> np.ndarray:
+        """Return the states of spec at each of times, as a read only array of shape (len(times), n_states)"""
+        return await asyncio.shield(asyncio.wrap_future(self.submit(spec, times)))
+
+    async def state_at_time(self, spec: ChainSpec, t: float) -> np.ndarray:
+        """Return the state of spec at time t, as a read only array"""
+        return (await self.states_at_times(spec, [t]))[0]
+
+    def close(self, wait: bool = True) -> None:
+        """Shut down the executor, if the service created it"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "EvaluationService":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "EvaluationService":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.close(wait=False)
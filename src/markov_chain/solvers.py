@@ -0,0 +1,416 @@
+import warnings
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.linalg as la
+import scipy.sparse as sp
+import scipy.sparse.csgraph as csgraph
+import scipy.sparse.linalg as spla
+
+from markov_chain.matrix_structure import bandwidth
+from markov_chain.matrix_structure import to_banded
+
+
+Matrix = Union[np.ndarray, sp.spmatrix]
+
+# Raised by the solvers which pin a state when the stationary state is not unique
+SINGULAR_SYSTEM = "Stationary system is singular. The chain has multiple closed communicating classes."
+
+
+@dataclass
+class StationaryResult:
+    """Dataclass containing the result of a stationary state solve"""
+
+    state: np.ndarray
+    residual: float
+    iterations: int
+    converged: bool
+
+
+class SolverError(RuntimeError):
+    """Raised when a stationary state solver cannot produce a solution"""
+
+
+def residual(matrix: Matrix, state: np.ndarray) -> float:
+    """Return the L1 norm of P x - x. A (k, n) batch of states gives the total over the batch."""
+    return float(np.abs(matrix @ state.T - state.T).sum())
+
+
+def _normalise(state: np.ndarray) -> np.ndarray:
+    state = np.real(state)
+    total = state.sum()
+    if total == 0 or not np.isfinite(total):
+        raise SolverError("Stationary state solver produced a vector which cannot be normalised")
+    return state / total
+
+
+def _initial_guess(n: int, x0: Optional[npt.ArrayLike]) -> np.ndarray:
+    if x0 is None:
+        return np.full(n, 1.0 / n)
+    x0 = np.array(x0, dtype=float)
+    if x0.shape != (n,):
+        raise ValueError("Initial guess does not match the number of states")
+    return x0 / x0.sum()
+
+
+def power_iteration(
+    matrix: Matrix,
+    tol: float = 1e-10,
+    max_iter: int = 10000,
+    x0: Optional[npt.ArrayLike] = None,
+    lazy: bool = False,
+) -> StationaryResult:
+    """
+    Find the stationary state by repeatedly applying the probability matrix.
+
+    Converges at the rate of the second largest eigenvalue modulus. Periodic chains never converge with the plain
+    iteration; set lazy to iterate with (I + P) / 2 instead, which has the same stationary state.
+    """
+    state = _initial_guess(matrix.shape[0], x0)
+    res = np.inf
+    for iteration in range(1, max_iter + 1):
+        new_state = matrix @ state
+        if lazy:
+            new_state = 0.5 * (new_state + state)
+        new_state = new_state / new_state.sum()
+        res = float(np.abs(new_state - state).sum())
+        state = new_state
+        if res < tol:
+            return StationaryResult(state, residual(matrix, state), iteration, True)
+    return StationaryResult(state, residual(matrix, state), max_iter, False)
+
+
+def arnoldi(
+    matrix: Matrix,
+    tol: float = 1e-10,
+    max_iter: int = 10000,
+    x0: Optional[npt.ArrayLike] = None,
+    sigma: Optional[float] = None,
+) -> StationaryResult:
+    """
+    Find the eigenvector with eigenvalue 1 using the implicitly restarted Arnoldi method (ARPACK).
+
+    Without sigma the eigenvalue with the largest real part is targeted. With sigma, shift-invert mode is used around
+    that value (e.g. sigma=1 + 1e-8), which converges in very few iterations at the cost of one sparse LU. The
+    iteration count reported is the number of operator applications. ARPACK needs more than 2 states, so smaller
+    chains are solved with direct instead.
+    """
+    n = matrix.shape[0]
+    if n <= 2:
+        return direct(np.asarray(matrix @ np.identity(n)), tol=tol)
+    counter = [0]
+    v0 = None if x0 is None else _initial_guess(n, x0)
+
+    if sigma is None:
+
+        def matvec(x: np.ndarray) -> np.ndarray:
+            counter[0] += 1
+            return matrix @ x
+
+        operator = spla.LinearOperator((n, n), matvec=matvec, dtype=float)
+        kwargs = dict(which="LR")
+    else:
+        if isinstance(matrix, spla.LinearOperator):
+            raise ValueError("Shift-invert mode needs a stored probability matrix, not a LinearOperator")
+        shifted = sp.csc_matrix(matrix) - sigma * sp.identity(n, format="csc")
+        lu = spla.splu(shifted)
+
+        def solve(x: np.ndarray) -> np.ndarray:
+            counter[0] += 1
+            return lu.solve(x)
+
+        operator = sp.csc_matrix(matrix)
+        kwargs = dict(sigma=sigma, which="LM", OPinv=spla.LinearOperator((n, n), matvec=solve, dtype=float))
+
+    try:
+        _, vecs = spla.eigs(operator, k=1, tol=tol, maxiter=max_iter, v0=v0, **kwargs)
+        converged = True
+    except spla.ArpackNoConvergence as e:
+        if e.eigenvectors.shape[1] == 0:
+            raise SolverError("Arnoldi iteration found no eigenvectors") from e
+        vecs = e.eigenvectors
+        converged = False
+    state = _normalise(vecs[:, 0])
+    return StationaryResult(state, residual(matrix, state), counter[0], converged)
+
+
+def recurrent_state(matrix: Matrix) -> int:
+    """
+    Return a recurrent state to pin in the stationary system: the last state of the only closed communicating class.
+
+    Raises SolverError if there are several closed classes, as the stationary state is then not unique. The classes
+    are the strongly connected components of the sparsity pattern, found in O(n + nnz). A LinearOperator has no
+    pattern, so its last state is returned.
+    """
+    n = matrix.shape[0]
+    if isinstance(matrix, spla.LinearOperator):
+        return n - 1
+    if sp.issparse(matrix):
+        coo = sp.coo_matrix(matrix)
+        rows, cols = coo.row[coo.data != 0], coo.col[coo.data != 0]
+    else:
+        rows, cols = np.nonzero(np.asarray(matrix))
+    graph = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    n_classes, labels = csgraph.connected_components(graph, directed=True, connection="strong")
+    # An entry P[x, y] is a transition from y to x, which leaves the class of y if x is in another
+    closed = np.ones(n_classes, dtype=bool)
+    closed[labels[cols[labels[rows] != labels[cols]]]] = False
+    if np.count_nonzero(closed) > 1:
+        raise SolverError(SINGULAR_SYSTEM)
+    return int(np.flatnonzero(closed[labels])[-1])
+
+
+def _pinned_system(matrix: Matrix, pinned: Optional[int] = None) -> tuple:
+    """
+    Return (A, b) for the system (P - I)x = 0 with state pinned (by default the last) fixed to 1.
+
+    The equation for the pinned state is redundant and is dropped along with its unknown, giving a square system of
+    size n-1 which is non-singular when the pinned state is recurrent and there is a single closed class (see
+    recurrent_state). Dropping a row and column keeps any band structure. For a LinearOperator, A is a
+    LinearOperator too, applying P to x padded with a zero.
+    """
+    n = matrix.shape[0]
+    pinned = n - 1 if pinned is None else pinned
+    keep = np.delete(np.arange(n), pinned)
+    unit = np.zeros(n)
+    unit[pinned] = 1.0
+    if isinstance(matrix, spla.LinearOperator):
+
+        def apply(x: np.ndarray) -> np.ndarray:
+            padded = np.insert(np.ravel(x), pinned, 0.0)
+            return (matrix @ padded - padded)[keep]
+
+        return spla.LinearOperator((n - 1, n - 1), matvec=apply, dtype=float), -(matrix @ unit - unit)[keep]
+    if sp.issparse(matrix):
+        system = sp.csc_matrix(matrix) - sp.identity(n, format="csc")
+        return system[keep][:, keep].tocsc().sorted_indices(), -system[:, [pinned]].toarray().ravel()[keep]
+    system = np.asarray(matrix) - np.identity(n)
+    if pinned == n - 1:
+        return system[:-1, :-1], -system[:-1, -1]
+    return system[np.ix_(keep, keep)], -system[keep, pinned]
+
+
+def direct(
+    matrix: Matrix, tol: float = 1e-10, max_iter: int = 1, x0: Optional[npt.ArrayLike] = None
+) -> StationaryResult:
+    """
+    Solve (P - I)x = 0 with sum(x) = 1 using an LU factorisation (sparse LU for sparse matrices).
+
+    A recurrent state (see recurrent_state) is pinned to 1 and its equation dropped, which requires the chain to have
+    a single closed communicating class. Transient states are allowed. tol, max_iter and x0 are accepted for a
+    uniform interface.
+    """
+    n = matrix.shape[0]
+    state = np.ones(n)
+    if n > 1:
+        pinned = recurrent_state(matrix)
+        a, b = _pinned_system(matrix, pinned)
+        free = np.arange(n) != pinned
+        try:
+            if sp.issparse(a):
+                state[free] = spla.splu(a).solve(b)
+            else:
+                state[free] = la.solve(a, b)
+        except (RuntimeError, la.LinAlgError) as e:
+            raise SolverError(SINGULAR_SYSTEM) from e
+    state = _normalise(state)
+    res = residual(matrix, state)
+    return StationaryResult(state, res, 1, res < max(tol, 1e-8))
+
+
+def refined(
+    matrix: Matrix, tol: float = 1e-10, max_iter: int = 10, x0: Optional[npt.ArrayLike] = None
+) -> StationaryResult:
+    """
+    Solve the pinned stationary system (see direct) in float64, then improve it by iterative refinement.
+
+    Each step computes the residual b - A x in the precision of matrix, e.g. np.longdouble, which LAPACK and SuperLU
+    cannot factorise, and solves for the correction with the float64 LU factors. The state converges to the precision
+    of matrix provided cond(A) * 1e-16 is well below 1, taking at most max_iter refinement steps, and is returned in
+    that precision. The iteration count reported is the number of refinement steps. x0 is accepted for a uniform
+    interface.
+    """
+    n = matrix.shape[0]
+    dtype = matrix.dtype if np.issubdtype(matrix.dtype, np.floating) else np.dtype(np.float64)
+    state = np.ones(n, dtype=dtype)
+    iteration = 0
+    if n > 1:
+        pinned = recurrent_state(matrix)
+        a, b = _pinned_system(matrix, pinned)
+        try:
+            if sp.issparse(a):
+                # Copied, as SuperLU may sort the indices in place, which a shares with a conversion without a copy
+                solve = spla.splu(sp.csc_matrix(a, dtype=np.float64, copy=True)).solve
+            else:
+                with warnings.catch_warnings():
+                    # Singularity is reported below as a SolverError
+                    warnings.simplefilter("ignore", la.LinAlgWarning)
+                    factors = la.lu_factor(np.asarray(a, dtype=np.float64), check_finite=False)
+                if np.any(np.diagonal(factors[0]) == 0):
+                    raise la.LinAlgError("Singular matrix")
+                solve = partial(la.lu_solve, factors)
+            x = solve(np.asarray(b, dtype=np.float64)).astype(dtype)
+        except (RuntimeError, la.LinAlgError) as e:
+            raise SolverError(SINGULAR_SYSTEM) from e
+        eps = np.finfo(dtype).eps
+        previous_change = np.inf
+        for iteration in range(1, max_iter + 1):
+            correction = solve(np.asarray(b - a @ x, dtype=np.float64))
+            x += correction
+            # Relative to the whole state, including the pinned state
+            change = np.abs(correction).sum() / (1 + np.abs(x).sum())
+            # Stop at the precision of matrix, or once the corrections stop shrinking
+            if change <= n * eps or change > 0.5 * previous_change:
+                break
+            previous_change = change
+        state[np.arange(n) != pinned] = x
+    state = _normalise(state)
+    res = residual(matrix, state)
+    return StationaryResult(state, res, iteration, res < max(tol, 1e-8))
+
+
+def banded(
+    matrix: Matrix, tol: float = 1e-10, max_iter: int = 1, x0: Optional[npt.ArrayLike] = None
+) -> StationaryResult:
+    """
+    Solve the pinned stationary system (see direct) with a banded LU factorisation.
+
+    Dropping the pinned row and column keeps the band, so for a matrix with l sub- and u super-diagonals this costs
+    O(n * l * (l + u)) time and O(n * (2l + u)) memory. tol, max_iter and x0 are accepted for a uniform interface.
+    """
+    n = matrix.shape[0]
+    state = np.ones(n)
+    if n > 1:
+        pinned = recurrent_state(matrix)
+        a, b = _pinned_system(matrix, pinned)
+        lower, upper = bandwidth(a)
+        try:
+            state[np.arange(n) != pinned] = la.solve_banded(
+                (lower, upper), to_banded(a, lower, upper), b, check_finite=False
+            )
+        except la.LinAlgError as e:
+            raise SolverError(SINGULAR_SYSTEM) from e
+    state = _normalise(state)
+    res = residual(matrix, state)
+    return StationaryResult(state, res, 1, res < max(tol, 1e-8))
+
+
+def gmres(
+    matrix: Matrix,
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+    x0: Optional[npt.ArrayLike] = None,
+) -> StationaryResult:
+    """Solve the pinned stationary system (see direct) with restarted GMRES. matrix may be a LinearOperator."""
+    n = matrix.shape[0]
+    if n == 1:
+        return StationaryResult(np.ones(1), 0.0, 0, True)
+    pinned = recurrent_state(matrix)
+    a, b = _pinned_system(matrix, pinned)
+    free = np.arange(n) != pinned
+    guess = None
+    if x0 is not None:
+        guess = _initial_guess(n, x0)
+        guess = guess[free] / guess[pinned] if guess[pinned] > 0 else None
+
+    counter = [0]
+
+    def callback(_: np.ndarray) -> None:
+        counter[0] += 1
+
+    solution, info = spla.gmres(a, b, x0=guess, rtol=tol, maxiter=max_iter, callback=callback, callback_type="pr_norm")
+    state = _normalise(np.insert(solution, pinned, 1.0))
+    return StationaryResult(state, residual(matrix, state), counter[0], info == 0)
+
+
+def _splitting(matrix: Matrix) -> tuple:
+    """Split A = I - P into its diagonal, strictly lower and strictly upper parts"""
+    n = matrix.shape[0]
+    if sp.issparse(matrix):
+        a = (sp.identity(n, format="csr") - sp.csr_matrix(matrix)).tocsr()
+        return a.diagonal(), sp.tril(a, k=-1, format="csr"), sp.triu(a, k=1, format="csr")
+    a = np.identity(n) - np.asarray(matrix)
+    return np.diag(a).copy(), np.tril(a, k=-1), np.triu(a, k=1)
+
+
+def jacobi(
+    matrix: Matrix,
+    tol: float = 1e-10,
+    max_iter: int = 10000,
+    x0: Optional[npt.ArrayLike] = None,
+    omega: float = 1.0,
+) -> StationaryResult:
+    """
+    Solve (I - P)x = 0 with (weighted) Jacobi sweeps, normalising after each sweep.
+
+    Plain Jacobi (omega=1) oscillates on chains whose Jacobi matrix has eigenvalues near -1, such as random walks.
+    Under-relaxation (e.g. omega=0.5) damps this.
+    """
+    diag, lower, upper = _splitting(matrix)
+    if np.any(diag == 0):
+        raise SolverError("Jacobi sweeps require every state to have a self-transition probability below one")
+    state = _initial_guess(matrix.shape[0], x0)
+    res = np.inf
+    for iteration in range(1, max_iter + 1):
+        new_state = _normalise((1 - omega) * state - omega * (lower @ state + upper @ state) / diag)
+        res = float(np.abs(new_state - state).sum())
+        state = new_state
+        if res < tol:
+            return StationaryResult(state, residual(matrix, state), iteration, True)
+    return StationaryResult(state, residual(matrix, state), max_iter, False)
+
+
+def gauss_seidel(
+    matrix: Matrix,
+    tol: float = 1e-10,
+    max_iter: int = 10000,
+    x0: Optional[npt.ArrayLike] = None,
+) -> StationaryResult:
+    """
+    Solve (I - P)x = 0 with Gauss-Seidel sweeps, normalising after each sweep.
+
+    Each sweep is a single triangular solve (D + L)x' = -Ux, so the loop over states runs in compiled code.
+    """
+    diag, lower, upper = _splitting(matrix)
+    if np.any(diag == 0):
+        raise SolverError("Gauss-Seidel sweeps require every state to have a self-transition probability below one")
+    if sp.issparse(matrix):
+        triangle = (lower + sp.diags(diag)).tocsr()
+
+        def solve(rhs: np.ndarray) -> np.ndarray:
+            return spla.spsolve_triangular(triangle, rhs, lower=True)
+
+    else:
+        triangle = lower + np.diag(diag)
+
+        def solve(rhs: np.ndarray) -> np.ndarray:
+            return la.solve_triangular(triangle, rhs, lower=True)
+
+    state = _initial_guess(matrix.shape[0], x0)
+    res = np.inf
+    for iteration in range(1, max_iter + 1):
+        new_state = _normalise(solve(-(upper @ state)))
+        res = float(np.abs(new_state - state).sum())
+        state = new_state
+        if res < tol:
+            return StationaryResult(state, residual(matrix, state), iteration, True)
+    return StationaryResult(state, residual(matrix, state), max_iter, False)
+
+
+SOLVERS: Dict[str, Callable[..., StationaryResult]] = {
+    "power": power_iteration,
+    "arnoldi": arnoldi,
+    "direct": direct,
+    "refined": refined,
+    "banded": banded,
+    "gmres": gmres,
+    "jacobi": jacobi,
+    "gauss_seidel": gauss_seidel,
+}
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import struct
+
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+
+MAGIC = b"MKVCHAIN"
+FORMAT_VERSION = 1
+# Magic, format version and metadata length
+_HEADER = struct.Struct("<8sIQ")
+# Arrays start on multiples of this many bytes, so memory-mapped arrays are aligned for vectorised reads
+ALIGNMENT = 64
+
+
+class StorageError(ValueError):
+    """Raised when a file is not a valid chain file, or its checksum does not match"""
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _checksum(arrays: Dict[str, np.ndarray]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        digest.update(name.encode())
+        digest.update(memoryview(np.ascontiguousarray(arrays[name])).cast("B"))
+    return digest.hexdigest()
+
+
+def write_arrays(path: Union[str, Path], arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+    """
+    Write named arrays and JSON-serialisable metadata to a single binary file.
+
+    The file is a fixed header (magic, format version and metadata length), the metadata as JSON, and the raw array
+    bytes, each aligned to ALIGNMENT bytes. The metadata records the dtype, shape and offset of every array and a
+    SHA-256 checksum of their contents. The file is written to a temporary name and renamed, so readers never see a
+    partial file.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {name: {"dtype": array.dtype.str, "shape": list(array.shape)} for name, array in arrays.items()}
+    metadata = dict(metadata, arrays=layout, sha256=_checksum(arrays))
+
+    # The offsets depend on the metadata length, which depends on the offsets: reserve space for the largest offsets
+    for entry in layout.values():
+        entry["offset"] = 0
+    reserve = len(json.dumps(metadata)) + 20 * (len(layout) + 1)
+    offset = _aligned(_HEADER.size + reserve)
+    for name, array in arrays.items():
+        layout[name]["offset"] = offset
+        offset = _aligned(offset + array.nbytes)
+    encoded = json.dumps(metadata).encode()
+    encoded += b" " * (reserve - len(encoded))
+
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+            f.write(encoded)
+            for name, array in arrays.items():
+                f.seek(layout[name]["offset"])
+                f.write(memoryview(array).cast("B"))
+            f.truncate(offset)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def read_arrays(path: Union[str, Path], verify: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Read a file written by write_arrays, returning (arrays, metadata).
+
+    The arrays are read only views of a single memory map of the file, so opening is O(1) in the array sizes: pages
+    are read on first access and shared through the page cache by every process that maps the same file. verify
+    reads every array to check the checksum, raising StorageError on a mismatch; skip it for fast opens of trusted
+    files.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise StorageError(f"{path} is not a chain file")
+        magic, version, length = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise StorageError(f"{path} is not a chain file")
+        if version > FORMAT_VERSION:
+            raise StorageError(f"{path} has format version {version}, newer than the supported {FORMAT_VERSION}")
+        metadata = json.loads(f.read(length).decode())
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, entry in metadata["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        size = int(np.prod(entry["shape"])) * dtype.itemsize
+        start = entry["offset"]
+        if start + size > len(mapped):
+            raise StorageError(f"{path} is truncated")
+        arrays[name] = mapped[start : start + size].view(dtype).reshape(entry["shape"])
+    if verify and _checksum(arrays) != metadata["sha256"]:
+        raise StorageError(f"{path} is corrupt: checksum does not match")
+    return arrays, metadata
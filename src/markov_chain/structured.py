@@ -0,0 +1,284 @@
+from math import gcd
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from markov_chain.absorbing import AbsorptionResult
+from markov_chain.absorbing import absorption_analysis
+from markov_chain.cache import DecompositionCache
+from markov_chain.chain import MATRIX_FREE_METHODS
+from markov_chain.chain import MarkovChain
+from markov_chain.classes import CommunicatingClass
+from markov_chain.classes import communicating_classes
+from markov_chain.matrix_structure import bandwidth
+from markov_chain.matrix_structure import circulant_column
+from markov_chain.precision import error_bound
+from markov_chain.solvers import StationaryResult
+from markov_chain.solvers import residual
+
+
+class BandedMarkovChain(MarkovChain):
+    """
+    MarkovChain whose probability matrix only has entries within a band around the diagonal, e.g. gambler's ruin.
+
+    The matrix is stored by diagonals (scipy.sparse DIA format), so memory is O(n * bandwidth) and each step of the
+    matrix power engines is O(n * bandwidth). The stationary state defaults to the "banded" solver, a LAPACK banded LU.
+    """
+
+    def __init__(
+        self,
+        probability_matrix: Union[npt.ArrayLike, sp.spmatrix],
+        initial_state: Optional[npt.ArrayLike] = None,
+        **kwargs,
+    ) -> None:
+        if not sp.issparse(probability_matrix):
+            probability_matrix = sp.dia_matrix(np.asarray(probability_matrix, dtype=float))
+        super().__init__(probability_matrix, initial_state, **kwargs)
+        self.lower, self.upper = bandwidth(self._probability_matrix)
+
+    @classmethod
+    def from_diagonals(
+        cls,
+        diagonals: npt.ArrayLike,
+        offsets: npt.ArrayLike,
+        initial_state: Optional[npt.ArrayLike] = None,
+        n_states: Optional[int] = None,
+        **kwargs,
+    ) -> "BandedMarkovChain":
+        """
+        Build the chain from its diagonals without forming the matrix, as scipy.sparse.diags.
+
+        As there, offset k holds the elements (i, i + k), i.e. the transitions from state j to state j - k.
+        """
+        return cls(
+            sp.diags(diagonals, offsets, shape=None if n_states is None else (n_states, n_states)),
+            initial_state,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _to_sparse_storage(probability_matrix: sp.spmatrix, dtype: npt.DTypeLike) -> sp.spmatrix:
+        return sp.dia_matrix(probability_matrix, dtype=dtype)
+
+    def _default_stationary_method(self) -> str:
+        # Updated and np.longdouble chains keep the base class's choice, only the plain LU solve is replaced
+        method = super()._default_stationary_method()
+        return "banded" if method == "direct" else method
+
+
+class CirculantMarkovChain(MarkovChain):
+    """
+    MarkovChain whose probability matrix is circulant: every state moves by the same random offset modulo n.
+
+    Only the first column c is stored, where c[k] is the probability of moving from state j to state (j + k) mod n.
+    Applying the matrix is a circular convolution, so with the FFT eigenvalues f = fft(c) the state at any integer time
+    is ifft(f**t * fft(x)): O(n log n) regardless of t. The stationary state of an irreducible circulant chain is
+    uniform.
+
+    The probability matrix is a LinearOperator, so the stationary methods are limited to those needing only products
+    with it (MATRIX_FREE_METHODS). Methods which need the matrix itself (communicating_classes, absorption and
+    update) form it sparsely with to_sparse, with n * (number of non-zero offsets) entries.
+
+    The MarkovChain keyword arguments are accepted so that the chain can be built in its place, e.g. by load. cache is
+    kept although the FFT needs no decomposition; engine and dtype only accept the values the FFT uses ("auto" or
+    "fft", and float64) and raise ValueError otherwise.
+    """
+
+    _stationary_methods = MATRIX_FREE_METHODS
+
+    def __init__(
+        self,
+        column: npt.ArrayLike,
+        initial_state: Optional[npt.ArrayLike] = None,
+        engine: str = "fft",
+        cache: Optional[DecompositionCache] = None,
+        dtype: Optional[npt.DTypeLike] = None,
+    ) -> None:
+        if engine not in ("auto", "fft"):
+            raise ValueError(f"Circulant chains always use the fft engine, not {engine}")
+        if dtype is not None and np.dtype(dtype) != np.float64:
+            raise ValueError(f"Circulant chains are evaluated in float64, not {np.dtype(dtype)}")
+        # The matrix is never formed, so MarkovChain.__init__ is replaced by _init_attributes
+        self._init_attributes("fft", cache)
+        column = np.array(column, dtype=float)
+        if column.ndim != 1 or len(column) == 0:
+            raise ValueError("Circulant chains are defined by a non-empty one dimensional column")
+        if not np.isclose(column.sum(), 1) or np.any(column < 0):
+            raise ValueError("Circulant column is not a probability distribution")
+        self._column = column
+        self._fft_eigenvalues = np.fft.fft(column)
+        self.n_states = len(column)
+        self._sparse = True
+        n = self.n_states
+        self._probability_matrix = spla.LinearOperator((n, n), matvec=self._apply, matmat=self._apply, dtype=float)
+        self._initial_state = self._validate_initial_state(initial_state)
+
+    @classmethod
+    def from_matrix(
+        cls,
+        probability_matrix: Union[npt.ArrayLike, sp.spmatrix],
+        initial_state: Optional[npt.ArrayLike] = None,
+        **kwargs,
+    ) -> "CirculantMarkovChain":
+        """Build the chain from a full matrix, raising ValueError if it is not circulant"""
+        column = circulant_column(probability_matrix)
+        if column is None:
+            raise ValueError("Matrix supplied is not circulant")
+        return cls(column, initial_state, **kwargs)
+
+    @classmethod
+    def _from_chain(cls, chain: MarkovChain) -> "CirculantMarkovChain":
+        return cls.from_matrix(chain._probability_matrix, chain._initial_state)
+
+    @classmethod
+    def from_coo(cls, *args, **kwargs) -> "CirculantMarkovChain":
+        """As MarkovChain.from_coo, raising ValueError if the matrix is not circulant"""
+        return cls._from_chain(MarkovChain.from_coo(*args, **kwargs))
+
+    @classmethod
+    def from_npy(cls, *args, **kwargs) -> "CirculantMarkovChain":
+        """As MarkovChain.from_npy, raising ValueError if the matrix is not circulant. Only the column is kept."""
+        return cls._from_chain(MarkovChain.from_npy(*args, **kwargs))
+
+    @classmethod
+    def from_buffer(cls, *args, **kwargs) -> "CirculantMarkovChain":
+        """As MarkovChain.from_buffer, raising ValueError if the matrix is not circulant. Only the column is kept."""
+        return cls._from_chain(MarkovChain.from_buffer(*args, **kwargs))
+
+    def _storage_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        return {"column": self._column}, {"format": "circulant"}
+
+    @classmethod
+    def _from_storage(
+        cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any], initial_state: Optional[np.ndarray], **kwargs
+    ) -> "CirculantMarkovChain":
+        if metadata["format"] != "circulant":
+            raise ValueError(f"File holds a {metadata['format']} chain: load it with MarkovChain.load")
+        return cls(arrays["column"], initial_state, **kwargs)
+
+    def to_sparse(self) -> sp.csc_matrix:
+        """Form the probability matrix, with an entry for every state and non-zero offset"""
+        n = self.n_states
+        offsets = np.flatnonzero(self._column)
+        cols = np.tile(np.arange(n), len(offsets))
+        rows = (cols + np.repeat(offsets, n)) % n
+        return sp.csc_matrix((np.repeat(self._column[offsets], n), (rows, cols)), shape=(n, n))
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Floating point type used to propagate states"""
+        return np.dtype(np.float64)
+
+    def _apply(self, x: np.ndarray, t: int = 1) -> np.ndarray:
+        """Apply P^t to the columns of x"""
+        eigenvalues = self._fft_eigenvalues**t
+        if x.ndim == 2:
+            eigenvalues = eigenvalues[:, None]
+        return np.real(np.fft.ifft(eigenvalues * np.fft.fft(x, axis=0), axis=0))
+
+    def state_at_time(self, t: int, engine: Optional[str] = None) -> np.ndarray:
+        """Get the state at time t. engine is ignored: the FFT is always used."""
+        return self.state_at_times(np.array([t]))[0]
+
+    def state_at_times(self, ts: npt.ArrayLike, engine: Optional[str] = None) -> np.ndarray:
+        """Get the states at each time in ts in O(len(ts) * n log n). engine is ignored: the FFT is always used."""
+        if self._initial_state is None:
+            raise RuntimeError("Cannot calculate state at specific time without an initial state")
+        ts = np.asarray(ts)
+        if ts.ndim != 1:
+            raise ValueError("Times must be a one dimensional array")
+        if np.any(ts < 0) or np.any(ts != np.round(ts)):
+            raise ValueError("Circulant chains require non-negative integer times")
+        transformed = np.fft.fft(self._initial_state, axis=-1)
+        powers = np.expand_dims(self._fft_eigenvalues ** ts.astype(int)[:, None], tuple(range(1, transformed.ndim)))
+        return np.real(np.fft.ifft(powers * transformed, axis=-1))
+
+    def error_bound(self, t: float, engine: Optional[str] = None) -> float:
+        """Estimate the worst case rounding error (L1 norm) of state_at_time(t). engine is ignored: the FFT is used."""
+        return error_bound("fft", self.n_states, t, self.dtype)
+
+    def communicating_classes(self) -> List[CommunicatingClass]:
+        """Return the communicating classes: the residues modulo the gcd of n and the offsets, all of them closed"""
+        return communicating_classes(self.to_sparse())
+
+    @property
+    def is_irreducible(self) -> bool:
+        """Whether every state can reach every other, i.e. the gcd of the possible offsets and n is 1"""
+        divisor = self.n_states
+        for offset in np.flatnonzero(self._column):
+            divisor = gcd(divisor, int(offset))
+        return divisor == 1
+
+    def solve_stationary(
+        self, method: Optional[str] = None, tol: float = 1e-10, max_iter: int = 10000, **kwargs
+    ) -> StationaryResult:
+        """
+        Calculate the stationary state.
+
+        The default method returns the uniform distribution for irreducible chains. Solvers which only need
+        matrix-vector products ("power", "arnoldi" or "gmres") can also be selected; any other method raises
+        ValueError.
+        """
+        if method is not None:
+            return super().solve_stationary(method, tol=tol, max_iter=max_iter, **kwargs)
+        if not self.is_irreducible:
+            raise RuntimeError(
+                "Multiple stationary states found. "
+                "Circulant chain is not irreducible, so the stationary state depends on the initial state."
+            )
+        state = np.full(self.n_states, 1.0 / self.n_states)
+        return StationaryResult(self._broadcast_to_batch(state), residual(self._probability_matrix, state), 0, True)
+
+    def update(self, *args, **kwargs) -> MarkovChain:
+        """
+        Return a chain with a changed probability matrix, as MarkovChain.update.
+
+        Changing columns generally breaks the circulant structure, so the result is a sparse MarkovChain built from
+        to_sparse. For a different circulant chain, build a new CirculantMarkovChain instead.
+        """
+        return MarkovChain(self.to_sparse(), self._initial_state).update(*args, **kwargs)
+
+    def absorbing_states(self) -> np.ndarray:
+        """Return the indices of the absorbing states: all of them if the chain never moves, otherwise none"""
+        if np.isclose(self._column[0], 1):
+            return np.arange(self.n_states)
+        return np.zeros(0, dtype=int)
+
+    def absorption(self) -> AbsorptionResult:
+        """
+        Absorption analysis, see MarkovChain.absorption. Circulant chains are absorbing everywhere (they never move)
+        or nowhere, in which case RuntimeError is raised.
+        """
+        return absorption_analysis(self.to_sparse())
+
+
+def structured_chain(
+    probability_matrix: Union[npt.ArrayLike, sp.spmatrix],
+    initial_state: Optional[npt.ArrayLike] = None,
+    max_band_fraction: float = 0.25,
+) -> MarkovChain:
+    """
+    Build the most efficient MarkovChain for the structure of probability_matrix.
+
+    Circulant matrices give a CirculantMarkovChain, matrices whose band (lower + upper + 1 diagonals) covers at most
+    max_band_fraction of the columns give a BandedMarkovChain, and anything else a plain MarkovChain.
+    """
+    if not sp.issparse(probability_matrix):
+        probability_matrix = np.asarray(probability_matrix, dtype=float)
+    n = probability_matrix.shape[0]
+    if len(probability_matrix.shape) == 2 and n > 1 and probability_matrix.shape[1] == n:
+        column = circulant_column(probability_matrix)
+        if column is not None:
+            return CirculantMarkovChain(column, initial_state)
+        lower, upper = bandwidth(probability_matrix)
+        if lower + upper + 1 <= max_band_fraction * n:
+            return BandedMarkovChain(probability_matrix, initial_state)
+    return MarkovChain(probability_matrix, initial_state)
@@ -1,6 +1,12 @@
 import unittest
 
+from dataclasses import replace
+
+import numpy as np
+
+from markov_chain.examples.monopoly.chain import MonopolyMarkovChain
 from markov_chain.examples.monopoly.chain import dice_roll_prob
+from markov_chain.examples.monopoly.utils import DefaultMonopolySettings
 
 
 class TestDiceRollProb(unittest.TestCase):
@@ -27,3 +33,27 @@ class TestDiceRollProb(unittest.TestCase):
         self.assertEqual(dice_roll_prob(1), 0)
         self.assertEqual(dice_roll_prob(13), 0)
         self.assertEqual(dice_roll_prob(20), 0)
+
+
+class TestMonopolyMarkovChain(unittest.TestCase):
+    def test_default_settings(self):
+        chain = MonopolyMarkovChain()
+        self.assertEqual(chain.prob_matrix.shape, (40, 40))
+        np.testing.assert_array_almost_equal(chain.prob_matrix.sum(axis=0), np.ones(40))
+        # Nobody ever ends a turn on go to jail
+        np.testing.assert_array_equal(chain.prob_matrix[30], np.zeros(40))
+
+    def test_without_special_squares(self):
+        settings = replace(
+            DefaultMonopolySettings, three_doubles_jail=False, chance_locs=[], go_to_jail=None, board_size=12
+        )
+        chain = MonopolyMarkovChain(settings)
+        # Every square moves by a dice roll modulo the board size
+        for square in range(12):
+            for roll in range(2, 13):
+                self.assertAlmostEqual(chain.prob_matrix[(square + roll) % 12, square], dice_roll_prob(roll))
+
+    def test_three_doubles(self):
+        with_doubles = MonopolyMarkovChain().prob_matrix
+        without_doubles = MonopolyMarkovChain(replace(DefaultMonopolySettings, three_doubles_jail=False)).prob_matrix
+        self.assertGreater(with_doubles[10, 0], without_doubles[10, 0])
@@ -0,0 +1,51 @@
+import unittest
+
+from dataclasses import replace
+
+import numpy as np
+
+from markov_chain.examples.monopoly.chain import dice_roll_prob
+from markov_chain.examples.monopoly.expanded import ExpandedMonopolyMarkovChain
+from markov_chain.examples.monopoly.expanded import chance_block
+from markov_chain.examples.monopoly.monte_carlo import MonopolyMonteCarlo
+from markov_chain.examples.monopoly.utils import DefaultMonopolySettings
+
+
+class TestExpandedMonopolyMarkovChain(unittest.TestCase):
+    def test_matrix(self):
+        for jail_turns in [0, 2]:
+            chain = ExpandedMonopolyMarkovChain(replace(DefaultMonopolySettings, jail_turns=jail_turns))
+            self.assertEqual(chain.n_states, 120 + 3 * jail_turns)
+            np.testing.assert_array_almost_equal(chain.prob_matrix.sum(axis=0).A1, np.ones(chain.n_states))
+
+    def test_three_doubles(self):
+        settings = replace(DefaultMonopolySettings, chance_locs=[], go_to_jail=None)
+        chain = ExpandedMonopolyMarkovChain(settings)
+        # Jail can only be reached in two turns by rolls summing to 10, and in three turns also by three doubles
+        jail_after_two = chain.state_at_time(2)[10]
+        self.assertAlmostEqual(jail_after_two, sum(dice_roll_prob(n) * dice_roll_prob(10 - n) for n in range(2, 9)))
+        no_doubles_rule = ExpandedMonopolyMarkovChain(replace(settings, three_doubles_jail=False))
+        self.assertAlmostEqual(chain.state_at_time(3)[10] - no_doubles_rule.state_at_time(3)[10], 1 / 216, delta=1e-3)
+
+    def test_agrees_with_monte_carlo(self):
+        for jail_turns in [0, 2]:
+            settings = replace(DefaultMonopolySettings, jail_turns=jail_turns)
+            chain = ExpandedMonopolyMarkovChain(settings)
+            mc = MonopolyMonteCarlo(settings, num_players=100000, history_size=0, rng=np.random.default_rng(0))
+            times = np.arange(12)
+            expected = chain.state_at_times(times)
+            self.assertEqual(expected.shape, (12, 40))
+            sigma = np.sqrt(expected * (1 - expected) / 100000)
+            np.testing.assert_array_less(np.abs(mc.state_at_times(times) - expected), 5 * sigma + 1e-12)
+
+    def test_stationary(self):
+        stationary = ExpandedMonopolyMarkovChain().stationary_state()
+        self.assertAlmostEqual(stationary.sum(), 1.0)
+        self.assertEqual(stationary[30], 0.0)
+        self.assertEqual(stationary.argmax(), 10)
+
+    def test_blocks_are_cached(self):
+        chance_block.cache_clear()
+        ExpandedMonopolyMarkovChain()
+        ExpandedMonopolyMarkovChain(replace(DefaultMonopolySettings, three_doubles_jail=False))
+        self.assertEqual(chance_block.cache_info().misses, 1)
@@ -0,0 +1,69 @@
+import unittest
+
+from unittest import mock
+
+import numpy as np
+
+from markov_chain.examples.monopoly import monte_carlo
+from markov_chain.examples.monopoly.monte_carlo import MonopolyMonteCarlo
+from markov_chain.examples.monopoly.utils import DefaultMonopolySettings
+
+
+class TestMonopolyMonteCarlo(unittest.TestCase):
+    def test_state_is_distribution(self):
+        np.random.seed(0)
+        mc = MonopolyMonteCarlo(DefaultMonopolySettings, num_players=1000)
+        state = mc.state_at_time(5)
+        self.assertEqual(state.shape, (40,))
+        self.assertAlmostEqual(state.sum(), 1.0)
+        self.assertEqual(state[30], 0.0)
+        self.assertEqual(mc.game_states.shape, (6, 1000))
+        np.testing.assert_array_equal(mc.state_at_time(0), np.eye(40)[0])
+
+    def test_history_modes_agree(self):
+        results = []
+        for history_size in [None, 3, 0]:
+            np.random.seed(1)
+            mc = MonopolyMonteCarlo(DefaultMonopolySettings, num_players=500, history_size=history_size)
+            results.append(np.array(list(mc.stream(20))))
+            if history_size == 3:
+                self.assertEqual(mc.game_states.shape, (3, 500))
+                np.testing.assert_array_equal(mc.game_states[-1], mc.position)
+            if history_size == 0:
+                with self.assertRaises(RuntimeError):
+                    mc.game_states
+        np.testing.assert_array_equal(results[0], results[1])
+        np.testing.assert_array_equal(results[0], results[2])
+
+    def test_three_doubles_jail(self):
+        mc = MonopolyMonteCarlo(DefaultMonopolySettings, num_players=1)
+        mc._doubles[:] = 0b111
+        np.testing.assert_array_equal(mc.replacements(np.array([5])), [10])
+        mc._doubles[:] = 0b011
+        np.testing.assert_array_equal(mc.replacements(np.array([5])), [5])
+
+    def test_recent_doubles_order(self):
+        mc = MonopolyMonteCarlo(DefaultMonopolySettings, num_players=2)
+        self.assertEqual(mc.recent_doubles.shape, (0, 2))
+        mc.n_turns = 2
+        mc._doubles[:] = [0b01, 0b10]
+        np.testing.assert_array_equal(mc.recent_doubles, [[False, True], [True, False]])
+        mc.n_turns = 5
+        mc._doubles[:] = [0b110, 0b011]
+        np.testing.assert_array_equal(mc.recent_doubles, [[True, False], [True, True], [False, True]])
+
+    def test_compact_state(self):
+        mc = MonopolyMonteCarlo(
+            DefaultMonopolySettings, num_players=1000, history_size=2, rng=np.random.default_rng(0)
+        )
+        mc.state_at_time(10)
+        self.assertEqual(mc.position.dtype, np.uint8)
+        self.assertEqual(mc.game_states.dtype, np.uint8)
+        self.assertEqual(mc.position.nbytes + mc._doubles.nbytes + mc.jail_turns_left.nbytes, 2000)
+        np.testing.assert_array_equal(mc.occupancy[-1], np.bincount(mc.position, minlength=40))
+
+    def test_chunked_histogram(self):
+        mc = MonopolyMonteCarlo(DefaultMonopolySettings, num_players=1000, rng=np.random.default_rng(0))
+        mc.state_at_time(3)
+        with mock.patch.object(monte_carlo, "HISTOGRAM_CHUNK", 64):
+            np.testing.assert_array_equal(mc._histogram(mc.position), mc.occupancy[-1])
@@ -0,0 +1,23 @@
+import unittest
+
+import numpy as np
+
+from markov_chain.examples.monopoly.parallel import ParallelMonopolyMonteCarlo
+from markov_chain.examples.monopoly.utils import DefaultMonopolySettings
+
+
+class TestParallelMonopolyMonteCarlo(unittest.TestCase):
+    def test_independent_of_workers(self):
+        kwargs = dict(settings=DefaultMonopolySettings, num_players=1000, seed=42, shard_size=300)
+        serial = ParallelMonopolyMonteCarlo(max_workers=1, **kwargs).state_at_times(range(10))
+        parallel = ParallelMonopolyMonteCarlo(max_workers=2, **kwargs).state_at_times(range(10))
+        np.testing.assert_array_equal(serial, parallel)
+        self.assertAlmostEqual(serial[9].sum(), 1.0)
+
+    def test_replay_extends_consistently(self):
+        sim = ParallelMonopolyMonteCarlo(DefaultMonopolySettings, num_players=200, shard_size=64, max_workers=1)
+        self.assertEqual(sim.shard_players, [50, 50, 50, 50])
+        early = sim.state_at_time(3)
+        later = sim.state_at_times([3, 12])
+        np.testing.assert_array_equal(early, later[0])
+        self.assertEqual(sim.occupancy[0, 0], 200)
@@ -1,7 +1,10 @@
 import unittest
 
+import numpy as np
+
 from markov_chain.chain import MarkovChain
 from markov_chain.examples.gamblers_ruin import gamblers_ruin
+from markov_chain.structured import BandedMarkovChain
 
 
 class TestGamblersRuin(unittest.TestCase):
@@ -19,8 +22,37 @@ class TestGamblersRuin(unittest.TestCase):
         result = gamblers_ruin(initial_position=50, prob_up=0.7, upper_limit=100, lower_limit=10)
         self.assertIsInstance(result, MarkovChain)
         self.assertAlmostEqual(result.n_states, 91)
-        self.assertTrue(result._initial_state[50])
+        self.assertEqual(result._initial_state[40], 1.0)
+        self.assertEqual(result._initial_state.sum(), 1.0)
         self.assertAlmostEqual(result._probability_matrix[0][0], 1.0)
         self.assertAlmostEqual(result._probability_matrix[90][90], 1.0)
         self.assertAlmostEqual(result._probability_matrix[41][40], 0.7)
         self.assertAlmostEqual(result._probability_matrix[39][40], 0.3)
+
+    def test_banded(self):
+        result = gamblers_ruin(initial_position=500000, upper_limit=1000000, banded=True)
+        self.assertIsInstance(result, BandedMarkovChain)
+        self.assertEqual(result.n_states, 1000001)
+        self.assertEqual((result.lower, result.upper), (1, 1))
+        np.testing.assert_array_equal(result.absorbing_states(), [0, 1000000])
+
+    def test_banded_matches_dense(self):
+        dense = gamblers_ruin(initial_position=5, prob_up=0.3, upper_limit=10)
+        banded = gamblers_ruin(initial_position=5, prob_up=0.3, upper_limit=10, banded=True)
+        np.testing.assert_array_equal(banded._probability_matrix.toarray(), dense._probability_matrix)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            gamblers_ruin(prob_up=1.5)
+        with self.assertRaises(ValueError):
+            gamblers_ruin(upper_limit=0)
+        for initial_position in [-1, 9, 31]:
+            with self.assertRaises(ValueError):
+                gamblers_ruin(initial_position=initial_position, lower_limit=10, upper_limit=30)
+
+    def test_offset_limits(self):
+        result = gamblers_ruin(initial_position=150, lower_limit=100, upper_limit=200, banded=True)
+        self.assertEqual(result._initial_state[50], 1.0)
+        result = gamblers_ruin(initial_position=20, lower_limit=10, upper_limit=30)
+        self.assertEqual(result._initial_state[10], 1.0)
+        np.testing.assert_array_almost_equal(result.absorption().probabilities[:, 10], [0.5, 0.5])
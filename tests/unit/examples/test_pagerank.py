@@ -0,0 +1,106 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.pagerank import PageRank
+from markov_chain.examples.pagerank import read_edge_list
+
+
+SOURCES = np.array([0, 0, 1, 2, 2, 3, 4])
+TARGETS = np.array([1, 2, 2, 0, 3, 3, 0])
+
+
+def google_matrix(n, damping, personalisation):
+    """Dense Google matrix of the test graph, in which node 5 is dangling"""
+    links = np.zeros((n, n))
+    np.add.at(links, (TARGETS, SOURCES), 1.0)
+    out_degree = links.sum(axis=0)
+    links[:, out_degree == 0] = personalisation[:, None]
+    links /= links.sum(axis=0)
+    return damping * links + (1 - damping) * personalisation[:, None]
+
+
+class TestPageRank(unittest.TestCase):
+    def test_matches_dense_google_matrix(self):
+        personalisation = np.array([0.5, 0.1, 0.1, 0.1, 0.1, 0.1])
+        reference = MarkovChain(google_matrix(6, 0.85, personalisation), personalisation)
+        pagerank = PageRank(SOURCES, TARGETS, n_nodes=6, personalisation=personalisation)
+        result = pagerank.solve_stationary(tol=1e-12)
+        self.assertTrue(result.converged)
+        np.testing.assert_array_almost_equal(result.state, reference.stationary_state())
+        np.testing.assert_array_almost_equal(pagerank.state_at_time(3), reference.state_at_time(3))
+        np.testing.assert_array_almost_equal(pagerank.stationary_state("arnoldi"), result.state)
+
+    def test_personalisation_batch(self):
+        personalisations = np.eye(6)[[0, 3, 5]]
+        batch = PageRank(SOURCES, TARGETS, n_nodes=6, personalisation=personalisations).stationary_state()
+        self.assertEqual(batch.shape, (3, 6))
+        for state, personalisation in zip(batch, personalisations):
+            single = PageRank(SOURCES, TARGETS, n_nodes=6, personalisation=personalisation).stationary_state()
+            np.testing.assert_array_almost_equal(state, single)
+
+    def test_matrix_free_methods(self):
+        pagerank = PageRank(SOURCES, TARGETS, n_nodes=6)
+        expected = pagerank.stationary_state(tol=1e-12)
+        self.assertEqual(pagerank.decomposition, "complex")
+        np.testing.assert_array_almost_equal(pagerank.stationary_state("gmres"), expected)
+        for method in ["direct", "classes", "eig", "banded"]:
+            with self.assertRaisesRegex(ValueError, "power, arnoldi, gmres"):
+                pagerank.stationary_state(method)
+        self.assertTrue(pagerank.is_irreducible)
+        with self.assertRaises(ValueError):
+            PageRank(SOURCES, TARGETS, n_nodes=6, damping=1.0).is_irreducible
+        with self.assertRaises(ValueError):
+            pagerank.communicating_classes()
+        with self.assertRaises(ValueError):
+            pagerank.update(columns=[0], new_columns=np.eye(6)[:, [1]])
+        with self.assertRaises(ValueError):
+            pagerank.absorption()
+
+    def test_save_load(self):
+        personalisation = np.array([0.5, 0.1, 0.1, 0.1, 0.1, 0.1])
+        pagerank = PageRank(SOURCES, TARGETS, n_nodes=6, damping=0.7, personalisation=personalisation)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "pagerank.bin"
+            pagerank.save(path, with_stationary=True)
+            loaded = PageRank.load(path)
+            np.testing.assert_array_almost_equal(loaded.stationary_state(), pagerank.stationary_state())
+            self.assertEqual(loaded.damping, 0.7)
+            np.testing.assert_array_almost_equal(loaded.links.toarray(), pagerank.links.toarray())
+            np.testing.assert_array_almost_equal(loaded.state_at_time(4), pagerank.state_at_time(4))
+            with self.assertRaises(ValueError):
+                MarkovChain.load(path)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            PageRank(SOURCES, TARGETS, damping=1.5)
+        with self.assertRaises(ValueError):
+            PageRank(SOURCES, TARGETS[:-1])
+        with self.assertRaises(ValueError):
+            PageRank(SOURCES, TARGETS, personalisation=np.zeros(5))
+
+
+class TestReadEdgeList(unittest.TestCase):
+    def test_formats(self):
+        edges = np.stack([SOURCES, TARGETS], axis=1)
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            np.savetxt(directory / "edges.csv", edges, fmt="%d", delimiter=",", header="source,target")
+            np.savetxt(directory / "edges.txt", edges, fmt="%d")
+            np.save(directory / "edges.npy", edges)
+            edges.astype(np.int32).tofile(directory / "edges.bin")
+            for name, kwargs in [
+                ("edges.csv", {"delimiter": ",", "chunk_rows": 3}),
+                ("edges.txt", {}),
+                ("edges.npy", {}),
+                ("edges.bin", {"dtype": np.int32}),
+            ]:
+                sources, targets = read_edge_list(directory / name, **kwargs)
+                np.testing.assert_array_equal(sources, SOURCES, err_msg=name)
+                np.testing.assert_array_equal(targets, TARGETS, err_msg=name)
+            pagerank = PageRank.from_edge_list(directory / "edges.csv", delimiter=",")
+            self.assertEqual(pagerank.n_states, 5)
@@ -0,0 +1,61 @@
+import unittest
+
+from unittest import mock
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain import absorbing
+from markov_chain.absorbing import absorption_analysis
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.gamblers_ruin import gamblers_ruin
+
+
+class TestAbsorption(unittest.TestCase):
+    def test_fair_gamblers_ruin(self):
+        result = gamblers_ruin(initial_position=5, upper_limit=10).absorption()
+        positions = np.arange(11)
+        np.testing.assert_array_equal(result.absorbing_states, [0, 10])
+        np.testing.assert_array_almost_equal(result.probabilities[0], 1 - positions / 10)
+        np.testing.assert_array_almost_equal(result.probabilities[1], positions / 10)
+        np.testing.assert_array_almost_equal(result.expected_steps, positions * (10 - positions))
+        # Variance of the duration of a fair game: k(M - k)(k^2 + (M - k)^2 - 2) / 3
+        k, m = positions, 10
+        np.testing.assert_array_almost_equal(result.variance_steps, k * (m - k) * (k**2 + (m - k) ** 2 - 2) / 3)
+
+    def test_biased_sparse_matches_dense(self):
+        dense = gamblers_ruin(initial_position=5, upper_limit=20, prob_up=0.6)._probability_matrix
+        result = absorption_analysis(sp.csr_matrix(dense))
+        reference = absorption_analysis(dense)
+        np.testing.assert_array_almost_equal(result.probabilities, reference.probabilities)
+        np.testing.assert_array_almost_equal(result.variance_steps, reference.variance_steps)
+        ratio = 0.4 / 0.6
+        expected_ruin = (ratio**5 - ratio**20) / (1 - ratio**20)
+        self.assertAlmostEqual(result.probabilities[0, 5], expected_ruin)
+
+    def test_banded_dense_chain_is_solved_banded(self):
+        chain = gamblers_ruin(initial_position=50, upper_limit=100, prob_up=0.6)
+        with mock.patch.object(absorbing.la, "lu_factor") as lu_factor:
+            result = chain.absorption()
+        lu_factor.assert_not_called()
+        reference = gamblers_ruin(initial_position=50, upper_limit=100, prob_up=0.6, banded=True).absorption()
+        np.testing.assert_array_almost_equal(result.probabilities, reference.probabilities)
+        np.testing.assert_array_almost_equal(result.expected_steps, reference.expected_steps)
+
+    def test_general_factorisations_agree(self):
+        matrix = np.random.default_rng(0).random((30, 30))
+        matrix[:, :2] = 0.0
+        matrix[[0, 1], [0, 1]] = 1.0
+        matrix /= matrix.sum(axis=0)
+        reference = absorption_analysis(matrix)
+        for threshold in [0.0, 1.0]:
+            with mock.patch.object(absorbing, "DENSE_FACTOR_THRESHOLD", threshold):
+                result = absorption_analysis(sp.csc_matrix(matrix))
+            np.testing.assert_array_almost_equal(result.probabilities, reference.probabilities)
+            np.testing.assert_array_almost_equal(result.variance_steps, reference.variance_steps)
+
+    def test_errors(self):
+        with self.assertRaises(RuntimeError):
+            MarkovChain([[0.9, 0.5], [0.1, 0.5]]).absorption()
+        with self.assertRaises(RuntimeError):
+            MarkovChain([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 0.0]]).absorption()
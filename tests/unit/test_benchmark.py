@@ -0,0 +1,83 @@
+import io
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from markov_chain.benchmark import BENCHMARKS
+from markov_chain.benchmark import Measurement
+from markov_chain.benchmark import compare
+from markov_chain.benchmark import load_results
+from markov_chain.benchmark import main
+from markov_chain.benchmark import measure
+from markov_chain.benchmark import run_benchmarks
+from markov_chain.benchmark import save_results
+from markov_chain.benchmark import track
+
+
+TINY_SWEEP = {"n": (10,), "t": (5,), "players": (100,)}
+
+
+class TestMeasure(unittest.TestCase):
+    def test_track(self):
+        with track() as usage:
+            array = np.ones(10**6)
+            del array
+        self.assertGreaterEqual(usage.peak_bytes, 8 * 10**6)
+        self.assertGreater(usage.seconds, 0)
+        with track(memory=False) as usage:
+            np.ones(10**6)
+        self.assertEqual(usage.peak_bytes, 0)
+
+    def test_measure_calls_setup_every_run(self):
+        prepared = []
+        times, peak_bytes = measure(prepared.append, setup=lambda: len(prepared), repeats=3)
+        self.assertEqual(len(times), 3)
+        self.assertEqual(prepared, [0, 1, 2, 3])
+        self.assertGreaterEqual(peak_bytes, 0)
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_every_benchmark_runs(self):
+        measurements = run_benchmarks(sweep=TINY_SWEEP, repeats=1)
+        self.assertEqual({m.name for m in measurements}, set(BENCHMARKS))
+        keys = [m.key for m in measurements]
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertIn("state_at_time[engine=squaring,n=10,t=5]", keys)
+        with self.assertRaises(ValueError):
+            run_benchmarks(["magic"], sweep=TINY_SWEEP)
+
+    def test_compare(self):
+        baseline = [Measurement("a", {"n": 1}, [0.1], 2**30), Measurement("b", {}, [1e-5], 10)]
+        current = [
+            Measurement("a", {"n": 1}, [0.2, 0.3], 2**30),
+            Measurement("b", {}, [1e-4], 1000),
+            Measurement("c", {}, [1.0], 10),
+        ]
+        regressions = compare(current, baseline)
+        self.assertEqual([(r.key, r.metric) for r in regressions], [("a[n=1]", "seconds")])
+        self.assertAlmostEqual(regressions[0].ratio, 2.0)
+        self.assertEqual(compare(current, baseline, tolerance=2.5), [])
+
+    def test_cli_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "results.json"
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(main(["gamblers_ruin", "--repeats", "1", "--output", str(path)]), 0)
+            self.assertIn("gamblers_ruin[banded=True,n=80]", output.getvalue())
+            self.assertEqual(len(load_results(path)), 4)
+
+            # Rewrite the results as a baseline which no run can match
+            measurements = load_results(path)
+            for m in measurements:
+                m.times = [1e-9]
+            save_results(measurements, path)
+            with redirect_stdout(io.StringIO()) as output, mock.patch(
+                "markov_chain.benchmark.MIN_COMPARABLE_SECONDS", 0
+            ):
+                self.assertEqual(main(["gamblers_ruin", "--repeats", "1", "--baseline", str(path)]), 1)
+            self.assertIn("REGRESSION", output.getvalue())
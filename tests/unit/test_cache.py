@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.cache import CachedDecomposition
+from markov_chain.cache import DecompositionCache
+from markov_chain.cache import matrix_key
+from markov_chain.chain import MarkovChain
+
+
+MATRIX = [[0.9, 0.5], [0.1, 0.5]]
+
+
+def entry(n):
+    return CachedDecomposition(np.ones(n), np.eye(n), np.eye(n), 1.0)
+
+
+class TestMatrixKey(unittest.TestCase):
+    def test_key(self):
+        self.assertEqual(matrix_key(np.array(MATRIX)), matrix_key(np.array(MATRIX)))
+        self.assertNotEqual(matrix_key(np.array(MATRIX)), matrix_key(np.array(MATRIX), algorithm="eig"))
+        self.assertNotEqual(matrix_key(np.array(MATRIX)), matrix_key(np.array(MATRIX).T))
+        self.assertEqual(matrix_key(sp.csr_matrix(MATRIX)), matrix_key(sp.csc_matrix(MATRIX)))
+
+
+class TestDecompositionCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = DecompositionCache(max_bytes=2 * entry(4).nbytes)
+        for key in "abc":
+            cache.put(key, entry(4))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+        cache.put("d", entry(4))
+        self.assertIsNotNone(cache.get("b"))
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_chains_share_decomposition(self):
+        cache = DecompositionCache()
+        first = MarkovChain(MATRIX, [0.2, 0.8], cache=cache)
+        expected = first.state_at_time(2, engine="eig")
+        second = MarkovChain(MATRIX, [0.2, 0.8], cache=cache)
+        np.testing.assert_array_almost_equal(second.state_at_time(2, engine="eig"), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            MarkovChain(MATRIX, cache=DecompositionCache(directory=directory)).stationary_state()
+            cache = DecompositionCache(directory=directory)
+            chain = MarkovChain(MATRIX, [0.2, 0.8], cache=cache)
+            np.testing.assert_array_almost_equal(chain.state_at_time(2, engine="eig"), [0.732, 0.268])
+            self.assertEqual(cache.hits, 1)
+            self.assertIsInstance(chain._evaluation.eigenvectors, np.memmap)
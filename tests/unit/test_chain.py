@@ -1,8 +1,14 @@
+import os
+import tempfile
 import unittest
 
+from unittest import mock
+
 import numpy as np
+import scipy.sparse as sp
 
 from markov_chain.chain import MarkovChain
+from markov_chain.chain import total_variation
 
 
 class TestMarkovChain(unittest.TestCase):
@@ -28,3 +34,99 @@ class TestMarkovChain(unittest.TestCase):
         mc = MarkovChain([[0.9, 0.5], [0.1, 0.5]], [0.2, 0.8])
         stationary_state = mc.stationary_state()
         np.testing.assert_array_almost_equal(stationary_state, np.array([5 / 6, 1 / 6]))
+
+    def test_sparse_matches_dense(self):
+        dense = [[0.9, 0.5], [0.1, 0.5]]
+        mc = MarkovChain(sp.csr_matrix(dense), [0.2, 0.8])
+        self.assertTrue(mc.is_sparse)
+        np.testing.assert_array_almost_equal(mc.state_at_time(2), np.array([0.732, 0.268]))
+        np.testing.assert_array_almost_equal(mc.stationary_state(), np.array([5 / 6, 1 / 6]))
+
+    def test_from_coo(self):
+        mc = MarkovChain.from_coo([0, 1, 0, 1], [0, 0, 1, 1], [0.9, 0.1, 0.5, 0.5], initial_state=[0.2, 0.8])
+        self.assertEqual(mc.n_states, 2)
+        np.testing.assert_array_almost_equal(mc.stationary_state(), np.array([5 / 6, 1 / 6]))
+        with self.assertRaises(ValueError):
+            MarkovChain.from_coo([0, 1], [0, 0], [0.9, 0.2])
+
+    def test_state_at_times(self):
+        mc = MarkovChain([[0.9, 0.5], [0.1, 0.5]], [0.2, 0.8])
+        times = [5, 0, 2]
+        expected = np.array([mc.state_at_time(t, engine="eig") for t in times])
+        for engine in ["eig", "matvec", "squaring"]:
+            np.testing.assert_array_almost_equal(mc.state_at_times(times, engine=engine), expected)
+        self.assertEqual(mc.state_at_times([]).shape, (0, 2))
+
+    def test_trajectory(self):
+        mc = MarkovChain([[0.9, 0.5], [0.1, 0.5]], [0.2, 0.8])
+        states = np.array(list(mc.trajectory(4)))
+        np.testing.assert_array_almost_equal(states, mc.state_at_times(range(5)))
+
+    def test_evolve(self):
+        mc = MarkovChain([[0.9, 0.5], [0.1, 0.5]], [[0.0, 1.0], [0.5, 0.5]])
+        np.testing.assert_array_almost_equal(np.array(list(mc.evolve(4))), mc.state_at_times(range(5)))
+        # The second eigenvalue is 0.4, so the distance from [0, 1] to the stationary state is 5/6 * 0.4**t
+        stationary = [5 / 6, 1 / 6]
+        states = list(mc.evolve(tol=1e-3, stationary=stationary))
+        self.assertEqual(len(states), 9)
+        self.assertTrue(np.all(total_variation(states[-1], stationary) < 1e-3))
+        self.assertTrue(np.any(total_variation(states[-2], stationary) >= 1e-3))
+        # Successive states differ by 5/6 * 0.6 * 0.4**(t - 1)
+        self.assertEqual(len(list(mc.evolve(tol=1e-3))), 9)
+        self.assertEqual(len(list(mc.evolve(3, tol=1e-3))), 4)
+
+    def test_mixing_time(self):
+        mc = MarkovChain([[0.9, 0.5], [0.1, 0.5]], [0.0, 1.0])
+        self.assertEqual(mc.mixing_time(), 2)
+        self.assertEqual(mc.mixing_time(5 / 6 * 0.4**5 + 1e-12), 5)
+        self.assertEqual(MarkovChain([[0.9, 0.5], [0.1, 0.5]], [5 / 6, 1 / 6]).mixing_time(), 0)
+        with self.assertRaises(RuntimeError):
+            MarkovChain([[0.0, 1.0], [1.0, 0.0]], [1.0, 0.0]).mixing_time(t_max=100, stationary=[0.5, 0.5])
+
+    def test_batched_initial_states(self):
+        matrix = [[0.9, 0.5], [0.1, 0.5]]
+        initial_states = np.array([[0.2, 0.8], [1.0, 0.0], [0.0, 1.0]])
+        mc = MarkovChain(matrix, initial_states)
+        self.assertEqual(mc.batch_size, 3)
+        for engine in ["eig", "matvec", "squaring"]:
+            expected = np.array([MarkovChain(matrix, s).state_at_time(2) for s in initial_states])
+            np.testing.assert_array_almost_equal(mc.state_at_time(2, engine=engine), expected)
+            self.assertEqual(mc.state_at_times([0, 1, 2], engine=engine).shape, (3, 3, 2))
+        np.testing.assert_array_almost_equal(mc.stationary_state(), np.tile([5 / 6, 1 / 6], (3, 1)))
+        with self.assertRaises(ValueError):
+            MarkovChain(matrix, [[0.2, 0.8], [0.5, 0.6]])
+
+    def test_batched_multiple_stationary_states(self):
+        matrix = [[1.0, 0.5, 0.0], [0.0, 0.0, 0.0], [0.0, 0.5, 1.0]]
+        mc = MarkovChain(matrix, [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]])
+        np.testing.assert_array_almost_equal(mc.stationary_state(), [[0.5, 0.0, 0.5], [1.0, 0.0, 0.0]])
+
+    def test_from_npy_is_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "matrix.npy")
+            np.save(path, np.array([[0.9, 0.5], [0.1, 0.5]]))
+            mc = MarkovChain.from_npy(path, [0.2, 0.8])
+            self.assertFalse(mc._probability_matrix.flags.owndata)
+            np.testing.assert_array_almost_equal(mc.state_at_time(2), np.array([0.732, 0.268]))
+            del mc
+
+    def test_from_buffer(self):
+        buffer = np.array([[0.9, 0.5], [0.1, 0.5]]).tobytes()
+        mc = MarkovChain.from_buffer(buffer, 2, [0.2, 0.8])
+        self.assertFalse(mc._probability_matrix.flags.owndata)
+        np.testing.assert_array_almost_equal(mc.stationary_state(), np.array([5 / 6, 1 / 6]))
+
+    def test_float32(self):
+        mc = MarkovChain([[0.9, 0.5], [0.1, 0.5]], [0.2, 0.8], dtype=np.float32)
+        self.assertEqual(mc.dtype, np.float32)
+        state = mc.state_at_time(2, engine="matvec")
+        self.assertEqual(state.dtype, np.float32)
+        np.testing.assert_array_almost_equal(state, np.array([0.732, 0.268]), decimal=6)
+
+    def test_chunked_validation(self):
+        matrix = np.full((7, 7), 1 / 7)
+        with mock.patch("markov_chain.chain.VALIDATION_CHUNK_BYTES", 16):
+            np.testing.assert_array_almost_equal(MarkovChain._column_totals(matrix), np.ones(7))
+            matrix[3, 5] = 0.5
+            with self.assertRaises(ValueError):
+                MarkovChain(matrix)
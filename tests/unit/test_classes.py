@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.classes import communicating_classes
+
+
+def reducible_chain():
+    """
+    States 0 and 1 swap (a closed class of period 2), 2 to 4 form an aperiodic closed class and 5 and 6 are transient.
+    """
+    matrix = np.zeros((7, 7))
+    matrix[1, 0] = matrix[0, 1] = 1.0
+    matrix[2:5, 2:5] = [[0.5, 0.2, 0.3], [0.25, 0.4, 0.3], [0.25, 0.4, 0.4]]
+    matrix[[0, 5, 6], 5] = [0.3, 0.2, 0.5]
+    matrix[[3, 5], 6] = [0.6, 0.4]
+    return matrix
+
+
+class TestCommunicatingClasses(unittest.TestCase):
+    def test_classes(self):
+        for matrix in [reducible_chain(), sp.csr_matrix(reducible_chain())]:
+            classes = communicating_classes(matrix)
+            self.assertEqual([c.states.tolist() for c in classes], [[0, 1], [2, 3, 4], [5, 6]])
+            self.assertEqual([c.closed for c in classes], [True, True, False])
+            self.assertEqual([c.period for c in classes], [2, 1, 1])
+
+    def test_periodic_cycle(self):
+        cycle = np.roll(np.identity(6), 1, axis=0)
+        classes = MarkovChain(cycle).communicating_classes()
+        self.assertEqual(len(classes), 1)
+        self.assertEqual(classes[0].period, 6)
+        self.assertTrue(MarkovChain(cycle).is_irreducible)
+
+    def test_transient_state_without_return(self):
+        matrix = np.array([[1.0, 1.0], [0.0, 0.0]])
+        classes = communicating_classes(matrix)
+        self.assertEqual([(c.closed, c.period) for c in classes], [(True, 1), (False, 0)])
+
+
+class TestClassesStationary(unittest.TestCase):
+    def test_matches_eig(self):
+        initial = np.array([[0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0], [0.1, 0.1, 0.2, 0.1, 0.1, 0.2, 0.2]])
+        reference = MarkovChain(reducible_chain(), initial).stationary_state()
+        for matrix in [reducible_chain(), sp.csc_matrix(reducible_chain())]:
+            for class_method in ["direct", "eig" if not sp.issparse(matrix) else "gmres"]:
+                result = MarkovChain(matrix, initial).solve_stationary(
+                    "classes", class_method=class_method, max_workers=2
+                )
+                self.assertTrue(result.converged)
+                np.testing.assert_array_almost_equal(result.state, reference, err_msg=class_method)
+
+    def test_single_closed_class_needs_no_initial_state(self):
+        matrix = reducible_chain()[2:, 2:]
+        matrix[0, 3] += 0.3
+        state = MarkovChain(matrix).stationary_state("classes")
+        np.testing.assert_array_equal(state[3:], 0.0)
+        np.testing.assert_array_almost_equal(state[:3], MarkovChain(matrix[:3, :3]).stationary_state())
+
+    def test_multiple_closed_classes_need_initial_state(self):
+        with self.assertRaises(RuntimeError):
+            MarkovChain(reducible_chain()).stationary_state("classes")
+
+    def test_block_diagonal(self):
+        blocks = [np.random.default_rng(seed).random((50, 50)) for seed in range(4)]
+        matrix = sp.block_diag([block / block.sum(axis=0) for block in blocks], format="csc")
+        initial = np.full(200, 1 / 200)
+        state = MarkovChain(matrix, initial).stationary_state("classes", max_workers=4)
+        for i, block in enumerate(blocks):
+            expected = MarkovChain(block / block.sum(axis=0)).stationary_state() / 4
+            np.testing.assert_array_almost_equal(state[50 * i : 50 * (i + 1)], expected)
+
+    def test_default_falls_back_to_classes(self):
+        initial = np.array([0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0])
+        reference = MarkovChain(reducible_chain(), initial).stationary_state()
+        chain = MarkovChain(sp.csc_matrix(reducible_chain()), initial)
+        np.testing.assert_array_almost_equal(chain.stationary_state(), reference)
+        with self.assertRaises(RuntimeError):
+            chain.stationary_state("direct")
+        with self.assertRaisesRegex(RuntimeError, "Initial state required"):
+            MarkovChain(sp.csc_matrix(reducible_chain())).stationary_state()
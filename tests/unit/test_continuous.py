@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.continuous import ContinuousMarkovChain
+
+
+def queue_generator(n, arrival=1.0, service=1.5):
+    """Generator of an M/M/1 queue with capacity n - 1, in the column convention"""
+    generator = sp.diags([np.full(n - 1, service), np.full(n - 1, arrival)], [1, -1]).tolil()
+    generator.setdiag(-np.asarray(generator.sum(axis=0)).ravel())
+    return generator.tocsc()
+
+
+class TestContinuousMarkovChain(unittest.TestCase):
+    def test_two_states(self):
+        a, b = 2.0, 0.5
+        chain = ContinuousMarkovChain([[-a, b], [a, -b]], [1.0, 0.0])
+        stationary = np.array([b, a]) / (a + b)
+        ts = np.array([0.0, 0.3, 1.0, 4.0])
+        expected = stationary + np.outer(np.exp(-(a + b) * ts), [1.0, 0.0] - stationary)
+        for method in ["uniformisation", "expm_multiply"]:
+            np.testing.assert_array_almost_equal(chain.state_at_times(ts, method=method), expected, err_msg=method)
+        np.testing.assert_array_almost_equal(chain.stationary_state(), stationary)
+
+    def test_methods_agree_with_expm(self):
+        generator = queue_generator(50)
+        initial = np.eye(50)[[0, 10]]
+        chain = ContinuousMarkovChain(generator, initial)
+        ts = np.array([5.0, 0.5, 2.0])
+        expected = np.array([initial @ la.expm(generator.toarray() * t).T for t in ts])
+        for method in [None, "uniformisation", "expm_multiply"]:
+            states = chain.state_at_times(ts, method=method)
+            self.assertEqual(states.shape, (3, 2, 50))
+            np.testing.assert_array_almost_equal(states, expected, err_msg=method)
+
+    def test_stationary_solvers(self):
+        chain = ContinuousMarkovChain(queue_generator(30))
+        # Detailed balance of the queue: pi[i + 1] / pi[i] = arrival / service
+        expected = (1 / 1.5) ** np.arange(30)
+        expected /= expected.sum()
+        for method in ["direct", "power", "gauss_seidel"]:
+            np.testing.assert_array_almost_equal(chain.stationary_state(method, tol=1e-13), expected, err_msg=method)
+        self.assertIsInstance(chain.uniformised_chain(), MarkovChain)
+
+    def test_row_convention(self):
+        generator = queue_generator(10).toarray()
+        by_rows = ContinuousMarkovChain(generator.T, np.eye(10)[0], convention="rows")
+        by_columns = ContinuousMarkovChain(generator, np.eye(10)[0])
+        np.testing.assert_array_almost_equal(by_rows.state_at_time(1.5), by_columns.state_at_time(1.5))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ContinuousMarkovChain([[-1.0, 1.0], [1.0, -2.0]])
+        with self.assertRaises(ValueError):
+            ContinuousMarkovChain([[1.0, -1.0], [-1.0, 1.0]])
+        with self.assertRaises(ValueError):
+            ContinuousMarkovChain([[-1.0, 1.0], [1.0, -1.0]], convention="diagonal")
+        with self.assertRaises(ValueError):
+            ContinuousMarkovChain([[-1.0, 1.0], [1.0, -1.0]], [1.0, 0.0]).state_at_time(-1.0)
+        with self.assertRaisesRegex(ValueError, "number of states"):
+            ContinuousMarkovChain([[-1.0, 1.0], [1.0, -1.0]], [1.0, 0.0, 0.0])
+        with self.assertRaisesRegex(ValueError, "sum to one"):
+            ContinuousMarkovChain([[-1.0, 1.0], [1.0, -1.0]], [0.5, 0.2])
+        self.assertEqual(ContinuousMarkovChain([[-1.0, 1.0], [1.0, -1.0]], [1, 0]).state_at_time(0.0).dtype, float)
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.incremental import StationaryUpdater
+from markov_chain.incremental import changed_columns
+from markov_chain.incremental import replace_columns
+from markov_chain.instrumentation import instrument
+from markov_chain.solvers import direct
+from markov_chain.structured import BandedMarkovChain
+
+
+def random_chain(n, seed=0):
+    matrix = np.random.default_rng(seed).random((n, n))
+    return matrix / matrix.sum(axis=0)
+
+
+class TestColumns(unittest.TestCase):
+    def test_replace_and_detect(self):
+        matrix = random_chain(6)
+        new_columns = random_chain(6, seed=1)[:, :2]
+        for sparse in [False, True]:
+            base = sp.csc_matrix(matrix) if sparse else matrix
+            replaced = replace_columns(base, [4, 1], new_columns)
+            dense = replaced.toarray() if sparse else replaced
+            np.testing.assert_array_equal(dense[:, [4, 1]], new_columns)
+            np.testing.assert_array_equal(dense[:, [0, 2, 3, 5]], matrix[:, [0, 2, 3, 5]])
+            np.testing.assert_array_equal(changed_columns(base, replaced), [1, 4])
+
+
+class TestStationaryUpdater(unittest.TestCase):
+    def test_woodbury_matches_direct(self):
+        matrix = random_chain(40)
+        for sparse in [False, True]:
+            updater = StationaryUpdater(sp.csc_matrix(matrix) if sparse else matrix)
+            # The last column only changes the right hand side
+            for columns in [[3], [0, 7, 21], [5, 39]]:
+                new = replace_columns(matrix, columns, random_chain(40, seed=2)[:, : len(columns)])
+                new = sp.csc_matrix(new) if sparse else new
+                result = updater.solve(new)
+                self.assertTrue(result.converged)
+                np.testing.assert_array_almost_equal(result.state, direct(new).state)
+
+    def test_transient_last_state(self):
+        matrix = np.array([[0.5, 0.5, 0.5], [0.5, 0.5, 0.25], [0.0, 0.0, 0.25]])
+        for sparse in [False, True]:
+            updater = StationaryUpdater(sp.csc_matrix(matrix) if sparse else matrix)
+            cases = [
+                ([2], [[0.3], [0.2], [0.5]]),
+                ([0], [[0.3], [0.7], [0.0]]),
+                # Makes the pinned state 1 transient, so the updated system is singular
+                ([0, 1], [[1.0, 1.0], [0.0, 0.0], [0.0, 0.0]]),
+            ]
+            for columns, new_columns in cases:
+                new = replace_columns(matrix, columns, np.asarray(new_columns))
+                new = sp.csc_matrix(new) if sparse else new
+                result = updater.solve(new)
+                self.assertTrue(result.converged)
+                np.testing.assert_array_almost_equal(result.state, direct(new).state)
+
+    def test_warm_start(self):
+        matrix = random_chain(30)
+        updater = StationaryUpdater(matrix, max_rank=2)
+        new = 0.9 * matrix + 0.1 * random_chain(30, seed=3)
+        result = updater.solve(new)
+        self.assertTrue(result.converged)
+        np.testing.assert_array_almost_equal(result.state, direct(new).state)
+
+
+class TestChainUpdate(unittest.TestCase):
+    def test_update_columns(self):
+        chain = MarkovChain(random_chain(20), np.eye(20)[0])
+        updated = chain.update(columns=[2, 5], new_columns=random_chain(20, seed=4)[:, :2])
+        again = updated.update(columns=[11], new_columns=random_chain(20, seed=5)[:, :1])
+        for result in [updated, again]:
+            reference = MarkovChain(result._probability_matrix, np.eye(20)[0])
+            np.testing.assert_array_almost_equal(result.stationary_state(), reference.stationary_state())
+            np.testing.assert_array_almost_equal(result.state_at_time(3), reference.state_at_time(3))
+        self.assertIs(again._updater, chain._updater)
+        np.testing.assert_array_equal(again._changed_columns, [2, 5, 11])
+
+    def test_update_matrix(self):
+        n = 20000
+        base = sp.diags([np.full(n - 1, 0.4), np.full(n, 0.2), np.full(n - 1, 0.4)], [1, 0, -1]).tolil()
+        base[0, 0] = base[n - 1, n - 1] = 0.6
+        chain = MarkovChain(base.tocsc())
+        chain.stationary_state("incremental")
+        changed = base.copy()
+        changed[:3, 100] = np.array([[0.5], [0.25], [0.25]])
+        changed[99:102, 100] = 0
+        updated = chain.update(changed.tocsc())
+        np.testing.assert_array_equal(updated._changed_columns, [100])
+        result = updated.solve_stationary()
+        self.assertTrue(result.converged)
+        np.testing.assert_array_almost_equal(result.state, direct(updated._probability_matrix).state)
+
+    def test_update_banded(self):
+        n = 50
+        matrix = np.zeros((n, n))
+        matrix[np.minimum(np.arange(n) + 1, n - 1), np.arange(n)] += 0.6
+        matrix[np.maximum(np.arange(n) - 1, 0), np.arange(n)] += 0.4
+        new_column = np.zeros((n, 1))
+        new_column[[9, 10, 11], 0] = [0.2, 0.3, 0.5]
+        chain = BandedMarkovChain(matrix, np.eye(n)[0])
+        updated = chain.update(columns=[10], new_columns=new_column)
+        self.assertIsInstance(updated, BandedMarkovChain)
+        self.assertEqual(updated._default_stationary_method(), "incremental")
+        with instrument() as recorder:
+            state = updated.stationary_state()
+        self.assertEqual(
+            [event.attributes["method"] for event in recorder.named("MarkovChain.solve_stationary")], ["incremental"]
+        )
+        matrix[:, 10] = new_column[:, 0]
+        np.testing.assert_array_almost_equal(state, MarkovChain(matrix).stationary_state())
+
+    def test_invalid(self):
+        chain = MarkovChain(random_chain(5))
+        with self.assertRaises(ValueError):
+            chain.update()
+        with self.assertRaises(ValueError):
+            chain.update(columns=[1])
@@ -0,0 +1,90 @@
+import logging
+import unittest
+
+import numpy as np
+
+from markov_chain.cache import DecompositionCache
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.monopoly.monte_carlo import MonopolyMonteCarlo
+from markov_chain.instrumentation import LoggingSink
+from markov_chain.instrumentation import add_sink
+from markov_chain.instrumentation import enabled
+from markov_chain.instrumentation import instrument
+from markov_chain.instrumentation import instrumented
+from markov_chain.instrumentation import remove_sink
+from markov_chain.instrumentation import span
+from markov_chain.plot_chain import MarkovChainPlotter
+
+
+MATRIX = [[0.9, 0.5], [0.1, 0.5]]
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_off_by_default(self):
+        self.assertFalse(enabled())
+        with span("nothing", n_states=2) as s:
+            s.set(iterations=3)
+
+        calls = []
+        add_sink(calls.append)
+        try:
+            self.assertTrue(enabled())
+            with span("something", n_states=2) as s:
+                s.set(iterations=3)
+        finally:
+            remove_sink(calls.append)
+        self.assertFalse(enabled())
+        self.assertEqual([(e.name, e.attributes) for e in calls], [("something", {"n_states": 2, "iterations": 3})])
+
+    def test_chain_events(self):
+        cache = DecompositionCache()
+        with instrument() as recorder:
+            chain = MarkovChain(MATRIX, [0.2, 0.8], cache=cache)
+            chain.state_at_time(3, engine="eig")
+            MarkovChain(MATRIX, [0.2, 0.8], cache=cache).state_at_time(3, engine="eig")
+            chain.state_at_time(3, engine="matvec")
+            chain.state_at_times([1, 2], engine="squaring")
+            chain.stationary_state("power")
+        evaluations = recorder.named("MarkovChain.evaluate")
+        self.assertEqual([e.attributes["cache_hit"] for e in evaluations], [False, True])
+        self.assertGreaterEqual(evaluations[0].attributes["condition_number"], 1.0)
+        self.assertEqual(len(recorder.named("MarkovChain.eigendecomposition")), 1)
+        self.assertEqual(len(recorder.named("MarkovChain.inversion")), 1)
+        steps = recorder.named("MarkovChain.state_at_time")
+        self.assertEqual(
+            [(e.attributes["engine"], e.attributes["t"]) for e in steps], [("eig", 3)] * 2 + [("matvec", 3)]
+        )
+        self.assertEqual(recorder.named("MarkovChain.state_at_times")[0].attributes["n_times"], 2)
+        (stationary,) = recorder.named("MarkovChain.solve_stationary")
+        self.assertEqual(stationary.attributes["method"], "power")
+        self.assertGreater(stationary.attributes["iterations"], 1)
+        self.assertTrue(stationary.attributes["converged"])
+        summary = recorder.summary()
+        self.assertEqual(summary["MarkovChain.state_at_time"].count, 3)
+        self.assertFalse(enabled())
+
+    def test_errors_are_recorded(self):
+        with instrument() as recorder:
+            with self.assertRaises(RuntimeError):
+                MarkovChain(MATRIX).stationary_state("power", tol=1e-14, max_iter=2)
+            with self.assertRaises(ValueError):
+                MarkovChain(MATRIX).stationary_state("magic")
+        self.assertEqual([e.error for e in recorder.named("MarkovChain.solve_stationary")], [None, "ValueError"])
+
+    def test_simulators_and_plots(self):
+        with instrument() as recorder:
+            MonopolyMonteCarlo(num_players=10, history_size=0, rng=np.random.default_rng(0)).state_at_time(5)
+            MarkovChainPlotter.plot_over_time(MarkovChain(MATRIX, [0.2, 0.8]), timesteps=3)
+        self.assertEqual(len(recorder.named("MonopolyMonteCarlo.advance")), 5)
+        self.assertEqual(len(recorder.named("MarkovChainPlotter.plot_over_time")), 1)
+
+    def test_logging_sink(self):
+        @instrumented("double")
+        def double(x):
+            return 2 * x
+
+        with self.assertLogs("markov_chain", level=logging.DEBUG) as logs:
+            with instrument(LoggingSink()):
+                self.assertEqual(double(2), 4)
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(logs.output[0].startswith("DEBUG:markov_chain:double"))
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.gamblers_ruin import gamblers_ruin
+from markov_chain.examples.pagerank import PageRank
+from markov_chain.monte_carlo import MarkovChainSampler
+from markov_chain.structured import CirculantMarkovChain
+
+
+class LargestDraws:
+    """Stand in for a Generator whose uniform draws are all the largest float64 below 1"""
+
+    def random(self, size):
+        return np.full(size, np.nextafter(1.0, 0.0))
+
+
+class TestMarkovChainSampler(unittest.TestCase):
+    def test_occupancy_matches_analytic(self):
+        chain = gamblers_ruin(initial_position=5, upper_limit=10, prob_up=0.4)
+        sampler = MarkovChainSampler(chain, rng=np.random.default_rng(0))
+        occupancy = sampler.occupancy(n_walkers=20000, n_steps=15)
+        np.testing.assert_allclose(occupancy, chain.state_at_times(range(16)), atol=0.02)
+
+    def test_sparse_paths(self):
+        matrix = sp.csr_matrix([[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        sampler = MarkovChainSampler(MarkovChain(matrix), rng=np.random.default_rng(0))
+        paths = sampler.sample_paths(n_walkers=3, n_steps=4, initial=0)
+        np.testing.assert_array_equal(paths[:, 0], [0, 1, 2, 0, 1])
+        with self.assertRaises(RuntimeError):
+            sampler.occupancy(10, 2)
+
+    def test_absorbing_states_stay(self):
+        chain = MarkovChain(sp.identity(1000, format="csc"))
+        for rng in [LargestDraws(), np.random.default_rng(2)]:
+            sampler = MarkovChainSampler(chain, rng=rng)
+            states = np.arange(1000)
+            np.testing.assert_array_equal(sampler.step(states), states)
+        paths = MarkovChainSampler(gamblers_ruin(), rng=LargestDraws()).sample_paths(3, 5, initial=0)
+        np.testing.assert_array_equal(paths, 0)
+
+    def test_matrix_free_chains(self):
+        sampler = MarkovChainSampler(CirculantMarkovChain([0.0, 1.0, 0.0, 0.0]), rng=np.random.default_rng(0))
+        np.testing.assert_array_equal(sampler.sample_paths(n_walkers=2, n_steps=4, initial=1)[:, 0], [1, 2, 3, 0, 1])
+        with self.assertRaisesRegex(ValueError, "PageRank"):
+            MarkovChainSampler(PageRank([0, 1], [1, 0], n_nodes=2))
+
+    def test_hitting_times(self):
+        chain = gamblers_ruin(initial_position=3, upper_limit=6)
+        sampler = MarkovChainSampler(chain, rng=np.random.default_rng(1))
+        times = sampler.hitting_times([0, 6], n_walkers=20000, max_steps=1000)
+        self.assertTrue(np.all(times > 0))
+        # Expected duration of a fair game from 3 with limits 0 and 6 is 3 * 3
+        self.assertAlmostEqual(times.mean(), 9, delta=0.3)
+        self.assertTrue(np.all(sampler.hitting_times([0], n_walkers=5, max_steps=1, initial=3) == -1))
@@ -0,0 +1,29 @@
+import unittest
+
+import numpy as np
+
+from markov_chain.chain import MarkovChain
+from markov_chain.plot_chain import MarkovChainPlotter
+
+
+MATRIX = [[0.9, 0.5], [0.1, 0.5]]
+
+
+class TestPlotOverTime(unittest.TestCase):
+    def test_frames(self):
+        chain = MarkovChain(MATRIX, [0.0, 1.0])
+        fig = MarkovChainPlotter.plot_over_time(chain, timesteps=10, start_from=2)
+        self.assertEqual(len(fig.frames), 8)
+        np.testing.assert_array_almost_equal(fig.data[0].y, chain.state_at_time(2))
+
+    def test_tol_stops_early(self):
+        chain = MarkovChain(MATRIX, [0.0, 1.0])
+        fig = MarkovChainPlotter.plot_over_time(chain, timesteps=50, start_from=2, tol=1e-3)
+        self.assertLess(len(fig.frames), 48)
+        np.testing.assert_array_almost_equal(fig.data[0].y, chain.state_at_time(2))
+
+    def test_converged_before_start_from(self):
+        chain = MarkovChain(MATRIX, [0.0, 1.0])
+        fig = MarkovChainPlotter.plot_over_time(chain, timesteps=50, start_from=20, tol=1e-3)
+        self.assertEqual(len(fig.frames), 1)
+        np.testing.assert_array_almost_equal(fig.data[0].y, chain.stationary_state(), decimal=3)
@@ -0,0 +1,151 @@
+import unittest
+
+from fractions import Fraction
+
+import numpy as np
+
+from markov_chain.chain import MarkovChain
+from markov_chain.precision import conjugate_partners
+from markov_chain.precision import error_bound
+from markov_chain.precision import real_decomposition
+
+
+EXTENDED = np.finfo(np.longdouble).eps < np.finfo(np.float64).eps
+# Gap between the two nearly degenerate eigenvalues of NEAR_DEFECTIVE
+GAP = 2.0**-30
+NEAR_DEFECTIVE = np.array([[1.0, 0.5, 0.25 - GAP], [0.0, 0.5, 0.25], [0.0, 0.0, 0.5 + GAP]])
+
+
+def random_matrix(n, seed=0):
+    """Random dense chain, which has several complex conjugate pairs of eigenvalues"""
+    matrix = np.random.default_rng(seed).random((n, n)) + 2 * np.identity(n)
+    return matrix / matrix.sum(axis=0)
+
+
+def exact_state(matrix, initial_state, t):
+    """P^t x in exact rational arithmetic, for floating point matrices"""
+    matrix = [[Fraction(float(p)) for p in row] for row in matrix]
+    state = [Fraction(float(x)) for x in initial_state]
+    for _ in range(t):
+        state = [sum(p * x for p, x in zip(row, state)) for row in matrix]
+    return state
+
+
+def l1_error(state, exact):
+    return float(sum(abs(Fraction(float(x)) - y) for x, y in zip(state, exact)))
+
+
+class TestRealDecomposition(unittest.TestCase):
+    def test_reconstructs_matrix(self):
+        matrix = random_matrix(40)
+        decomposition = real_decomposition(matrix)
+        self.assertFalse(np.iscomplexobj(decomposition.eigenvectors))
+        self.assertFalse(np.iscomplexobj(decomposition.inverse_eigenvectors))
+        partners = conjugate_partners(decomposition.eigenvalues)
+        self.assertTrue(np.any(partners != np.arange(40)))
+        # P^T = W^-T B^T W^T, with the real block diagonal B (blocks [[a, b], [-b, a]]) built from the eigenvalues
+        blocks = np.diag(decomposition.eigenvalues.real)
+        pairs = partners != np.arange(40)
+        blocks[np.flatnonzero(pairs), partners[pairs]] = decomposition.eigenvalues.imag[pairs]
+        reconstructed = decomposition.inverse_eigenvectors @ blocks.T @ decomposition.eigenvectors
+        np.testing.assert_array_almost_equal(reconstructed, matrix.T)
+        np.testing.assert_array_almost_equal(
+            np.sort_complex(decomposition.eigenvalues), np.sort_complex(np.linalg.eigvals(matrix))
+        )
+
+    def test_matches_complex(self):
+        matrix = random_matrix(60)
+        initial_states = np.random.default_rng(1).dirichlet(np.ones(60), size=3)
+        reference = MarkovChain(matrix, initial_states)
+        chain = MarkovChain(matrix, initial_states, decomposition="real")
+        ts = np.arange(30)
+        states = chain.state_at_times(ts, engine="eig")
+        self.assertEqual(states.dtype, np.float64)
+        errors = np.abs(states - reference.state_at_times(ts, engine="eig")).sum(axis=-1)
+        self.assertTrue(np.all(errors.max(axis=1) <= 2 * np.array([chain.error_bound(t, "eig") for t in ts])))
+        np.testing.assert_array_almost_equal(chain.stationary_state(), reference.stationary_state())
+        np.testing.assert_array_almost_equal(chain.state_at_time(2.5, engine="eig"), reference.state_at_time(2.5))
+
+    def test_negative_eigenvalue_at_fractional_time(self):
+        # Eigenvalues 1 and -0.8: (-0.8)^2.5 is purely imaginary, so the two state chain is exactly uniform at t=2.5
+        swap = np.array([[0.1, 0.9], [0.9, 0.1]])
+        matrix = np.random.default_rng(2).random((50, 50))
+        for matrix in [swap, matrix / matrix.sum(axis=0)]:
+            self.assertTrue(np.any(np.linalg.eigvals(matrix).real < 0))
+            initial_state = np.eye(len(matrix))[0]
+            real = MarkovChain(matrix, initial_state, decomposition="real").state_at_time(2.5, engine="eig")
+            complex_ = MarkovChain(matrix, initial_state).state_at_time(2.5, engine="eig")
+            np.testing.assert_allclose(real, complex_, atol=1e-12, equal_nan=False)
+        np.testing.assert_allclose(MarkovChain(swap, [1.0, 0.0]).state_at_time(2.5, engine="eig"), [0.5, 0.5])
+
+    def test_unknown_decomposition(self):
+        with self.assertRaises(ValueError):
+            MarkovChain(random_matrix(3), decomposition="schur")
+
+
+class TestPrecision(unittest.TestCase):
+    def test_float32(self):
+        matrix = random_matrix(50)
+        initial_state = np.full(50, 1 / 50)
+        reference = MarkovChain(matrix, initial_state)
+        for decomposition in ["complex", "real"]:
+            chain = MarkovChain(matrix, initial_state, dtype=np.float32, decomposition=decomposition)
+            for engine in ["eig", "matvec", "squaring"]:
+                state = chain.state_at_time(20, engine=engine)
+                self.assertEqual(state.dtype, np.float32, engine)
+                error = np.abs(state - reference.state_at_time(20, engine=engine)).sum()
+                self.assertLessEqual(error, chain.error_bound(20, engine) + reference.error_bound(20, engine), engine)
+
+    def test_near_defective(self):
+        initial_state = np.array([0.0, 0.0, 1.0])
+        exact = exact_state(NEAR_DEFECTIVE, initial_state, 40)
+        double = MarkovChain(NEAR_DEFECTIVE, initial_state)
+        extended = MarkovChain(NEAR_DEFECTIVE, initial_state, dtype=np.longdouble)
+        self.assertEqual(extended.state_at_time(40).dtype, np.longdouble)
+        # The eigenvector matrix is ill-conditioned, so the decomposition loses about 9 digits
+        eig_error = l1_error(double.state_at_time(40, engine="eig"), exact)
+        self.assertLessEqual(eig_error, double.error_bound(40, "eig"))
+        self.assertGreater(eig_error, 1e-12)
+        for engine in ["matvec", "squaring"]:
+            self.assertLessEqual(
+                l1_error(double.state_at_time(40, engine=engine), exact), double.error_bound(40, engine)
+            )
+            state = extended.state_at_time(40, engine=engine)
+            error = float(
+                np.abs(state - [np.longdouble(x.numerator) / np.longdouble(x.denominator) for x in exact]).sum()
+            )
+            self.assertLessEqual(error, extended.error_bound(40, engine))
+
+    def test_extended_has_no_eig(self):
+        chain = MarkovChain(random_matrix(5), np.full(5, 0.2), dtype=np.longdouble)
+        self.assertNotEqual(chain._select_engine(10**6, None), "eig")
+        with self.assertRaises(ValueError):
+            chain.state_at_time(3, engine="eig")
+
+    @unittest.skipUnless(EXTENDED, "np.longdouble is float64 on this platform")
+    def test_extended_stationary(self):
+        # Birth-death chain whose stationary state has ratios prob_up / prob_down between neighbours
+        prob_up, prob_down = 0.375, 0.125
+        matrix = np.zeros((6, 6))
+        matrix[np.arange(1, 6), np.arange(5)] = prob_up
+        matrix[np.arange(5), np.arange(1, 6)] = prob_down
+        matrix += np.diag(1 - matrix.sum(axis=0))
+        weights = [Fraction(3) ** i for i in range(6)]
+        exact = [w / sum(weights) for w in weights]
+        result = MarkovChain(matrix, dtype=np.longdouble).solve_stationary()
+        self.assertTrue(result.converged)
+        self.assertEqual(result.state.dtype, np.longdouble)
+        error = float(
+            np.abs(result.state - [np.longdouble(x.numerator) / np.longdouble(x.denominator) for x in exact]).sum()
+        )
+        self.assertLess(error, 6 * 10 * np.finfo(np.longdouble).eps)
+
+
+class TestErrorBound(unittest.TestCase):
+    def test_bounds(self):
+        self.assertAlmostEqual(error_bound("matvec", 10, 100, np.float64), 1000 * 2.0**-53)
+        self.assertAlmostEqual(error_bound("eig", 10, 0, np.float32, condition_number=4.0), 40 * 2.0**-24)
+        self.assertGreater(error_bound("squaring", 10, 100, np.float32), error_bound("squaring", 10, 100, np.float64))
+        self.assertAlmostEqual(error_bound("fft", 16, 10, np.float64), 4 * (8 + 1 + 10) * 2.0**-53)
+        with self.assertRaises(ValueError):
+            error_bound("lanczos", 10, 100, np.float64)
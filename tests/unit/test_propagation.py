@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.gamblers_ruin import gamblers_ruin
+from markov_chain.propagation import MatrixPowerEngine
+from markov_chain.propagation import choose_engine
+
+
+class TestMatrixPowerEngine(unittest.TestCase):
+    def test_squaring_matches_matvec(self):
+        matrix = gamblers_ruin(initial_position=5, upper_limit=12, prob_up=0.3)._probability_matrix
+        engine = MatrixPowerEngine(matrix)
+        state = np.eye(13)[5]
+        for t in [0, 1, 2, 7, 64, 101]:
+            np.testing.assert_array_almost_equal(engine.squaring(state, t), engine.step(state, t))
+        self.assertEqual(engine.cached_powers, 7)
+
+    def test_sparse_squaring(self):
+        matrix = sp.csr_matrix([[0.9, 0.5], [0.1, 0.5]])
+        engine = MatrixPowerEngine(matrix)
+        np.testing.assert_array_almost_equal(engine.apply(np.array([0.2, 0.8]), 2, "squaring"), [0.732, 0.268])
+        with self.assertRaises(ValueError):
+            engine.apply(np.array([0.2, 0.8]), -1, "squaring")
+
+    def test_engines_agree_on_chain(self):
+        chain = gamblers_ruin(initial_position=5, upper_limit=10, prob_up=0.45)
+        for t in [0, 3, 50]:
+            expected = chain.state_at_time(t, engine="eig")
+            for engine in ["matvec", "squaring"]:
+                np.testing.assert_array_almost_equal(chain.state_at_time(t, engine=engine), expected)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            MarkovChain([[1.0]], [1.0], engine="magic")
+
+
+class TestChooseEngine(unittest.TestCase):
+    def test_policy(self):
+        self.assertEqual(choose_engine(1000, 5, 1000**2), "matvec")
+        self.assertEqual(choose_engine(1000, 10**6, 1000**2), "squaring")
+        self.assertEqual(choose_engine(1000, 10**6, 1000**2, decomposed=True, condition_number=1.0), "eig")
+        self.assertEqual(choose_engine(1000, 10**6, 1000**2, decomposed=True, condition_number=1e12), "squaring")
+        self.assertEqual(choose_engine(1000, 10**6, 1000**2, decomposed=True, decomposable=False), "squaring")
+        self.assertEqual(choose_engine(10**6, 100, 3 * 10**6, sparse=True), "matvec")
+        self.assertEqual(choose_engine(10, 2.5, 100), "eig")
+        self.assertEqual(choose_engine(10, -1, 100), "eig")
+
+    def test_unknown_conditioning(self):
+        # eig would be cheapest, but is not trusted before the condition number is known
+        self.assertEqual(choose_engine(10, 10**18, 100), "squaring")
+        self.assertEqual(choose_engine(10, 10**18, 100, condition_number=1.0), "eig")
+        chain = MarkovChain(np.array([[0.9, 0.2], [0.1, 0.8]]), [1.0, 0.0])
+        self.assertEqual(chain._select_engine(10**6, None), "squaring")
+        chain.state_at_time(2.5)
+        self.assertEqual(chain._select_engine(10**6, None), "eig")
+
+    def test_negative_time(self):
+        # Only eig can invert the chain; the matrix power engines still reject negative times
+        matrix = np.array([[0.9, 0.2], [0.1, 0.8]])
+        chain = MarkovChain(matrix, [0.5, 0.5])
+        previous = chain.state_at_time(-1)
+        np.testing.assert_array_almost_equal(matrix @ previous, [0.5, 0.5])
+        np.testing.assert_array_almost_equal(chain.state_at_times([3, -1]), [chain.state_at_time(3), previous])
+        with self.assertRaises(ValueError):
+            chain.state_at_time(-1, engine="matvec")
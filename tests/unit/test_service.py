@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from markov_chain import service
+from markov_chain.chain import MarkovChain
+from markov_chain.service import ChainSpec
+from markov_chain.service import EvaluationService
+
+
+MATRIX = np.array([[0.5, 0.2, 0.3], [0.25, 0.4, 0.3], [0.25, 0.4, 0.4]])
+INITIAL = np.array([1.0, 0.0, 0.0])
+
+
+class CountingChain(MarkovChain):
+    """MarkovChain counting how many times it is built, optionally waiting for an event before evaluating"""
+
+    built = 0
+    release = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        type(self).built += 1
+        super().__init__(*args, **kwargs)
+
+    def state_at_times(self, times):
+        if self.release is not None:
+            self.release.wait(5)
+        return super().state_at_times(times)
+
+
+class TestChainSpec(unittest.TestCase):
+    def test_key(self):
+        spec = ChainSpec(MarkovChain, {"probability_matrix": MATRIX, "initial_state": INITIAL})
+        same = ChainSpec(MarkovChain, {"initial_state": INITIAL.copy(), "probability_matrix": MATRIX.copy()})
+        self.assertEqual(spec.key, same.key)
+        changed = MATRIX.copy()
+        changed[0, 0] += 1e-12
+        self.assertNotEqual(spec.key, ChainSpec(MarkovChain, {"probability_matrix": changed}).key)
+        self.assertNotEqual(spec.key, ChainSpec(CountingChain, dict(spec.options)).key)
+
+
+class TestEvaluationService(unittest.TestCase):
+    def setUp(self):
+        service._simulations.clear()
+        CountingChain.built = 0
+        CountingChain.release = None
+        self.spec = ChainSpec(CountingChain, {"probability_matrix": MATRIX, "initial_state": INITIAL})
+        self.expected = MarkovChain(MATRIX, INITIAL).state_at_times([0, 1, 5])
+
+    def test_identical_queries_share_one_computation(self):
+        CountingChain.release = threading.Event()
+        with EvaluationService(max_workers=4) as evaluator:
+            futures = [evaluator.submit(self.spec, [0, 1, 5]) for _ in range(3)]
+            self.assertTrue(all(future is futures[0] for future in futures))
+            CountingChain.release.set()
+            np.testing.assert_array_almost_equal(futures[0].result(), self.expected)
+        self.assertEqual((evaluator.computed, evaluator.shared), (1, 2))
+        self.assertEqual(CountingChain.built, 1)
+        self.assertFalse(futures[0].result().flags.writeable)
+
+    def test_asyncio(self):
+        async def query(evaluator):
+            return await asyncio.gather(
+                *(evaluator.states_at_times(self.spec, [0, 1, 5]) for _ in range(5)),
+                evaluator.state_at_time(self.spec, 5),
+            )
+
+        with EvaluationService() as evaluator:
+            *states, last = asyncio.run(query(evaluator))
+        for state in states:
+            np.testing.assert_array_almost_equal(state, self.expected)
+        np.testing.assert_array_almost_equal(last, self.expected[2])
+        self.assertEqual(CountingChain.built, 1)
+
+    def test_finished_queries_reuse_the_simulation(self):
+        with EvaluationService() as evaluator:
+            evaluator.submit(self.spec, [1]).result()
+            evaluator.submit(self.spec, [1]).result()
+        self.assertEqual((evaluator.computed, evaluator.shared), (2, 0))
+        self.assertEqual(CountingChain.built, 1)
+
+    def test_errors_are_not_kept(self):
+        spec = ChainSpec(MarkovChain, {"probability_matrix": MATRIX})
+        with EvaluationService() as evaluator:
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    evaluator.submit(spec, [1]).result()
+        self.assertEqual(evaluator.computed, 2)
+
+    def test_process_pool(self):
+        spec = ChainSpec(MarkovChain, {"probability_matrix": MATRIX, "initial_state": INITIAL})
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            with EvaluationService(executor) as evaluator:
+                np.testing.assert_array_almost_equal(evaluator.submit(spec, [0, 1, 5]).result(), self.expected)
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.gamblers_ruin import gamblers_ruin
+from markov_chain.solvers import SINGULAR_SYSTEM
+from markov_chain.solvers import SOLVERS
+from markov_chain.solvers import SolverError
+from markov_chain.solvers import direct
+from markov_chain.solvers import power_iteration
+from markov_chain.solvers import recurrent_state
+from markov_chain.solvers import refined
+
+
+def random_walk(n, prob_up=0.6, prob_stay=0.1):
+    """Reflecting random walk with a unique stationary state"""
+    matrix = np.zeros((n, n))
+    for i in range(n):
+        matrix[i, i] = prob_stay
+        matrix[min(i + 1, n - 1), i] += prob_up
+        matrix[max(i - 1, 0), i] += 1 - prob_up - prob_stay
+    return matrix
+
+
+class TestSolvers(unittest.TestCase):
+    def test_all_methods_agree_with_eig(self):
+        matrix = random_walk(30)
+        reference = MarkovChain(matrix).stationary_state()
+        for sparse in [False, True]:
+            chain = MarkovChain(sp.csr_matrix(matrix) if sparse else matrix)
+            for method in SOLVERS:
+                kwargs = {"arnoldi": {"sigma": 1 + 1e-8} if sparse else {}, "jacobi": {"omega": 0.5}}.get(method, {})
+                result = chain.solve_stationary(method, tol=1e-12, **kwargs)
+                self.assertTrue(result.converged, method)
+                self.assertLess(result.residual, 1e-8, method)
+                np.testing.assert_array_almost_equal(result.state, reference, err_msg=method)
+
+    def test_iteration_cap(self):
+        result = power_iteration(random_walk(30), tol=1e-14, max_iter=3)
+        self.assertFalse(result.converged)
+        self.assertEqual(result.iterations, 3)
+        with self.assertRaises(RuntimeError):
+            MarkovChain(random_walk(30)).stationary_state("power", tol=1e-14, max_iter=3)
+
+    def test_periodic_needs_lazy(self):
+        matrix = np.array([[0.0, 1.0], [1.0, 0.0]])
+        self.assertFalse(power_iteration(matrix, x0=[1.0, 0.0], max_iter=10).converged)
+        result = power_iteration(matrix, x0=[1.0, 0.0], lazy=True)
+        self.assertTrue(result.converged)
+        np.testing.assert_array_almost_equal(result.state, [0.5, 0.5])
+
+    def test_arnoldi_small_chains(self):
+        for matrix in [np.array([[1.0]]), np.array([[0.9, 0.2], [0.1, 0.8]])]:
+            for chain in [MarkovChain(matrix), MarkovChain(sp.csc_matrix(matrix))]:
+                result = chain.solve_stationary("arnoldi")
+                self.assertTrue(result.converged)
+                np.testing.assert_array_almost_equal(result.state, MarkovChain(matrix).stationary_state())
+        with self.assertRaises(RuntimeError):
+            MarkovChain(np.identity(2)).stationary_state("arnoldi")
+
+    def test_reducible(self):
+        with self.assertRaises(SolverError):
+            direct(gamblers_ruin(initial_position=2, upper_limit=4)._probability_matrix)
+        with self.assertRaisesRegex(SolverError, SINGULAR_SYSTEM):
+            refined(gamblers_ruin(initial_position=2, upper_limit=4)._probability_matrix)
+
+    def test_transient_last_state(self):
+        # A single closed class {0, 1}, with the last state transient
+        matrix = np.array([[0.5, 0.5, 0.5], [0.5, 0.5, 0.25], [0.0, 0.0, 0.25]])
+        self.assertEqual(recurrent_state(matrix), 1)
+        for chain in [MarkovChain(matrix), MarkovChain(sp.csc_matrix(matrix))]:
+            for method in ["direct", "refined", "banded", "gmres"]:
+                result = chain.solve_stationary(method)
+                self.assertTrue(result.converged, method)
+                np.testing.assert_array_almost_equal(result.state, [0.5, 0.5, 0.0], err_msg=method)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            MarkovChain(random_walk(3)).stationary_state("magic")
@@ -0,0 +1,132 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.cache import DecompositionCache
+from markov_chain.chain import MarkovChain
+from markov_chain.instrumentation import instrument
+from markov_chain.storage import StorageError
+from markov_chain.storage import read_arrays
+from markov_chain.storage import write_arrays
+from markov_chain.structured import BandedMarkovChain
+from markov_chain.structured import CirculantMarkovChain
+
+
+MATRIX = np.array([[0.5, 0.2, 0.3], [0.25, 0.4, 0.3], [0.25, 0.4, 0.4]])
+INITIAL = np.array([[1.0, 0.0, 0.0], [0.2, 0.3, 0.5]])
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "chain.bin"
+
+    def test_arrays_round_trip(self):
+        arrays = {"a": np.arange(5, dtype=np.int32), "b": np.ones((2, 3), dtype=np.complex128)}
+        write_arrays(self.path, arrays, {"name": "test"})
+        loaded, metadata = read_arrays(self.path)
+        self.assertEqual(metadata["name"], "test")
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(loaded[name], array)
+            self.assertEqual(loaded[name].dtype, array.dtype)
+            self.assertFalse(loaded[name].flags.writeable)
+            self.assertIsInstance(loaded[name].base, np.memmap)
+
+    def test_corrupt_file(self):
+        write_arrays(self.path, {"a": np.arange(100.0)}, {})
+        offset = read_arrays(self.path)[1]["arrays"]["a"]["offset"]
+        data = bytearray(self.path.read_bytes())
+        data[offset + 100] ^= 0xFF
+        self.path.write_bytes(bytes(data))
+        with self.assertRaises(StorageError):
+            read_arrays(self.path)
+        read_arrays(self.path, verify=False)
+
+    def test_not_a_chain_file(self):
+        self.path.write_bytes(b"not a chain file at all")
+        with self.assertRaises(StorageError):
+            read_arrays(self.path)
+
+
+class TestSaveLoad(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "chain.bin"
+
+    def test_dense(self):
+        chain = MarkovChain(MATRIX, INITIAL, engine="matvec")
+        chain.save(self.path)
+        loaded = MarkovChain.load(self.path)
+        self.assertEqual(loaded.engine, "matvec")
+        self.assertFalse(loaded._probability_matrix.flags.writeable)
+        np.testing.assert_array_almost_equal(loaded.state_at_time(7), chain.state_at_time(7))
+
+    def test_sparse(self):
+        matrix = sp.random(200, 200, density=0.05, random_state=0, format="csc") + sp.identity(200)
+        matrix = sp.csc_matrix(matrix / matrix.sum(axis=0))
+        chain = MarkovChain(matrix, np.full(200, 1 / 200))
+        chain.save(self.path)
+        loaded = MarkovChain.load(self.path)
+        self.assertTrue(sp.issparse(loaded._probability_matrix))
+        self.assertFalse(loaded._probability_matrix.data.flags.writeable)
+        np.testing.assert_array_almost_equal(loaded.state_at_time(5), chain.state_at_time(5))
+
+    def test_banded(self):
+        matrix = np.diag([0.75, 0.5, 0.5, 0.5, 0.75]) + np.diag([0.25] * 4, 1) + np.diag([0.25] * 4, -1)
+        chain = BandedMarkovChain(matrix, [0, 0.5, 0.5, 0, 0])
+        chain.save(self.path)
+        loaded = BandedMarkovChain.load(self.path)
+        self.assertEqual((loaded.lower, loaded.upper), (chain.lower, chain.upper))
+        np.testing.assert_array_almost_equal(loaded.state_at_time(3), chain.state_at_time(3))
+
+    def test_decomposition_is_not_recomputed(self):
+        for decomposition in ["complex", "real"]:
+            chain = MarkovChain(MATRIX, INITIAL, decomposition=decomposition, cache=None)
+            chain.save(self.path, with_decomposition=True)
+            with instrument() as recorder:
+                loaded = MarkovChain.load(self.path, cache=None)
+                states = loaded.state_at_times([0, 3, 10])
+            self.assertEqual(recorder.named("MarkovChain.eigendecomposition"), [])
+            self.assertEqual(loaded.decomposition, decomposition)
+            np.testing.assert_array_almost_equal(states, chain.state_at_times([0, 3, 10]))
+
+    def test_stationary(self):
+        chain = MarkovChain(MATRIX)
+        chain.save(self.path, with_stationary=True)
+        loaded = MarkovChain.load(self.path)
+        with instrument() as recorder:
+            result = loaded.solve_stationary()
+        self.assertEqual(recorder.named("MarkovChain.solve_stationary"), [])
+        self.assertTrue(result.converged)
+        np.testing.assert_array_almost_equal(result.state, chain.stationary_state())
+        np.testing.assert_array_almost_equal(loaded.stationary_state("direct"), chain.stationary_state())
+
+    def test_circulant(self):
+        chain = CirculantMarkovChain([0.5, 0.5, 0.0], [1.0, 0.0, 0.0])
+        chain.save(self.path, with_stationary=True)
+        loaded = CirculantMarkovChain.load(self.path)
+        np.testing.assert_array_equal(loaded._column, chain._column)
+        np.testing.assert_array_almost_equal(loaded.state_at_time(4), chain.state_at_time(4))
+        np.testing.assert_array_almost_equal(loaded.stationary_state(), [1 / 3] * 3)
+        cache = DecompositionCache()
+        self.assertIs(CirculantMarkovChain.load(self.path, cache=cache, engine="auto", dtype=np.float64)._cache, cache)
+        for kwargs in [{"engine": "eig"}, {"dtype": np.float32}]:
+            with self.assertRaises(ValueError):
+                CirculantMarkovChain.load(self.path, **kwargs)
+        with self.assertRaises(ValueError):
+            MarkovChain.load(self.path)
+        MarkovChain(MATRIX).save(self.path)
+        with self.assertRaises(ValueError):
+            CirculantMarkovChain.load(self.path)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            CirculantMarkovChain([0.5, 0.5, 0.0]).save(self.path, with_decomposition=True)
+        with self.assertRaises(ValueError):
+            MarkovChain(sp.csc_matrix(MATRIX)).save(self.path, with_decomposition=True)
@@ -0,0 +1,143 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from markov_chain.chain import MarkovChain
+from markov_chain.examples.gamblers_ruin import gamblers_ruin
+from markov_chain.matrix_structure import bandwidth
+from markov_chain.matrix_structure import circulant_column
+from markov_chain.matrix_structure import to_banded
+from markov_chain.structured import BandedMarkovChain
+from markov_chain.structured import CirculantMarkovChain
+from markov_chain.structured import structured_chain
+
+
+def circulant(column):
+    n = len(column)
+    return np.array(column)[(np.arange(n)[:, None] - np.arange(n)[None, :]) % n]
+
+
+def reflecting_walk(n, prob_up=0.6):
+    matrix = np.zeros((n, n))
+    for i in range(n):
+        matrix[min(i + 1, n - 1), i] += prob_up
+        matrix[max(i - 1, 0), i] += 1 - prob_up
+    return matrix
+
+
+class TestMatrixStructure(unittest.TestCase):
+    def test_bandwidth(self):
+        self.assertEqual(bandwidth(gamblers_ruin(initial_position=3, upper_limit=8)._probability_matrix), (1, 1))
+        self.assertEqual(bandwidth(sp.csr_matrix(np.triu(np.ones((4, 4))))), (0, 3))
+        bands = to_banded(np.array([[1.0, 2.0], [3.0, 4.0]]), 1, 1)
+        np.testing.assert_array_equal(bands, [[0.0, 2.0], [1.0, 4.0], [3.0, 0.0]])
+
+    def test_circulant_column(self):
+        column = [0.5, 0.3, 0.0, 0.2]
+        np.testing.assert_array_equal(circulant_column(circulant(column)), column)
+        np.testing.assert_array_equal(circulant_column(sp.csr_matrix(circulant(column))), column)
+        self.assertIsNone(circulant_column(reflecting_walk(4)))
+
+
+class TestBandedMarkovChain(unittest.TestCase):
+    def test_matches_dense(self):
+        matrix = reflecting_walk(50)
+        initial_state = np.eye(50)[10]
+        chain = BandedMarkovChain(matrix, initial_state)
+        reference = MarkovChain(matrix, initial_state)
+        self.assertEqual((chain.lower, chain.upper), (1, 1))
+        self.assertIsInstance(chain._probability_matrix, sp.dia_matrix)
+        np.testing.assert_array_almost_equal(chain.state_at_times([0, 7, 40]), reference.state_at_times([0, 7, 40]))
+        np.testing.assert_array_almost_equal(chain.stationary_state(), reference.stationary_state())
+
+    def test_default_stationary_method(self):
+        matrix = reflecting_walk(20)
+        self.assertEqual(BandedMarkovChain(matrix)._default_stationary_method(), "banded")
+        chain = BandedMarkovChain(matrix, dtype=np.longdouble)
+        self.assertEqual(chain._default_stationary_method(), "refined")
+        result = chain.solve_stationary()
+        self.assertEqual(result.state.dtype, np.longdouble)
+        np.testing.assert_array_almost_equal(result.state, MarkovChain(matrix).stationary_state())
+
+    def test_from_diagonals(self):
+        n = 1000
+        down = np.r_[np.full(n - 2, 0.5), 0.0]
+        up = np.r_[0.0, np.full(n - 2, 0.5)]
+        chain = BandedMarkovChain.from_diagonals([down, np.r_[1.0, np.zeros(n - 2), 1.0], up], [1, 0, -1])
+        self.assertAlmostEqual(chain.absorption().probabilities[0, 500], 1 - 500 / (n - 1))
+
+
+class TestCirculantMarkovChain(unittest.TestCase):
+    def test_matches_dense(self):
+        column = [0.1, 0.6, 0.0, 0.0, 0.3]
+        initial_states = [np.eye(5)[0], [[0.2, 0.2, 0.2, 0.2, 0.2], [0.0, 0.5, 0.5, 0.0, 0.0]]]
+        for initial_state in initial_states:
+            chain = CirculantMarkovChain(column, initial_state)
+            reference = MarkovChain(circulant(column), initial_state)
+            for t in [0, 1, 13]:
+                np.testing.assert_array_almost_equal(
+                    chain.state_at_time(t), reference.state_at_time(t, engine="matvec")
+                )
+            np.testing.assert_array_almost_equal(list(chain.trajectory(3)), reference.state_at_times(range(4)))
+        np.testing.assert_array_almost_equal(chain.stationary_state(), np.full((2, 5), 0.2))
+        np.testing.assert_array_almost_equal(chain.stationary_state("power"), np.full((2, 5), 0.2))
+
+    def test_reducible(self):
+        chain = CirculantMarkovChain([0.0, 0.0, 1.0, 0.0])
+        self.assertFalse(chain.is_irreducible)
+        with self.assertRaises(RuntimeError):
+            chain.stationary_state()
+        with self.assertRaises(ValueError):
+            CirculantMarkovChain([0.5, 0.6])
+
+    def test_markov_chain_api(self):
+        column = [0.1, 0.6, 0.0, 0.0, 0.3]
+        chain = CirculantMarkovChain(column, np.eye(5)[0])
+        reference = MarkovChain(circulant(column), np.eye(5)[0])
+        np.testing.assert_array_equal(chain.to_sparse().toarray(), circulant(column))
+        self.assertEqual(chain.decomposition, "complex")
+        self.assertGreater(chain.error_bound(5), 0)
+        self.assertLess(chain.error_bound(5), reference.error_bound(5, engine="matvec"))
+        self.assertEqual(
+            [c.states.tolist() for c in chain.communicating_classes()],
+            [c.states.tolist() for c in reference.communicating_classes()],
+        )
+        self.assertTrue(chain.is_irreducible)
+        self.assertEqual(
+            [c.states.tolist() for c in CirculantMarkovChain([0.0, 0.0, 1.0, 0.0]).communicating_classes()],
+            [[0, 2], [1, 3]],
+        )
+        for method in ["arnoldi", "gmres"]:
+            np.testing.assert_array_almost_equal(chain.stationary_state(method), np.full(5, 0.2))
+        for method in ["direct", "eig", "classes", "jacobi"]:
+            with self.assertRaisesRegex(ValueError, "power, arnoldi, gmres"):
+                chain.stationary_state(method)
+        with self.assertRaises(ValueError):
+            chain.stationary_state("arnoldi", sigma=1 + 1e-8)
+        self.assertEqual(chain.mixing_time(), reference.mixing_time())
+        from_coo = CirculantMarkovChain.from_coo(*sp.find(circulant(column)), initial_state=np.eye(5)[0])
+        np.testing.assert_array_equal(from_coo._column, column)
+        with self.assertRaises(ValueError):
+            CirculantMarkovChain.from_coo([0, 1], [1, 0], [1.0, 1.0], n_states=3)
+
+    def test_update(self):
+        column = [0.1, 0.6, 0.0, 0.0, 0.3]
+        new_column = np.array([[0.5], [0.0], [0.0], [0.5], [0.0]])
+        updated = CirculantMarkovChain(column, np.eye(5)[0]).update(columns=[2], new_columns=new_column)
+        self.assertIs(type(updated), MarkovChain)
+        reference = MarkovChain(circulant(column), np.eye(5)[0]).update(columns=[2], new_columns=new_column)
+        np.testing.assert_array_almost_equal(updated.stationary_state(), reference.stationary_state())
+        np.testing.assert_array_almost_equal(updated.state_at_time(3), reference.state_at_time(3))
+
+    def test_absorption(self):
+        result = CirculantMarkovChain([1.0, 0.0, 0.0]).absorption()
+        np.testing.assert_array_equal(result.absorbing_states, [0, 1, 2])
+        np.testing.assert_array_equal(result.probabilities, np.identity(3))
+        with self.assertRaises(RuntimeError):
+            CirculantMarkovChain([0.5, 0.5, 0.0]).absorption()
+
+    def test_structured_chain(self):
+        self.assertIsInstance(structured_chain(circulant([0.2, 0.8, 0.0])), CirculantMarkovChain)
+        self.assertIsInstance(structured_chain(reflecting_walk(40)), BandedMarkovChain)
+        self.assertIs(type(structured_chain([[0.9, 0.5], [0.1, 0.5]])), MarkovChain)